@@ -0,0 +1,220 @@
+import asyncio
+import logging
+from urllib.parse import urlsplit
+
+from tqdm import tqdm
+
+import institution_runner as ir
+import posting_record
+import run_metrics
+from posting_filter import PostingFilter
+
+__all__ = [
+    "HostLimiter",
+    "run_institution_scraper_async",
+    "run_institutions_async"
+]
+
+# Default cap on in-flight requests against a single Workday host
+DEFAULT_MAX_PER_HOST = 4
+
+
+class HostLimiter:
+    """
+    Caps the number of in-flight requests per host.
+
+    Each host (e.g. `mtb.wd5.myworkdayjobs.com`) gets its own semaphore, so a
+    slow tenant never starves the others. Request pacing within a slot is
+    left to the host's token bucket in `http_client`. Notion calls don't go
+    through the limiter: `notion_scheduler` paces them and orders every
+    institution's calls by priority.
+    """
+
+    def __init__(self, max_per_host=DEFAULT_MAX_PER_HOST, overrides=None):
+        self.max_per_host = max_per_host
+        self.overrides = dict(overrides or {})
+        self._semaphores = {}
+
+    def _semaphore(self, host):
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.overrides.get(host, self.max_per_host))
+        return self._semaphores[host]
+
+    async def call(self, url, func, *args, **kwargs):
+        """Run a blocking request function in a worker thread under `url`'s host limit."""
+        async with self._semaphore(urlsplit(url).netloc):
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+
+async def _fetch_job_details(limiter, url, plan, company_name, store, checkpoint):
+    """
+    Fetch the details of a plan a window of `UPLOAD_CHUNK` entries at a time,
+    yielding them in plan order. Only one window of full postings is held.
+    """
+    pbar = tqdm(total=len(plan), desc=f"{company_name}: Fetching job data")
+
+    async def fetch(job, job_data):
+        if job_data is None:
+            job_url = ir.build_job_url(url, job)
+            job_data = await limiter.call(job_url, ir.fetch_job_detail, job_url, company_name, store, job)
+            if job_data and checkpoint is not None:
+                checkpoint.record_detail(job, job_data)
+        pbar.update(1)
+        return job_data
+
+    for start in range(0, len(plan), ir.UPLOAD_CHUNK):
+        # gather() preserves input order, so postings line up with the sequential path
+        window = await asyncio.gather(*(fetch(job, job_data) for job, job_data in plan[start:start + ir.UPLOAD_CHUNK]))
+        for job_data in window:
+            if job_data:
+                yield job_data
+    pbar.close()
+
+
+def _upload(records, existing_req_ids, company_name, fetches_saved, store, notion_index, checkpoint, listings,
+            pagination_complete):
+    success, skipped, failed, retried = ir.upload_job_postings(
+        records, existing_req_ids, company_name, notion_index, checkpoint
+    )
+    ir.write_upload_summary(company_name, success, skipped, failed, len(records), fetches_saved, retried)
+    ir.sync_notion_pages(company_name, records, existing_req_ids, listings, pagination_complete, notion_index)
+    if store is not None:
+        store.record_run(company_name, len(listings), pagination_complete and not failed)
+    if checkpoint is not None:
+        checkpoint.clear()
+
+
+async def run_institution_scraper_async(institution: dict, limiter: HostLimiter, store=None, notion_index=None,
+                                        checkpoint=None, on_posting=None):
+    """
+    Async counterpart of `institution_runner.run_institution_scraper`.
+
+    Listing pages and job detail GETs fan out concurrently, and Notion deduplication/upload run in worker threads
+    alongside other institutions', their calls ordered by `notion_scheduler`. As in `iter_institution_postings`,
+    only compact records are kept for the upload and sync stages.
+
+    Returns:
+        list: The same `job_postings` list, or, when `on_posting` is given, an empty list: each posting is
+        handed to `on_posting` in order as it arrives instead of being kept.
+    """
+    url = institution["workday_url"]
+    filters = ir.facet_filters(institution)
+    search_text = institution["search_text"]
+    company_name = institution["name"]
+
+    ir.log_with_prefix("info", company_name, f"🏁 Starting scrape.")
+    try:
+        posting_filter = PostingFilter.from_institution(institution)
+    except ValueError as e:
+        ir.log_with_prefix("error", company_name, f"Invalid filters: {e}")
+        return []
+    ir.configure_tenant_rate(institution)
+
+    applied_facets = {}
+    if filters:
+        with run_metrics.stage(company_name, "facets") as stage:
+            resolved = ir.resolve_cached_facets(url, filters)
+            if resolved is None:
+                facets = await limiter.call(url, ir.fetch_facets, url)
+                if facets is None:
+                    ir.log_with_prefix("error", company_name, f"Failed to fetch facets.")
+                    return []
+                resolved = ir.resolve_fetched_facets(url, facets, filters)
+
+            applied_facets, missing = resolved
+            stage.items = sum(len(ids) for ids in applied_facets.values())
+        if not ir.check_applied_facets(company_name, filters, applied_facets, missing):
+            return []
+
+    # Listing pages are fetched concurrently within the thread, up to the host limit
+    page_size = institution.get("page_size", ir.PAGE_SIZE)
+    with run_metrics.stage(company_name, "pagination") as stage:
+        unchanged, first_page = await limiter.call(
+            url, ir.check_first_page, url, applied_facets, search_text, company_name, page_size, store, checkpoint
+        )
+        if not unchanged:
+            listings, pagination_complete = await asyncio.to_thread(
+                ir.collect_listings, url, applied_facets, search_text, company_name,
+                page_size=page_size, checkpoint=checkpoint, workers=limiter.max_per_host, first_page=first_page
+            )
+            stage.items = len(listings)
+    if unchanged:
+        ir.write_unchanged_summary(company_name)
+        if checkpoint is not None:
+            checkpoint.clear()
+        return []
+
+    with run_metrics.stage(company_name, "dedup") as stage:
+        if notion_index is not None:
+            existing_req_ids, existing_slugs = ir.fetch_existing_job_keys(company_name, notion_index)
+        else:
+            existing_req_ids, existing_slugs = await asyncio.to_thread(ir.fetch_existing_job_keys, company_name)
+        plan, fetches_saved = ir.plan_detail_fetches(
+            company_name, listings, existing_req_ids, existing_slugs, store, pagination_complete, checkpoint,
+            posting_filter
+        )
+        stage.items = len(listings)
+
+    job_postings = []
+    records = []
+    with posting_record.open_description_store() as descriptions:
+        with run_metrics.stage(company_name, "details") as stage:
+            async for job_data in _fetch_job_details(limiter, url, plan, company_name, store, checkpoint):
+                if posting_filter is not None and not posting_filter.accepts_detail(job_data):
+                    continue
+                records.append(posting_record.PostingRecord.from_detail(job_data, descriptions))
+                stage.items += 1
+                if on_posting is not None:
+                    on_posting(job_data)
+                else:
+                    job_postings.append(job_data)
+
+        await asyncio.to_thread(
+            _upload, records, existing_req_ids, company_name, fetches_saved, store, notion_index,
+            checkpoint, listings, pagination_complete
+        )
+    ir.write_filter_summary(company_name, posting_filter)
+
+    return job_postings
+
+
+async def run_institutions_async(institutions, max_per_host=DEFAULT_MAX_PER_HOST, max_institutions=None,
+                                 store=None, notion_index=None, checkpoints=None, on_postings=None):
+    """
+    Scrape several institutions concurrently.
+
+    Args:
+        institutions (list): Institution configs as returned by `load_institutions_config`.
+        max_per_host (int): Maximum in-flight requests per Workday host.
+        max_institutions (int): Optional cap on institutions processed at once.
+        store (JobStore): Optional local job store shared by all institutions.
+        notion_index (NotionIndex): Optional refreshed Notion index shared by all institutions.
+        checkpoints (list): Optional `InstitutionCheckpoint` per institution, in config order.
+        on_postings (list): Optional callable per institution, in config order, that is handed each of its
+            postings as it arrives (see `run_institution_scraper_async`).
+
+    Returns:
+        list: One result per institution, in config order. Each result is what
+        `run_institution_scraper` would have returned, or an empty list if the
+        institution failed (the error is logged).
+    """
+    limiter = HostLimiter(max_per_host=max_per_host)
+    gate = asyncio.Semaphore(max_institutions or len(institutions) or 1)
+
+    async def run_one(institution, checkpoint, on_posting):
+        async with gate:
+            try:
+                return await run_institution_scraper_async(
+                    institution, limiter, store, notion_index, checkpoint, on_posting
+                )
+            except Exception as e:
+                # One failing institution must not cost the others their results
+                logging.exception(f"[{institution['name']}] Async scrape failed: {e}")
+                return []
+
+    checkpoints = checkpoints or [None] * len(institutions)
+    on_postings = on_postings or [None] * len(institutions)
+    return await asyncio.gather(*(
+        run_one(institution, checkpoint, on_posting)
+        for institution, checkpoint, on_posting in zip(institutions, checkpoints, on_postings)
+    ))
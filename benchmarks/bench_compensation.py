@@ -0,0 +1,117 @@
+"""
+Accuracy check and benchmark for salary extraction.
+
+Scores the original `notion_client.extract_dollar_range` and the
+`compensation` engine against the labelled cases in
+`benchmarks/compensation/cases.jsonl` (expected annualized low/high and pay
+period, or nulls for descriptions without pay), then compares throughput:
+the original extractor and `compensation.extract_salary_range` called once
+per posting, and `compensation.extract_salary_ranges` over the whole batch.
+
+Usage:
+    python benchmarks/bench_compensation.py
+    python benchmarks/bench_compensation.py --iterations 50
+    python benchmarks/bench_compensation.py --postings json_output/workday_response_MandT_Bank.json
+
+`--postings` adds the descriptions from scraper output files to the
+throughput corpus. Exits non-zero if the engine gets any labelled case wrong.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import compensation
+import json_output
+import notion_client as nc
+
+CASES_PATH = os.path.join(BENCH_DIR, "compensation", "cases.jsonl")
+CORPUS_DIR = os.path.join(BENCH_DIR, "corpus")
+
+# Copies of the corpus in the throughput run; each copy is made distinct so
+# the batch API cannot skip it as a duplicate
+CORPUS_COPIES = 50
+
+
+def load_cases(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def score(extract, cases):
+    """Returns the names of cases whose (low, high) differ from the label."""
+    return [
+        case["name"] for case in cases
+        if tuple(extract(case["html"])) != (case["low"], case["high"])
+    ]
+
+
+def load_descriptions(posting_files):
+    descriptions = []
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            descriptions.append(f.read())
+    for path in posting_files:
+        descriptions += [p["jobDescription"] for p in json_output.iter_postings(path) if p.get("jobDescription")]
+    return [f"{html}<!-- {i} -->" for i in range(CORPUS_COPIES) for html in descriptions]
+
+
+def measure(extract_batch, descriptions, iterations):
+    """Returns descriptions/second."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        extract_batch(descriptions)
+    return len(descriptions) * iterations / (time.perf_counter() - start)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check and benchmark salary extraction.")
+    parser.add_argument("--iterations", type=int, default=20, help="Passes over the throughput corpus (default: 20)")
+    parser.add_argument("--cases", default=CASES_PATH, help="Labelled cases (JSON Lines)")
+    parser.add_argument("--postings", nargs="*", default=[], help="Scraper output files to add to the throughput corpus")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    cases = load_cases(args.cases)
+
+    print(f"🎯 Accuracy on {len(cases)} labelled cases")
+    failures = {}
+    for name, extract in (("original", nc.extract_dollar_range), ("compensation", compensation.extract_salary_range)):
+        failures[name] = score(extract, cases)
+        print(f"  {name:<14}{len(cases) - len(failures[name]):>4}/{len(cases)} correct")
+
+    batch = compensation.extract_salary_ranges([case["html"] for case in cases])
+    batch_failures = [
+        case["name"] for case, salary_range in zip(cases, batch)
+        if salary_range != (case["low"], case["high"])
+    ]
+
+    descriptions = load_descriptions(args.postings)
+    print(f"\n{'implementation':<22}{'docs/s':>10}")
+    implementations = [
+        ("original", lambda docs: [nc.extract_dollar_range(html) for html in docs]),
+        ("compensation", lambda docs: [compensation.extract_salary_range(html) for html in docs]),
+        ("compensation (batch)", compensation.extract_salary_ranges)
+    ]
+    for name, extract_batch in implementations:
+        print(f"{name:<22}{measure(extract_batch, descriptions, args.iterations):>10.0f}")
+
+    wrong = sorted(set(failures["compensation"]) | set(batch_failures))
+    if wrong:
+        print(f"\n❌ Wrong on {len(wrong)} case(s):")
+        for name in wrong:
+            print(f"  - {name}")
+        return 1
+    print(f"\n✅ Compensation engine matches all {len(cases)} labels, one posting at a time and batched")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Benchmark and equivalence check for the HTML -> Notion block converters.
+
+Runs the single-pass `job_parser.html_to_notion_blocks` and the BeautifulSoup
+reference `job_parser.html_to_notion_blocks_bs4` over a corpus of Workday
+`jobDescription` HTML, verifies both produce exactly the golden blocks, then
+reports throughput and memory allocation for each.
+
+Usage:
+    python benchmarks/bench_job_parser.py
+    python benchmarks/bench_job_parser.py --iterations 500
+    python benchmarks/bench_job_parser.py --postings json_output/workday_response_MandT_Bank.json
+    python benchmarks/bench_job_parser.py --update-golden
+
+`--postings` adds the descriptions from scraper output files (any format
+`json_output` reads) to the corpus, so the check can run over real scrapes.
+Exits non-zero if any document converts differently.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import job_parser as jp
+import json_output
+
+CORPUS_DIR = os.path.join(BENCH_DIR, "corpus")
+GOLDEN_DIR = os.path.join(BENCH_DIR, "golden")
+
+IMPLEMENTATIONS = [
+    ("bs4", jp.html_to_notion_blocks_bs4),
+    ("streaming", jp.html_to_notion_blocks)
+]
+
+
+def load_corpus(corpus_dir, posting_files):
+    """Returns a list of (name, html, golden_path or None)."""
+    documents = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.html"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "r", encoding="utf-8") as f:
+            documents.append((name, f.read(), os.path.join(GOLDEN_DIR, f"{name}.json")))
+
+    for path in posting_files:
+        for i, posting in enumerate(json_output.iter_postings(path)):
+            html = posting.get("jobDescription")
+            if html:
+                name = f"{os.path.basename(path)}#{posting.get('jobReqId') or i}"
+                documents.append((name, html, None))
+    return documents
+
+
+def check_equivalence(documents, update_golden=False):
+    """Returns the names of documents whose outputs differ."""
+    mismatches = []
+    for name, html, golden_path in documents:
+        expected = jp.html_to_notion_blocks_bs4(html)
+
+        if golden_path is not None:
+            if update_golden:
+                os.makedirs(GOLDEN_DIR, exist_ok=True)
+                with open(golden_path, "w", encoding="utf-8") as f:
+                    json.dump(expected, f, indent=2, ensure_ascii=False)
+                    f.write("\n")
+            else:
+                with open(golden_path, "r", encoding="utf-8") as f:
+                    if json.load(f) != expected:
+                        mismatches.append(f"{name} (bs4 vs golden)")
+
+        if jp.html_to_notion_blocks(html) != expected:
+            mismatches.append(f"{name} (streaming vs bs4)")
+    return mismatches
+
+
+def measure(convert, documents, iterations):
+    """Returns (documents/second, MB/second, mean peak KB per document)."""
+    total_bytes = sum(len(html.encode("utf-8")) for _, html, _ in documents)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for _, html, _ in documents:
+            convert(html)
+    elapsed = time.perf_counter() - start
+
+    peaks = []
+    tracemalloc.start()
+    for _, html, _ in documents:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        convert(html)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    docs_per_second = len(documents) * iterations / elapsed
+    mb_per_second = total_bytes * iterations / elapsed / 1e6
+    return docs_per_second, mb_per_second, sum(peaks) / len(peaks) / 1024
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the HTML to Notion block converters.")
+    parser.add_argument("--iterations", type=int, default=200, help="Passes over the corpus per implementation (default: 200)")
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="Directory of jobDescription .html files")
+    parser.add_argument("--postings", nargs="*", default=[], help="Scraper output files to add to the corpus")
+    parser.add_argument("--update-golden", action="store_true", help="Rewrite the golden block files from the bs4 implementation")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # BeautifulSoup warns on descriptions that look like URLs or file names
+    warnings.filterwarnings("ignore", module="bs4")
+
+    documents = load_corpus(args.corpus, args.postings)
+    if not documents:
+        print("No documents found.")
+        return 1
+
+    total_kb = sum(len(html.encode("utf-8")) for _, html, _ in documents) / 1024
+    print(f"📄 Corpus: {len(documents)} documents, {total_kb:.1f} KB")
+
+    mismatches = check_equivalence(documents, args.update_golden)
+    if mismatches:
+        print(f"❌ Output differs on {len(mismatches)} document(s):")
+        for name in mismatches:
+            print(f"  - {name}")
+        return 1
+    print(f"✅ Identical blocks on all {len(documents)} documents" + (" (golden files updated)" if args.update_golden else ""))
+
+    print(f"\n{'implementation':<16}{'docs/s':>10}{'MB/s':>8}{'peak KB/doc':>14}")
+    results = {}
+    for name, convert in IMPLEMENTATIONS:
+        results[name] = measure(convert, documents, args.iterations)
+        docs_per_second, mb_per_second, peak_kb = results[name]
+        print(f"{name:<16}{docs_per_second:>10.0f}{mb_per_second:>8.2f}{peak_kb:>14.1f}")
+
+    speedup = results["streaming"][0] / results["bs4"][0]
+    print(f"\n⚡ Streaming converter is {speedup:.1f}x faster")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+End-to-end benchmark of the scraper against the local Workday/Notion stand-in.
+
+Starts `stub_server.StubServers`, writes an institutions config pointing at
+it, runs `scraper.py` in a fresh working directory (cold job store, Notion
+index, conversion and facet caches) and reports jobs/sec from the run
+report, along with the per-stage timings and what the stub served.
+
+Usage:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --institutions 4 --jobs 500 --throttle-rate 0.02
+    python benchmarks/bench_pipeline.py --record fixtures/stub_run.jsonl
+    python benchmarks/bench_pipeline.py -- --async --parse-workers 4
+    python benchmarks/bench_pipeline.py --institutions 8 --workers 4
+
+Arguments after `--` are passed to `scraper.py`. `--workers N` queues the
+institutions with `scraper.py --enqueue` and runs N `--worker` processes
+against the shared queue, each with its own job store, Notion index and
+conversion cache as if on separate machines, sharing one `--notion-rate`
+budget through `--notion-budget`. `--record` keeps a replay
+fixture of the run, plus the institutions config it was recorded with, so
+`scraper.py --replay` can serve the same run offline. Exits non-zero if
+the run does not create one Notion page per posting.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import stub_server
+
+
+def write_config(path, servers, institutions, rate_limit, page_size):
+    config = {"institutions": [
+        {
+            "name": f"Stub Institution {i}",
+            "workday_url": servers.tenant_url(f"t{i}"),
+            "search_text": "",
+            "locations": ["Buffalo, NY"],
+            "rate_limit": rate_limit,
+            "page_size": page_size
+        }
+        for i in range(institutions)
+    ]}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+
+
+def scraper_env(servers):
+    return dict(
+        os.environ,
+        NOTION_API_BASE=servers.notion_api_base,
+        NOTION_TOKEN="stub-token",
+        DATABASE_ID="stub-jobs-db",
+        APPLIED_DATABASE_ID="stub-applied-db"
+    )
+
+
+def scraper_command(args, *extra):
+    return [
+        sys.executable, os.path.join(REPO_DIR, "scraper.py"),
+        "--config", os.path.join("config", "institutions.yaml"),
+        "--notion-rate", str(args.notion_rate),
+        *extra
+    ]
+
+
+def run_scraper(workdir, servers, args, scraper_args):
+    command = scraper_command(args, "--report", "run_report.json")
+    if args.record:
+        command += ["--record", os.path.abspath(args.record)]
+    command += scraper_args
+
+    start = time.perf_counter()
+    output = None if args.verbose else subprocess.DEVNULL
+    completed = subprocess.run(command, cwd=workdir, env=scraper_env(servers), stdout=output, stderr=output)
+    return completed.returncode, time.perf_counter() - start
+
+
+def run_workers(workdir, servers, args, scraper_args):
+    """Queue the institutions, run `args.workers` worker processes and merge their reports."""
+    env = scraper_env(servers)
+    output = None if args.verbose else subprocess.DEVNULL
+    start = time.perf_counter()
+    subprocess.run(scraper_command(args, "--enqueue"), cwd=workdir, env=env, stdout=output, check=True)
+
+    workers = []
+    for i in range(args.workers):
+        command = scraper_command(
+            args, "--worker", "--worker-id", f"bench-{i}", "--report", f"run_report_{i}.json",
+            "--store", f"state/worker_{i}/job_store.sqlite3",
+            "--notion-index", f"state/worker_{i}/notion_index.sqlite3",
+            "--conversion-cache", f"state/worker_{i}/conversion_cache.sqlite3",
+            "--notion-budget", "state/notion_budget.sqlite3"
+        ) + scraper_args
+        workers.append(subprocess.Popen(command, cwd=workdir, env=env, stdout=output, stderr=output))
+    returncode = max(worker.wait() for worker in workers)
+    elapsed = time.perf_counter() - start
+
+    report = {"stages": [], "wall_time": 0.0}
+    for i in range(args.workers):
+        path = os.path.join(workdir, f"run_report_{i}.json")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                worker_report = json.load(f)
+            report["stages"] += worker_report["stages"]
+            report["wall_time"] = max(report["wall_time"], worker_report["wall_time"])
+    with open(os.path.join(workdir, "run_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f)
+    return returncode, elapsed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the scraper end to end against a local stand-in.")
+    stub_server.add_fault_args(parser)
+    parser.add_argument("--institutions", type=int, default=2, help="Institutions (Workday tenants) to scrape (default: 2)")
+    parser.add_argument("--workday-rate", type=float, default=20.0, help="Per-tenant rate_limit in requests/second (default: 20)")
+    parser.add_argument("--notion-rate", type=float, default=20.0, help="Notion requests/second (default: 20)")
+    parser.add_argument("--page-size", type=int, default=20, help="Listing page size (default: 20)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Run this many queue workers instead of a single scraper process (default: 0)")
+    parser.add_argument("--record", metavar="PATH", help="Record the run's HTTP exchanges to a replay fixture")
+    parser.add_argument("--verbose", action="store_true", help="Show the scraper's console output")
+    parser.add_argument("scraper_args", nargs=argparse.REMAINDER, help="Arguments after -- are passed to scraper.py")
+    args = parser.parse_args()
+    if args.scraper_args[:1] == ["--"]:
+        args.scraper_args = args.scraper_args[1:]
+    if args.workers and args.record:
+        parser.error("--record needs a single scraper process; drop --workers")
+    return args
+
+
+def main():
+    args = parse_args()
+    expected = args.institutions * args.jobs
+
+    with stub_server.servers_from_args(args) as servers, tempfile.TemporaryDirectory() as workdir:
+        config_path = os.path.join(workdir, "config", "institutions.yaml")
+        write_config(config_path, servers, args.institutions, args.workday_rate, args.page_size)
+        print(f"🏁 {args.institutions} institutions x {args.jobs} postings "
+              f"(Workday {args.workday_latency_ms:.0f} ms, Notion {args.notion_latency_ms:.0f} ms, "
+              f"{args.throttle_rate:.0%} 429s)" + (f", {args.workers} workers" if args.workers else ""))
+
+        run = run_workers if args.workers else run_scraper
+        returncode, elapsed = run(workdir, servers, args, args.scraper_args)
+        if args.record:
+            record_config = os.path.splitext(args.record)[0] + ".institutions.yaml"
+            shutil.copyfile(config_path, record_config)
+        if returncode != 0:
+            print(f"❌ scraper.py exited with {returncode}")
+            return returncode
+
+        with open(os.path.join(workdir, "run_report.json"), "r", encoding="utf-8") as f:
+            report = json.load(f)
+        stats = dict(servers.state.stats)
+
+    uploaded = sum(s["items"] for s in report["stages"] if s["stage"] == "upload")
+    print(f"\n{'stage':<14}{'seconds':>10}{'items':>8}{'requests':>10}{'retries':>9}")
+    totals = {}
+    for s in report["stages"]:
+        total = totals.setdefault(s["stage"], [0.0, 0, 0, 0])
+        total[0] += s["wall_time"]
+        total[1] += s["items"]
+        total[2] += s["requests"]
+        total[3] += s["retries"]
+    for name, (seconds, items, requests, retries) in totals.items():
+        print(f"{name:<14}{seconds:>10.2f}{items:>8}{requests:>10}{retries:>9}")
+
+    print(f"\n📡 Stub served {stats['workday_requests']} Workday and {stats['notion_requests']} Notion requests "
+          f"({stats['throttled']} throttled)")
+    print(f"📦 {stats['pages_created']} pages created in {elapsed:.1f}s (scraper wall time {report['wall_time']:.1f}s)")
+    print(f"⚡ {uploaded / elapsed:.1f} jobs/sec")
+    if args.record:
+        print(f"💾 Replay with: python scraper.py --replay {args.record} --config {record_config}")
+
+    if stats["pages_created"] != expected:
+        print(f"❌ Expected {expected} pages")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
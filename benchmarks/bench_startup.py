@@ -0,0 +1,111 @@
+"""
+Startup benchmark for short scheduled runs.
+
+Times `scraper.py --help` (interpreter start plus module imports), then,
+against the local Workday/Notion stand-in, a full first run followed by
+`--quick` reruns with nothing new, which should stop after one listing
+page per institution. With `--importtime`, lists the slowest imports of
+`scraper` from `python -X importtime`.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 10 --importtime
+    python benchmarks/bench_startup.py --institutions 8 --jobs 200
+
+Exits non-zero if a `--quick` rerun makes more than one Workday request per
+institution or touches Notion beyond refreshing its index.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import stub_server
+from bench_pipeline import REPO_DIR, scraper_command, scraper_env, write_config
+
+
+def time_command(command, repeat, **kwargs):
+    """Returns the median wall time of `repeat` runs of `command`."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True, **kwargs)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def slowest_imports(limit):
+    """(cumulative microseconds, module) of the slowest imports of `scraper`, slowest first."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import scraper"],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True
+    )
+    imports = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        imports.append((int(cumulative), module.rstrip()))
+    return sorted(imports, reverse=True)[:limit]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark scraper startup and quick no-change runs.")
+    stub_server.add_fault_args(parser)
+    parser.add_argument("--institutions", type=int, default=4, help="Institutions (Workday tenants) to scrape (default: 4)")
+    parser.add_argument("--workday-rate", type=float, default=20.0, help="Per-tenant rate_limit in requests/second (default: 20)")
+    parser.add_argument("--notion-rate", type=float, default=20.0, help="Notion requests/second (default: 20)")
+    parser.add_argument("--page-size", type=int, default=20, help="Listing page size (default: 20)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per measurement; the median is reported (default: 5)")
+    parser.add_argument("--importtime", action="store_true", help="List the slowest imports of scraper")
+    # The full run only seeds the job store, so keep it small
+    parser.set_defaults(jobs=40)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    help_time = time_command(
+        [sys.executable, os.path.join(REPO_DIR, "scraper.py"), "--help"], args.repeat, cwd=REPO_DIR
+    )
+    print(f"🚀 scraper.py --help: {help_time * 1000:.0f} ms (median of {args.repeat})")
+    if args.importtime:
+        print(f"\n{'module':<40}{'ms':>8}")
+        for cumulative, module in slowest_imports(15):
+            print(f"{module:<40}{cumulative / 1000:>8.1f}")
+
+    with stub_server.servers_from_args(args) as servers, tempfile.TemporaryDirectory() as workdir:
+        write_config(os.path.join(workdir, "config", "institutions.yaml"), servers, args.institutions,
+                     args.workday_rate, args.page_size)
+        env = scraper_env(servers)
+
+        start = time.perf_counter()
+        subprocess.run(scraper_command(args), cwd=workdir, env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        full_time = time.perf_counter() - start
+
+        before = dict(servers.state.stats)
+        quick_time = time_command(scraper_command(args, "--quick"), args.repeat, cwd=workdir, env=env)
+        stats = dict(servers.state.stats)
+
+    workday_requests = (stats["workday_requests"] - before["workday_requests"]) / args.repeat
+    pages_written = sum(stats[name] - before[name] for name in ("pages_created", "pages_updated"))
+    print(f"\n🏁 {args.institutions} institutions x {args.jobs} postings")
+    print(f"  full run:            {full_time:>7.2f}s")
+    print(f"  --quick, no changes: {quick_time:>7.2f}s ({workday_requests:.0f} Workday requests per run)")
+
+    if workday_requests > args.institutions or pages_written:
+        print(f"❌ Expected at most {args.institutions} Workday requests and no page writes per quick run")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,456 @@
+"""
+Local stand-in for the Workday and Notion APIs.
+
+Serves two HTTP servers from one process:
+
+- Workday: `POST /wday/cxs/<tenant>/<site>/jobs` (paginated listings with
+  facets, `total` on the first page only, as Workday does) and
+  `GET /wday/cxs/<tenant>/<site>/job/<slug>` (`jobPostingInfo` built from the
+  `jobDescription` HTML in `benchmarks/corpus`).
+- Notion: `POST /v1/pages`, `PATCH /v1/pages/<id>` (properties, archiving),
+  `POST /v1/databases/<id>/query` (paginated, with the Company and
+  `last_edited_time` filters the scraper sends), `GET`/`PATCH
+  /v1/blocks/<id>/children` and `DELETE /v1/blocks/<id>`. Pages and their
+  block IDs are kept in memory, so a second run sees them as existing.
+
+Each server adds configurable latency and answers a configurable share of
+requests with `429 Too Many Requests` and a `Retry-After` header. Responses
+are gzipped when the client accepts it, and detail GETs carry an `ETag`
+and answer a matching `If-None-Match` with `304 Not Modified`.
+
+Usage:
+    python benchmarks/stub_server.py --jobs 200 --tenants 2 --workday-latency-ms 50 --throttle-rate 0.02
+
+Point the scraper at it with `NOTION_API_BASE=<notion url>/v1` and an
+institutions config whose `workday_url`s use the printed Workday URL; see
+`bench_pipeline.py`, which does both.
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(BENCH_DIR, "corpus")
+
+FACETS = [
+    {"facetParameter": "locationMainGroup", "values": [
+        {"facetParameter": "locations", "values": [
+            {"descriptor": "Buffalo, NY", "id": "loc-buffalo", "count": 0},
+            {"descriptor": "Remote, USA", "id": "loc-remote", "count": 0}
+        ]}
+    ]},
+    {"facetParameter": "jobFamilyGroup", "values": [
+        {"descriptor": "Technology", "id": "jfg-technology", "count": 0}
+    ]},
+    {"facetParameter": "timeType", "values": [
+        {"descriptor": "Full time", "id": "tt-full", "count": 0}
+    ]}
+]
+
+TITLES = ["Data Analyst", "Software Engineer", "Registered Nurse", "Branch Manager", "Research Administrator"]
+
+WORKDAY_LISTING = re.compile(r"^/wday/cxs/(?P<tenant>[^/]+)/(?P<site>[^/]+)/jobs$")
+WORKDAY_DETAIL = re.compile(r"^/wday/cxs/(?P<tenant>[^/]+)/(?P<site>[^/]+)/job/(?P<slug>[^/]+)$")
+NOTION_QUERY = re.compile(r"^/v1/databases/(?P<database_id>[^/]+)/query$")
+NOTION_PAGE = re.compile(r"^/v1/pages/(?P<page_id>[^/]+)$")
+NOTION_CHILDREN = re.compile(r"^/v1/blocks/(?P<page_id>[^/]+)/children$")
+NOTION_BLOCK = re.compile(r"^/v1/blocks/(?P<block_id>[^/]+)$")
+
+
+def load_descriptions(corpus_dir=CORPUS_DIR):
+    descriptions = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            descriptions.append(f.read())
+    return descriptions or ["<p>Pay range: $50,000 - $70,000</p>"]
+
+
+class Fault:
+    """Latency and 429 injection for one server."""
+
+    def __init__(self, latency_ms=0.0, throttle_rate=0.0, retry_after=1.0, seed=None):
+        self.latency = latency_ms / 1000
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self):
+        """Latency with +/-50% jitter."""
+        with self._lock:
+            return self.latency * self._random.uniform(0.5, 1.5)
+
+    def throttled(self):
+        with self._lock:
+            return self._random.random() < self.throttle_rate
+
+
+class StubState:
+    """Tenant postings and created Notion pages, plus request counters."""
+
+    def __init__(self, jobs_per_tenant, descriptions):
+        self.jobs_per_tenant = jobs_per_tenant
+        self.descriptions = descriptions
+        self.pages = []
+        self.pages_by_id = {}
+        self.blocks = {}  # page ID -> top-level block IDs
+        self.stats = {"workday_requests": 0, "notion_requests": 0, "throttled": 0, "not_modified": 0,
+                      "pages_created": 0, "pages_updated": 0, "pages_archived": 0,
+                      "blocks_appended": 0, "blocks_deleted": 0}
+        self._lock = threading.Lock()
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.stats[name] += value
+
+    def posting(self, tenant, i):
+        title = f"{TITLES[i % len(TITLES)]} {i}"
+        req_id = f"R{tenant.upper()}{i:05d}"
+        return title, req_id, f"{title.replace(' ', '-')}_{req_id}"
+
+    def listing_page(self, tenant, offset, limit):
+        postings = []
+        for i in range(offset, min(self.jobs_per_tenant, offset + limit)):
+            title, req_id, slug = self.posting(tenant, i)
+            postings.append({
+                "title": title,
+                "externalPath": f"/job/Buffalo-NY/{slug}",
+                "locationsText": "Buffalo, NY",
+                "postedOn": "Posted Today",
+                "bulletFields": [req_id]
+            })
+        return {
+            # Workday only reports the total on the first page
+            "total": self.jobs_per_tenant if offset == 0 else 0,
+            "jobPostings": postings,
+            "facets": FACETS
+        }
+
+    def detail(self, tenant, site, slug, base_url):
+        index = self._posting_index(tenant, slug)
+        if index is None:
+            return None
+        title, req_id, slug = self.posting(tenant, index)
+        return {"jobPostingInfo": {
+            "id": uuid.uuid5(uuid.NAMESPACE_URL, f"{tenant}/{slug}").hex,
+            "title": title,
+            "jobDescription": self.descriptions[index % len(self.descriptions)],
+            "location": "Buffalo, NY",
+            "postedOn": "Posted Today",
+            "startDate": datetime.now(timezone.utc).date().isoformat(),
+            "timeType": "Full time",
+            "jobReqId": req_id,
+            "externalUrl": f"{base_url}/en-US/{site}/job/Buffalo-NY/{slug}"
+        }}
+
+    def _posting_index(self, tenant, slug):
+        match = re.search(r"_R[A-Z0-9]*?(\d{5})$", slug)
+        if not match or not slug.endswith(self.posting(tenant, int(match.group(1)))[2]):
+            return None
+        index = int(match.group(1))
+        return index if index < self.jobs_per_tenant else None
+
+    def create_page(self, payload):
+        now = _now()
+        page = {
+            "object": "page",
+            "id": str(uuid.uuid4()),
+            "created_time": now,
+            "last_edited_time": now,
+            "archived": False,
+            "parent": payload.get("parent", {}),
+            "properties": payload.get("properties", {})
+        }
+        with self._lock:
+            self.pages.append(page)
+            self.pages_by_id[page["id"]] = page
+            self.blocks[page["id"]] = [str(uuid.uuid4()) for _ in payload.get("children", [])]
+            self.stats["pages_created"] += 1
+        return page
+
+    def update_page(self, page_id, payload):
+        with self._lock:
+            page = self.pages_by_id.get(page_id)
+            if page is None:
+                return None
+            page["properties"] = {**page["properties"], **payload.get("properties", {})}
+            if payload.get("archived"):
+                page["archived"] = True
+                self.stats["pages_archived"] += 1
+            page["last_edited_time"] = _now()
+            self.stats["pages_updated"] += 1
+            return page
+
+    def append_children(self, page_id, children):
+        with self._lock:
+            if page_id not in self.blocks:
+                return False
+            self.blocks[page_id].extend(str(uuid.uuid4()) for _ in children)
+            self.stats["blocks_appended"] += len(children)
+            return True
+
+    def list_children(self, page_id, start_cursor, page_size):
+        with self._lock:
+            block_ids = list(self.blocks.get(page_id, []))
+        start = int(start_cursor or 0)
+        end = start + min(100, page_size)
+        return {
+            "object": "list",
+            "results": [{"object": "block", "id": block_id} for block_id in block_ids[start:end]],
+            "has_more": end < len(block_ids),
+            "next_cursor": str(end) if end < len(block_ids) else None
+        }
+
+    def delete_block(self, block_id):
+        with self._lock:
+            for block_ids in self.blocks.values():
+                if block_id in block_ids:
+                    block_ids.remove(block_id)
+                    self.stats["blocks_deleted"] += 1
+                    return True
+        return False
+
+    def query(self, database_id, payload):
+        query_filter = payload.get("filter") or {}
+        conditions = query_filter.get("and", [query_filter] if query_filter else [])
+        with self._lock:
+            pages = [
+                page for page in self.pages
+                if page["parent"].get("database_id") == database_id and not page["archived"]
+                and all(_matches(page, condition) for condition in conditions)
+            ]
+        start = int(payload.get("start_cursor") or 0)
+        end = start + min(100, int(payload.get("page_size", 100)))
+        return {
+            "object": "list",
+            "results": pages[start:end],
+            "has_more": end < len(pages),
+            "next_cursor": str(end) if end < len(pages) else None
+        }
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _matches(page, condition):
+    if "last_edited_time" in condition:
+        since = condition["last_edited_time"].get("on_or_after")
+        return not since or page["last_edited_time"] >= since
+    prop = page["properties"].get(condition.get("property"), {})
+    wanted = condition.get("rich_text", {}).get("equals")
+    spans = prop.get("title") or prop.get("rich_text") or []
+    return wanted is None or "".join(span.get("text", {}).get("content", "") for span in spans) == wanted
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    conditional = False
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send(self, status, data, headers=None):
+        content = json.dumps(data).encode("utf-8")
+        headers = dict(headers or {})
+        if status == 200 and self.conditional and self.command == "GET":
+            # Detail responses carry a validator and honor conditional requests
+            etag = '"' + hashlib.sha1(content).hexdigest()[:16] + '"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                self.server.state.count("not_modified")
+                status, content = 304, b""
+        if content and "gzip" in self.headers.get("Accept-Encoding", ""):
+            content = gzip.compress(content, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _handle(self, method):
+        body = self._body()
+        self.server.state.count(self.server.counter)
+        time.sleep(self.server.fault.delay())
+        if self.server.fault.throttled():
+            self.server.state.count("throttled")
+            self._send(429, {"message": "Too Many Requests"}, {"Retry-After": str(self.server.fault.retry_after)})
+            return
+        status, data = self.route(method, self.path.split("?", 1)[0], body)
+        self._send(status, data)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class WorkdayHandler(_Handler):
+    conditional = True
+
+    def route(self, method, path, body):
+        state = self.server.state
+
+        match = WORKDAY_LISTING.match(path)
+        if match and method == "POST":
+            offset, limit = int(body.get("offset", 0)), int(body.get("limit", 20))
+            return 200, state.listing_page(match["tenant"], offset, limit)
+
+        match = WORKDAY_DETAIL.match(path)
+        if match and method == "GET":
+            detail = state.detail(match["tenant"], match["site"], match["slug"], self.server.url)
+            if detail is not None:
+                return 200, detail
+        return 404, {"errorCode": "NOT_FOUND"}
+
+
+class NotionHandler(_Handler):
+    def route(self, method, path, body):
+        state = self.server.state
+
+        if path == "/v1/pages" and method == "POST":
+            if len(body.get("children", [])) > 100:
+                return 400, {"object": "error", "code": "validation_error", "message": "children length > 100"}
+            return 200, state.create_page(body)
+
+        match = NOTION_QUERY.match(path)
+        if match and method == "POST":
+            return 200, state.query(match["database_id"], body)
+
+        match = NOTION_PAGE.match(path)
+        if match and method == "PATCH":
+            page = state.update_page(match["page_id"], body)
+            if page is not None:
+                return 200, page
+
+        match = NOTION_CHILDREN.match(path)
+        if match and method == "PATCH":
+            if state.append_children(match["page_id"], body.get("children", [])):
+                return 200, {"object": "list", "results": []}
+        if match and method == "GET":
+            query = parse_qs(urlsplit(self.path).query)
+            page_size = int(query.get("page_size", ["100"])[0])
+            return 200, state.list_children(match["page_id"], query.get("start_cursor", [None])[0], page_size)
+
+        match = NOTION_BLOCK.match(path)
+        if match and method == "DELETE":
+            if state.delete_block(match["block_id"]):
+                return 200, {"object": "block", "id": match["block_id"], "archived": True}
+        return 404, {"object": "error", "code": "object_not_found"}
+
+
+class StubServers:
+    """The Workday and Notion stand-ins, each on its own port of `host`."""
+
+    def __init__(self, jobs_per_tenant=200, host="127.0.0.1", workday_fault=None, notion_fault=None,
+                 corpus_dir=CORPUS_DIR):
+        self.state = StubState(jobs_per_tenant, load_descriptions(corpus_dir))
+        self.workday = self._server(host, WorkdayHandler, workday_fault or Fault(), "workday_requests")
+        self.notion = self._server(host, NotionHandler, notion_fault or Fault(), "notion_requests")
+        self._threads = []
+
+    def _server(self, host, handler, fault, counter):
+        server = ThreadingHTTPServer((host, 0), handler)
+        server.daemon_threads = True
+        server.state = self.state
+        server.fault = fault
+        server.counter = counter
+        server.url = f"http://{host}:{server.server_address[1]}"
+        return server
+
+    @property
+    def workday_url(self):
+        return self.workday.url
+
+    @property
+    def notion_api_base(self):
+        return f"{self.notion.url}/v1"
+
+    def tenant_url(self, tenant, site="External"):
+        return f"{self.workday.url}/wday/cxs/{tenant}/{site}/jobs"
+
+    def start(self):
+        for server in (self.workday, self.notion):
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        for server in (self.workday, self.notion):
+            server.shutdown()
+            server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def add_fault_args(parser):
+    parser.add_argument("--jobs", type=int, default=200, help="Postings per tenant (default: 200)")
+    parser.add_argument("--workday-latency-ms", type=float, default=50.0, help="Mean Workday response latency (default: 50)")
+    parser.add_argument("--notion-latency-ms", type=float, default=100.0, help="Mean Notion response latency (default: 100)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with 429 (default: 0)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with a 429 (default: 1)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for latency jitter and 429s")
+
+
+def servers_from_args(args):
+    return StubServers(
+        jobs_per_tenant=args.jobs,
+        workday_fault=Fault(args.workday_latency_ms, args.throttle_rate, args.retry_after, args.seed),
+        notion_fault=Fault(args.notion_latency_ms, args.throttle_rate, args.retry_after, args.seed)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve stand-in Workday and Notion APIs.")
+    add_fault_args(parser)
+    parser.add_argument("--tenants", type=int, default=2, help="Tenant URLs to print (any tenant name works)")
+    args = parser.parse_args()
+
+    with servers_from_args(args) as servers:
+        print(f"🏢 Workday: {servers.workday_url}")
+        for i in range(args.tenants):
+            print(f"   {servers.tenant_url(f't{i}')}")
+        print(f"📝 Notion:  NOTION_API_BASE={servers.notion_api_base}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        print(json.dumps(servers.state.stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+import shutil
+import threading
+
+__all__ = [
+    "InstitutionCheckpoint",
+    "open_checkpoint",
+    "DEFAULT_CHECKPOINT_DIR"
+]
+
+DEFAULT_CHECKPOINT_DIR = "state/checkpoints"
+CHECKPOINT_VERSION = 1
+
+
+def _fingerprint(institution):
+    """Config values that must match for a checkpoint to be resumable."""
+    fingerprint = {
+        "workday_url": institution["workday_url"],
+        "search_text": institution.get("search_text", ""),
+        "locations": institution.get("locations", [])
+    }
+    if institution.get("facets"):
+        fingerprint["facets"] = institution["facets"]
+    return fingerprint
+
+
+def _read_jsonl(path):
+    """Read an append-only JSON Lines file, ignoring a torn final line."""
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return records
+
+
+class InstitutionCheckpoint:
+    """
+    Crash-safe progress record for one institution's run.
+
+    Lives in `state/checkpoints/<institution>/`:
+
+    - `state.json`: next pagination offset and whether pagination finished
+      (rewritten atomically after every page)
+    - `listings.jsonl`: listing entries collected so far
+    - `details.jsonl`: job details fetched so far
+    - `uploaded.jsonl`: Req IDs uploaded to Notion so far
+
+    The JSON Lines files are append-only, so recording a unit of work costs
+    one small write no matter how large the institution is.
+    """
+
+    def __init__(self, institution, root=DEFAULT_CHECKPOINT_DIR):
+        safe_name = institution["name"].replace(" ", "_").replace("&", "and")
+        self.directory = os.path.join(root, safe_name)
+        self.fingerprint = _fingerprint(institution)
+        self._lock = threading.Lock()
+        self._reset_progress()
+
+    def _reset_progress(self):
+        self.offset = 0
+        self.pagination_done = False
+        self.pagination_complete = True
+        self.listings = []
+        self.details = {}
+        self.uploaded = set()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def load(self):
+        """
+        Load saved progress.
+
+        Returns:
+            bool: True if a checkpoint for the same config was found.
+        """
+        try:
+            with open(self._path("state.json"), "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+
+        if state.get("version") != CHECKPOINT_VERSION or state.get("fingerprint") != self.fingerprint:
+            return False
+
+        self.offset = state["offset"]
+        self.pagination_done = state["pagination_done"]
+        self.pagination_complete = state["pagination_complete"]
+        self.listings = _read_jsonl(self._path("listings.jsonl"))
+        self.details = {
+            record["externalPath"]: record["detail"]
+            for record in _read_jsonl(self._path("details.jsonl"))
+        }
+        self.uploaded = {record["req_id"] for record in _read_jsonl(self._path("uploaded.jsonl"))}
+        return True
+
+    def clear(self):
+        """Remove the checkpoint once the institution's run has finished."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self._reset_progress()
+
+    def _write_state(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path("state.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": CHECKPOINT_VERSION,
+                "fingerprint": self.fingerprint,
+                "offset": self.offset,
+                "pagination_done": self.pagination_done,
+                "pagination_complete": self.pagination_complete
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path("state.json"))
+
+    def _append(self, name, records):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(name), "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record_page(self, jobs, next_offset):
+        """Record one page of listing entries and the offset of the next page."""
+        with self._lock:
+            self._append("listings.jsonl", jobs)
+            self.listings.extend(jobs)
+            self.offset = next_offset
+            self._write_state()
+
+    def record_pagination_end(self, complete):
+        """Mark pagination finished; `complete` is False if it stopped on an error."""
+        with self._lock:
+            self.pagination_done = True
+            self.pagination_complete = complete
+            self._write_state()
+
+    def record_detail(self, listing, detail):
+        with self._lock:
+            self._append("details.jsonl", [{"externalPath": listing["externalPath"], "detail": detail}])
+            self.details[listing["externalPath"]] = detail
+
+    def record_uploaded(self, req_id):
+        with self._lock:
+            self._append("uploaded.jsonl", [{"req_id": req_id}])
+            self.uploaded.add(req_id)
+
+
+def open_checkpoint(institution, resume=False, root=DEFAULT_CHECKPOINT_DIR):
+    """
+    Checkpoint for an institution's run.
+
+    With `resume`, progress saved by an interrupted run is loaded; otherwise
+    (or if the config changed since) any old checkpoint is discarded.
+    """
+    checkpoint = InstitutionCheckpoint(institution, root)
+    if resume and checkpoint.load():
+        logging.info(
+            f"[{institution['name']}] Resuming from checkpoint: {len(checkpoint.listings)} listings, "
+            f"{len(checkpoint.details)} details, {len(checkpoint.uploaded)} uploads."
+        )
+        return checkpoint
+    if resume:
+        logging.info(f"[{institution['name']}] No usable checkpoint found; starting fresh.")
+    checkpoint.clear()
+    return checkpoint
@@ -0,0 +1,283 @@
+import html as html_lib
+import re
+from dataclasses import dataclass
+
+__all__ = [
+    "Compensation",
+    "html_to_text",
+    "pay_text",
+    "extract_compensation",
+    "extract_compensations",
+    "extract_salary_range",
+    "extract_salary_ranges",
+    "ANNUAL_MULTIPLIERS"
+]
+
+# Pay periods and what one unit of pay comes to over a year (full time)
+ANNUAL_MULTIPLIERS = {
+    "hour": 2080,
+    "day": 260,
+    "week": 52,
+    "biweekly": 26,
+    "month": 12,
+    "year": 1
+}
+
+# Annualized pay outside this band is taken to be something else (a bonus,
+# a shift differential, a 401k match) and skipped.
+MIN_ANNUAL = 10_000
+MAX_ANNUAL = 5_000_000
+
+# A range without a stated period whose high end is below this is hourly
+HOURLY_CEILING = 500
+
+# Characters searched for a pay period after and before an amount
+PERIOD_WINDOW_AFTER = 50
+PERIOD_WINDOW_BEFORE = 80
+
+# HTML converted to text around each currency marker; the rest of a
+# description is never converted
+MARKUP_WINDOW_BEFORE = 400
+MARKUP_WINDOW_AFTER = 400
+
+# Separates the windows of a description; matches neither whitespace nor a
+# word character, so no amount or range spans two windows
+DOCUMENT_SEPARATOR = "\x00"
+
+# Found with str.find, which is far faster than a regex scan of the raw HTML
+_MARKERS = ("$", "£", "€", "&#36;", "&dollar;", "USD", "CAD", "GBP", "EUR")
+_INLINE_TAG = re.compile(r"<(?:/?(?:[abiu]|strong|span|em|font|su[bp])\b[^>]*>)", re.IGNORECASE)
+_TAG = re.compile(r"<[^>]*>")
+_WHITESPACE = re.compile(r"\s+")
+
+_SYMBOLS = r"[$£€]"
+# Codes (and prefixed dollars) are matched in upper case only, and only
+# scanned for when a text contains one, so most scans can skip ahead to the
+# next currency symbol.
+_CODES = r"(?-i:US\$|CA\$|C\$|USD\s?\$?|CAD\s?\$?|GBP\s?|EUR\s?)"
+_CURRENCY_CODES = ("USD", "CAD", "GBP", "EUR", "US$", "CA$", "C$")
+_NUMBER = r"\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?"
+_INLINE_PERIOD = r"\s*(?:/|per\s+|an?\s+)(?:hour|hr|year|yr|annum|week|wk|month|mo|day)\b"
+
+
+def _amounts_pattern(currency):
+    """
+    An amount, or a range ("$50,000 - $70,000", "$50K to $70K",
+    "$22.50/hr – $28.00/hr", "between $50,000 and $70,000").
+    """
+    return re.compile(
+        rf"(?P<currency>{currency})\s*(?P<low>{_NUMBER})(?P<low_k>\s?[kK]\b)?(?P<low_period>{_INLINE_PERIOD})?"
+        rf"(?:"
+        rf"\s*(?P<separator>-|–|—|to|and)\s*"
+        rf"(?:{currency})?\s*(?P<high>{_NUMBER})(?P<high_k>\s?[kK]\b)?"
+        rf")?",
+        re.IGNORECASE
+    )
+
+
+_SYMBOL_AMOUNTS = _amounts_pattern(_SYMBOLS)
+_AMOUNTS = _amounts_pattern(f"{_CODES}|{_SYMBOLS}")
+
+_PERIOD = re.compile(
+    r"(?:\b(?:per|an?|each)\s+|/\s*)(?P<unit>hour|hr|year|yr|annum|week|wk|month|mo|day)\b"
+    r"|\b(?P<adverb>hourly|annual(?:ly)?|yearly|bi-?weekly|weekly|monthly|daily)\b",
+    re.IGNORECASE
+)
+
+_PERIOD_NAMES = {
+    "hour": "hour", "hr": "hour", "hourly": "hour",
+    "year": "year", "yr": "year", "annum": "year", "annual": "year", "annually": "year", "yearly": "year",
+    "week": "week", "wk": "week", "weekly": "week",
+    "biweekly": "biweekly", "bi-weekly": "biweekly",
+    "month": "month", "mo": "month", "monthly": "month",
+    "day": "day", "daily": "day"
+}
+
+_CURRENCIES = {
+    "$": "USD", "US$": "USD", "USD": "USD", "USD$": "USD",
+    "CA$": "CAD", "C$": "CAD", "CAD": "CAD", "CAD$": "CAD",
+    "£": "GBP", "GBP": "GBP", "€": "EUR", "EUR": "EUR"
+}
+
+
+@dataclass(frozen=True)
+class Compensation:
+    """
+    Pay found in a job description.
+
+    `low` and `high` are as stated, in `currency` per `period`; the
+    `annual_*` values are normalized to a year of full-time work. Currencies
+    are reported, not converted.
+    """
+    low: float
+    high: float
+    currency: str
+    period: str
+    annual_low: float
+    annual_high: float
+
+    @property
+    def salary_range(self):
+        return self.annual_low, self.annual_high
+
+
+def html_to_text(html):
+    """
+    Plain text of a description for matching. Inline tags are dropped so
+    values split by markup (`$50,<b>000</b>`) join up; other tags become
+    spaces.
+    """
+    text = _TAG.sub(" ", _INLINE_TAG.sub("", html or ""))
+    return " ".join(html_lib.unescape(text).split())
+
+
+def pay_text(html):
+    """
+    The plain text around the currency markers of a description, one
+    `DOCUMENT_SEPARATOR`-joined window per run of nearby markers. Much
+    cheaper than `html_to_text` on the whole description, which is mostly
+    not about pay.
+    """
+    html = html or ""
+    positions = []
+    for marker in _MARKERS:
+        position = html.find(marker)
+        while position != -1:
+            positions.append(position)
+            position = html.find(marker, position + 1)
+
+    windows = []
+    for position in sorted(positions):
+        start, end = max(position - MARKUP_WINDOW_BEFORE, 0), position + MARKUP_WINDOW_AFTER
+        if windows and start <= windows[-1][1]:
+            windows[-1][1] = end
+        else:
+            windows.append([start, end])
+    return DOCUMENT_SEPARATOR.join(html_to_text(html[start:end]) for start, end in windows)
+
+
+def _amount(number, k_suffix):
+    value = float(number.replace(",", ""))
+    return value * 1000 if k_suffix else value
+
+
+def _find_amounts(text):
+    pattern = _AMOUNTS if any(code in text for code in _CURRENCY_CODES) else _SYMBOL_AMOUNTS
+    return pattern.finditer(text)
+
+
+def _period_near(text, start, end, lower, upper):
+    """The pay period stated right after an amount, or failing that, nearest before it."""
+    match = _PERIOD.search(text, end, min(end + PERIOD_WINDOW_AFTER, upper))
+    if match is None:
+        before = list(_PERIOD.finditer(text, max(start - PERIOD_WINDOW_BEFORE, lower), start))
+        match = before[-1] if before else None
+    if match is None:
+        return None
+    return _PERIOD_NAMES[(match.group("unit") or match.group("adverb")).lower()]
+
+
+def _window_bounds(text, start, end):
+    """Start and end of the window of `text` holding [start, end)."""
+    upper = text.find(DOCUMENT_SEPARATOR, end)
+    return text.rfind(DOCUMENT_SEPARATOR, 0, start) + 1, len(text) if upper == -1 else upper
+
+
+def _is_range(match, text, lower):
+    if match.group("high") is None:
+        return False
+    # "and" only joins a range after "between"; "$5,000 and 401k" is not one
+    return (
+        match.group("separator").lower() != "and"
+        or text[max(match.start() - 8, lower):match.start()].lower() == "between "
+    )
+
+
+def _compensation(match, text):
+    """
+    Build a `Compensation` from an amounts match, or None if it is not pay:
+    a single amount needs a stated period, and the annualized values must be
+    plausible.
+    """
+    lower, upper = _window_bounds(text, match.start(), match.end())
+    is_range = _is_range(match, text, lower)
+    low = _amount(match.group("low"), match.group("low_k"))
+    high = _amount(match.group("high"), match.group("high_k")) if is_range else low
+    if is_range and match.group("high_k") and not match.group("low_k") and low < 1000:
+        # "$50-60K"
+        low *= 1000
+
+    inline = match.group("low_period")
+    if inline:
+        period = _PERIOD_NAMES[_PERIOD.search(inline).group("unit").lower()]
+    else:
+        period = _period_near(text, match.start(), match.end(), lower, upper)
+        if period in ("year", "month") and high < HOURLY_CEILING and is_range:
+            # A nearby period word that belongs to the surrounding text, e.g.
+            # "annual bonus"; stated day and week rates are kept
+            period = "hour"
+    if period is None:
+        if not is_range:
+            return None
+        period = "hour" if high < HOURLY_CEILING else "year"
+
+    if high < low:
+        return None
+    multiplier = ANNUAL_MULTIPLIERS[period]
+    annual_low, annual_high = round(low * multiplier, 2), round(high * multiplier, 2)
+    if annual_low < MIN_ANNUAL or annual_high > MAX_ANNUAL:
+        return None
+
+    currency = _CURRENCIES.get(_WHITESPACE.sub("", match.group("currency")).upper(), "USD")
+    return Compensation(low, high, currency, period, annual_low, annual_high)
+
+
+def _first_compensation(text):
+    """The first range in `text`, or the first single amount if there is no range."""
+    single = None
+    for match in _find_amounts(text):
+        compensation = _compensation(match, text)
+        if compensation is None:
+            continue
+        if _is_range(match, text, _window_bounds(text, match.start(), match.end())[0]):
+            return compensation
+        single = single or compensation
+    return single
+
+
+def extract_compensation(html):
+    """
+    Pay stated in a job description.
+
+    Returns:
+        Compensation or None: The first pay range, or a single amount with a
+        stated period if there is no range.
+    """
+    return _first_compensation(pay_text(html))
+
+
+def extract_compensations(descriptions):
+    """
+    `extract_compensation` for a batch of descriptions, e.g. an institution's
+    postings. Identical descriptions (reposts, shared templates) are only
+    extracted once.
+
+    Returns:
+        list: Compensation or None per description, in input order.
+    """
+    found = {html: extract_compensation(html) for html in dict.fromkeys(html or "" for html in descriptions)}
+    return [found[html or ""] for html in descriptions]
+
+
+def extract_salary_range(html):
+    """Annualized (low, high) pay from a job description, or (None, None)."""
+    compensation = extract_compensation(html)
+    return compensation.salary_range if compensation else (None, None)
+
+
+def extract_salary_ranges(descriptions):
+    """`extract_salary_range` for a batch of descriptions, in input order."""
+    return [
+        compensation.salary_range if compensation else (None, None)
+        for compensation in extract_compensations(descriptions)
+    ]
@@ -1,6 +1,53 @@
-import yaml
+import hashlib
+import json
+import os
 
-def load_institutions_config(path="config/institutions.yaml"):
+# Parsed configs are kept here as JSON, so runs whose YAML has not changed
+# skip importing and running the YAML parser
+CONFIG_CACHE_DIR = "state/config_cache"
+
+def _cache_path(path, cache_dir):
+    name = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{name}.json")
+
+def _read_cache(cache_path, key):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return cached["data"] if cached.get("key") == key else None
+
+def _write_cache(cache_path, key, data):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "data": data}, f)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError):
+        # Not JSON-serializable or not writable; the YAML is parsed again next run
+        pass
+
+def load_institutions_config(path="config/institutions.yaml", cache_dir=CONFIG_CACHE_DIR):
+    """
+    Institutions from the YAML config.
+
+    The parsed config is cached as JSON keyed by the file's path, mtime and
+    size; a changed file is parsed again. Pass `cache_dir=None` to always
+    parse the YAML.
+    """
+    stat = os.stat(path)
+    key = [os.path.abspath(path), stat.st_mtime_ns, stat.st_size]
+    cache_path = _cache_path(path, cache_dir) if cache_dir else None
+    if cache_path:
+        data = _read_cache(cache_path, key)
+        if data is not None:
+            return data["institutions"]
+
+    import yaml  # Only needed when the cache is stale
     with open(path, "r", encoding="utf-8") as f:
         data = yaml.safe_load(f)
+    if cache_path:
+        _write_cache(cache_path, key, data)
     return data["institutions"]
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import job_parser as jp
+import notion_client as nc
+
+__all__ = [
+    "ConversionCache",
+    "configure_cache",
+    "convert_description",
+    "convert_uncached",
+    "lookup_description",
+    "store_description",
+    "get_stats",
+    "format_stats",
+    "close_cache",
+    "DEFAULT_CACHE_PATH"
+]
+
+DEFAULT_CACHE_PATH = "state/conversion_cache.sqlite3"
+
+# Entries kept per tier before the least recently used ones are evicted
+MEMORY_CACHE_SIZE = 256
+DISK_CACHE_SIZE = 5000
+
+# Part of every key; bump it when the block conversion or salary extraction
+# changes so stale entries are no longer matched.
+CACHE_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversions (
+    description_hash TEXT PRIMARY KEY,
+    blocks_json TEXT NOT NULL,
+    salary_low REAL,
+    salary_high REAL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_conversions_last_used ON conversions (last_used);
+"""
+
+EMPTY_RESULT = ([], (None, None))
+
+
+def description_hash(html):
+    """Content address of a `jobDescription`."""
+    return hashlib.sha256(f"{CACHE_VERSION}\0{html}".encode("utf-8")).hexdigest()
+
+
+def convert_uncached(html):
+    """Convert a job description to (blocks, (salary low, salary high)) without the cache."""
+    return jp.html_to_notion_blocks(html), nc.extract_salary_range(html)
+
+
+class ConversionCache:
+    """
+    Content-addressed cache of converted job descriptions.
+
+    Maps the hash of a `jobDescription` to its Notion blocks and extracted
+    salary range, so boilerplate shared across postings and reposts under
+    new Req IDs are converted once. Entries live in an in-memory LRU and,
+    when `path` is given, in an on-disk SQLite LRU shared across runs. Both
+    tiers are size-bounded.
+
+    Returned blocks are shared between callers and must not be modified.
+    """
+
+    def __init__(self, path=None, max_entries=MEMORY_CACHE_SIZE, max_disk_entries=DISK_CACHE_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._disk_rows = 0
+
+        if path is not None:
+            if path != ":memory:" and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            with self._conn:
+                self._conn.executescript(SCHEMA)
+            self._disk_rows = self._conn.execute("SELECT COUNT(*) FROM conversions").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def convert(self, html):
+        """
+        Blocks and salary range for a job description, converting it on a miss.
+
+        Returns:
+            tuple: (list of Notion blocks, (salary low, salary high))
+        """
+        if not html:
+            return EMPTY_RESULT
+
+        result = self.lookup(html)
+        if result is None:
+            # Convert outside the lock; a concurrent miss on the same key just
+            # converts twice and stores the same result.
+            result = convert_uncached(html)
+            self.store(html, result)
+        return result
+
+    def lookup(self, html):
+        """Cached result for a description, or None on a miss."""
+        key = description_hash(html)
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.stats["hits"] += 1
+                return result
+
+            result = self._disk_get(key)
+            if result is not None:
+                self.stats["disk_hits"] += 1
+                self._memory_put(key, result)
+            return result
+
+    def store(self, html, result):
+        """Add a result converted elsewhere (e.g. in a worker process); counts as a miss."""
+        key = description_hash(html)
+        with self._lock:
+            self.stats["misses"] += 1
+            self._memory_put(key, result)
+            self._disk_put(key, result)
+
+    def _memory_put(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _disk_get(self, key):
+        if self._conn is None:
+            return None
+        row = self._conn.execute(
+            "SELECT blocks_json, salary_low, salary_high FROM conversions WHERE description_hash = ?",
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with self._conn:
+            self._conn.execute(
+                "UPDATE conversions SET last_used = ? WHERE description_hash = ?",
+                (time.time(), key)
+            )
+        return json.loads(row[0]), (row[1], row[2])
+
+    def _disk_put(self, key, result):
+        if self._conn is None:
+            return
+        blocks, (low, high) = result
+        try:
+            with self._conn:
+                inserted = self._conn.execute(
+                    "INSERT OR IGNORE INTO conversions (description_hash, blocks_json, salary_low, salary_high, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, json.dumps(blocks, ensure_ascii=False), low, high, time.time())
+                ).rowcount
+                self._disk_rows += inserted
+                overflow = self._disk_rows - self.max_disk_entries
+                if overflow > 0:
+                    evicted = self._conn.execute(
+                        "DELETE FROM conversions WHERE description_hash IN "
+                        "(SELECT description_hash FROM conversions ORDER BY last_used LIMIT ?)",
+                        (overflow,)
+                    ).rowcount
+                    self._disk_rows -= evicted
+                    self.stats["disk_evictions"] += evicted
+        except sqlite3.Error as e:
+            logging.warning(f"Conversion cache write failed: {e}")
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats)
+
+
+# --- Shared Cache ---
+_cache = ConversionCache()
+
+def configure_cache(path=None, max_entries=MEMORY_CACHE_SIZE, max_disk_entries=DISK_CACHE_SIZE):
+    """Replace the shared cache, e.g. to add an on-disk tier at `path`."""
+    global _cache
+    _cache.close()
+    _cache = ConversionCache(path, max_entries, max_disk_entries)
+    return _cache
+
+def convert_description(html):
+    """Blocks and salary range for a job description, via the shared cache."""
+    return _cache.convert(html)
+
+def lookup_description(html):
+    return _cache.lookup(html)
+
+def store_description(html, result):
+    _cache.store(html, result)
+
+def get_stats():
+    """Counters of the shared cache: hits, disk_hits, misses, evictions, disk_evictions."""
+    return _cache.get_stats()
+
+def format_stats():
+    """Human-readable cache summary lines."""
+    stats = get_stats()
+    lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+    hit_rate = (stats["hits"] + stats["disk_hits"]) / lookups * 100 if lookups else 0.0
+    return [
+        f"  🧩 {lookups} descriptions: {stats['hits']} memory hits, {stats['disk_hits']} disk hits, "
+        f"{stats['misses']} converted ({hit_rate:.0f}% hit rate)",
+        f"  🧹 {stats['evictions']} memory evictions, {stats['disk_evictions']} disk evictions"
+    ]
+
+def close_cache():
+    _cache.close()
@@ -0,0 +1,114 @@
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from tqdm import tqdm
+
+import compensation
+import conversion_cache
+import job_parser as jp
+
+__all__ = [
+    "configure_pool",
+    "convert_descriptions",
+    "shutdown_pool",
+    "PARSE_WORKERS",
+    "PARSE_CHUNKSIZE"
+]
+
+# Worker processes converting descriptions; 0 converts in the main process
+PARSE_WORKERS = 0
+
+# Descriptions sent to a worker per round trip
+PARSE_CHUNKSIZE = 4
+
+_pool_lock = threading.Lock()
+_pool = None
+_workers = PARSE_WORKERS
+_chunksize = PARSE_CHUNKSIZE
+
+
+def configure_pool(workers=PARSE_WORKERS, chunksize=PARSE_CHUNKSIZE):
+    """
+    Set how many worker processes convert descriptions. The pool is started
+    on first use and shared by every institution.
+    """
+    global _workers, _chunksize
+    shutdown_pool()
+    with _pool_lock:
+        _workers = max(0, workers)
+        _chunksize = max(1, chunksize)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=_workers)
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def convert_descriptions(descriptions, company_name=""):
+    """
+    Convert job descriptions to Notion blocks and salary ranges, in parallel
+    across worker processes when the pool is enabled.
+
+    Descriptions already in the conversion cache are not sent to the pool,
+    and identical descriptions are only converted once. New results are added
+    to the cache.
+
+    Args:
+        descriptions (list): `jobDescription` HTML strings.
+        company_name (str): Institution name, used for the progress bar.
+
+    Returns:
+        list: (blocks, (salary low, salary high)) per description, in input order.
+    """
+    results = [None] * len(descriptions)
+    pending = {}  # description -> indexes waiting for it
+
+    for i, html in enumerate(descriptions):
+        if not html:
+            results[i] = conversion_cache.EMPTY_RESULT
+            continue
+        if html in pending:
+            pending[html].append(i)
+            continue
+        cached = conversion_cache.lookup_description(html)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending[html] = [i]
+
+    if not pending:
+        return results
+
+    misses = list(pending)
+    if _workers and len(misses) > 1:
+        try:
+            blocks = _get_pool().map(jp.html_to_notion_blocks, misses, chunksize=_chunksize)
+            blocks = list(tqdm(blocks, total=len(misses), desc=f"{company_name}: Parsing", unit="job"))
+        except Exception as e:
+            # A broken pool (e.g. a worker killed by the OS) should not fail the run
+            logging.warning(f"[{company_name}] Parsing pool failed ({e}); converting in the main process.")
+            shutdown_pool()
+            blocks = [jp.html_to_notion_blocks(html) for html in misses]
+    else:
+        blocks = [jp.html_to_notion_blocks(html) for html in misses]
+    # Salaries come from one pass over the whole batch
+    converted = zip(blocks, compensation.extract_salary_ranges(misses))
+
+    for html, result in zip(misses, converted):
+        conversion_cache.store_description(html, result)
+        for i in pending[html]:
+            results[i] = result
+
+    return results
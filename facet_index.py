@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from urllib.parse import urlsplit
+
+__all__ = [
+    "FacetIndex",
+    "normalize_descriptor",
+    "configure_facet_cache",
+    "load_cached_index",
+    "save_cached_index",
+    "DEFAULT_FACET_CACHE_DIR",
+    "FACET_CACHE_TTL"
+]
+
+DEFAULT_FACET_CACHE_DIR = "state/facets"
+
+# Seconds a tenant's cached facets are trusted before they are fetched again
+FACET_CACHE_TTL = 24 * 60 * 60
+
+_cache_dir = DEFAULT_FACET_CACHE_DIR
+_cache_ttl = FACET_CACHE_TTL
+
+
+def normalize_descriptor(descriptor):
+    """Case- and whitespace-insensitive form of a facet descriptor."""
+    return " ".join(descriptor.split()).lower()
+
+
+class FacetIndex:
+    """
+    Flat lookup table over a Workday tenant's nested facet tree.
+
+    The tree is walked once, depth first, recording every value that has an
+    ID under the facetParameter it belongs to (nested groups such as
+    `locationMainGroup -> locationCountry` keep their own parameter).
+    Lookups are then a dict access. When a descriptor appears under more
+    than one facet, an unqualified lookup returns the first one in tree
+    order, as the old recursive search did.
+    """
+
+    def __init__(self, entries=()):
+        # entries: (facetParameter, normalized descriptor, id), in tree order
+        self.entries = list(entries)
+        self._by_descriptor = {}
+        self._by_parameter = {}
+        for facet_parameter, descriptor, facet_id in self.entries:
+            self._by_descriptor.setdefault(descriptor, (facet_parameter, facet_id))
+            self._by_parameter.setdefault((facet_parameter, descriptor), facet_id)
+
+    @classmethod
+    def from_facets(cls, facets):
+        """Build the index from the `facets` list of a listing response."""
+        entries = []
+
+        def walk(facet_parameter, values):
+            for value in values:
+                if value.get("id"):
+                    entries.append((facet_parameter, normalize_descriptor(value.get("descriptor", "")), value["id"]))
+                if "facetParameter" in value and "values" in value:
+                    walk(value["facetParameter"], value["values"])
+
+        for facet in facets:
+            walk(facet.get("facetParameter", ""), facet.get("values", []))
+        return cls(entries)
+
+    def lookup(self, descriptor, facet_parameter=None):
+        """
+        Find a descriptor's facet ID, optionally within one facetParameter.
+
+        Returns:
+            tuple: (facetParameter, id) if found, or (None, None) if not found.
+        """
+        key = normalize_descriptor(descriptor)
+        if facet_parameter is None:
+            return self._by_descriptor.get(key, (None, None))
+        facet_id = self._by_parameter.get((facet_parameter, key))
+        return (facet_parameter, facet_id) if facet_id else (None, None)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# --- On-Disk Cache ---
+def configure_facet_cache(directory=DEFAULT_FACET_CACHE_DIR, ttl=FACET_CACHE_TTL):
+    """Set where tenant facet indexes are cached and for how long; a `ttl` of 0 disables the cache."""
+    global _cache_dir, _cache_ttl
+    _cache_dir = directory
+    _cache_ttl = ttl
+
+
+def _cache_path(url):
+    """One file per tenant site, e.g. `state/facets/mtb.wd5.myworkdayjobs.com-3f2a9c1b.json`."""
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(_cache_dir, f"{urlsplit(url).netloc}-{digest}.json")
+
+
+def load_cached_index(url):
+    """The tenant's cached facet index, or None if missing, expired or unreadable."""
+    if _cache_ttl <= 0:
+        return None
+    try:
+        with open(_cache_path(url), "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if cached.get("url") != url or time.time() - cached.get("fetched_at", 0) > _cache_ttl:
+        return None
+    return FacetIndex(tuple(entry) for entry in cached.get("entries", []))
+
+
+def save_cached_index(url, index):
+    if _cache_ttl <= 0:
+        return
+    path = _cache_path(url)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"url": url, "fetched_at": time.time(), "entries": index.entries}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logging.warning(f"Could not cache facets for {url}: {e}")
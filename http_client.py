@@ -0,0 +1,338 @@
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+
+import run_metrics
+
+__all__ = [
+    "TokenBucket",
+    "configure_host_rate",
+    "configure_host_bucket",
+    "configure_session_factory",
+    "request",
+    "get",
+    "post",
+    "patch",
+    "delete",
+    "get_stats",
+    "get_report",
+    "format_stats"
+]
+
+# --- Transport Settings ---
+NOTION_HOST = "api.notion.com"
+NOTION_RATE = 3.0            # Notion's documented average of ~3 requests/second
+DEFAULT_WORKDAY_RATE = 2.0   # Per-tenant default; override with `rate_limit` in institutions.yaml
+
+REQUEST_TIMEOUT = 30
+
+# gzip/deflate, plus br and zstd when their decoders (`brotli`, `zstandard`)
+# are installed; advertising an encoding that can't be decoded would break responses
+ACCEPT_ENCODING = requests.utils.DEFAULT_ACCEPT_ENCODING
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# A 429 means the server turned the request away, so even non-idempotent requests retry it
+NOT_PROCESSED_STATUSES = {429}
+POOL_MAXSIZE = 16
+
+# --- Token Bucket ---
+class TokenBucket:
+    """
+    Thread-safe token bucket pacing requests to one host.
+
+    The bucket adapts to throttling: a 429 pauses it for the server-requested
+    delay and halves the rate, and each later success recovers a tenth of
+    the configured rate until it is back to target.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.target_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority=None):
+        """
+        Block until a request may be sent. Returns the seconds spent waiting.
+        `priority` is ignored here; see `notion_scheduler.NotionScheduler`.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                else:
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def throttle(self, delay):
+        """Back off after the server signalled it is overloaded."""
+        with self._lock:
+            self.rate = max(self.target_rate / 10, self.rate / 2)
+            self.tokens = 0.0
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+
+    def success(self):
+        with self._lock:
+            if self.rate < self.target_rate:
+                self.rate = min(self.target_rate, self.rate + self.target_rate / 10)
+
+# --- Per-Host State ---
+_state_lock = threading.Lock()
+_sessions = {}
+_buckets = {}
+_host_rates = {NOTION_HOST: NOTION_RATE}
+_stats = defaultdict(lambda: defaultdict(float))
+_latencies = defaultdict(list)
+_session_factory = None
+
+def _host(url):
+    return urlsplit(url).netloc if "://" in url else url
+
+def configure_host_rate(host_or_url, rate):
+    """Set the request rate (requests/second) for a host, e.g. one Workday tenant."""
+    host = _host(host_or_url)
+    with _state_lock:
+        _host_rates[host] = float(rate)
+        bucket = _buckets.get(host)
+        if bucket is not None:
+            bucket.target_rate = bucket.rate = float(rate)
+
+def configure_host_bucket(host_or_url, bucket):
+    """
+    Pace a host with the given bucket instead of a plain `TokenBucket`, e.g.
+    Notion's priority scheduler. `configure_host_rate` still sets its rate.
+    """
+    host = _host(host_or_url)
+    with _state_lock:
+        _buckets[host] = bucket
+        _host_rates[host] = bucket.target_rate
+
+def configure_session_factory(factory=None):
+    """
+    Wrap or replace the per-host sessions, e.g. to record or replay traffic
+    (see `http_replay`). `factory(host, session)` receives the pooled
+    `requests.Session` and returns an object with the same `request` method.
+    Pass None to restore the plain sessions.
+    """
+    global _session_factory
+    with _state_lock:
+        _session_factory = factory
+        _sessions.clear()
+
+def _session(host):
+    with _state_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            if _session_factory is not None:
+                session = _session_factory(host, session)
+            _sessions[host] = session
+        return session
+
+def _bucket(host):
+    with _state_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(_host_rates.get(host, DEFAULT_WORKDAY_RATE))
+            _buckets[host] = bucket
+        return bucket
+
+def _record(host, latency=None, **counters):
+    with _state_lock:
+        for name, value in counters.items():
+            _stats[host][name] += value
+        if latency is not None:
+            _latencies[host].append(latency)
+
+def _received_size(response):
+    """Bytes on the wire: the (compressed) Content-Length when sent, else the decoded body size."""
+    try:
+        return int(response.headers["Content-Length"])
+    except (KeyError, ValueError):
+        return len(response.content)
+
+def _body_size(body):
+    if body is None:
+        return 0
+    return len(body.encode("utf-8") if isinstance(body, str) else body)
+
+# --- Retry Helpers ---
+def _retry_after(response):
+    """Seconds requested by a `Retry-After` header, or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _not_sent(error):
+    """True if a connection error happened before any of the request was sent."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    # Covers refused connections and DNS failures (NewConnectionError and subclasses)
+    return isinstance(reason, ConnectTimeoutError)
+
+def _backoff(attempt):
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+# --- Requests ---
+def request(method, url, priority=None, idempotent=True, **kwargs):
+    """
+    Send a request through the pooled session for `url`'s host.
+
+    Requests are paced by the host's token bucket, which may order waiting
+    requests by `priority` (lower first). 429 and 5xx responses and
+    connection errors are retried up to `MAX_RETRIES` times, honoring
+    `Retry-After` and otherwise backing off with jitter. The final response
+    is returned whatever its status; the final connection error is raised.
+
+    Pass `idempotent=False` for requests that must not be repeated once the
+    server may have acted on them, e.g. creating a Notion page. Those are
+    only retried on 429 and on connection errors raised before the request
+    was sent. A 5xx response is returned and a timeout or dropped connection
+    is raised, since the server may already have applied the request.
+    """
+    host = _host(url)
+    session = _session(host)
+    bucket = _bucket(host)
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+
+    for attempt in range(MAX_RETRIES + 1):
+        waited = bucket.acquire(priority)
+        _record(host, throttle_wait=waited, requests=1)
+
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == MAX_RETRIES or not (idempotent or _not_sent(e)):
+                _record(host, errors=1)
+                run_metrics.record_request(error=True, sleep_time=waited)
+                raise
+            delay = _backoff(attempt)
+            logging.warning(f"{method} {url} failed ({e}); retrying in {delay:.1f}s")
+            _record(host, retries=1, backoff_wait=delay)
+            run_metrics.record_request(retried=True, sleep_time=waited + delay)
+            time.sleep(delay)
+            continue
+
+        sent = _body_size(response.request.body)
+        received = _received_size(response)
+        _record(host, latency=time.perf_counter() - start, bytes_sent=sent, bytes_received=received)
+
+        if response.status_code == 304:
+            _record(host, not_modified=1)
+
+        retry_statuses = RETRY_STATUSES if idempotent else NOT_PROCESSED_STATUSES
+        if response.status_code not in retry_statuses or attempt == MAX_RETRIES:
+            if response.status_code < 400:
+                bucket.success()
+            else:
+                _record(host, errors=1)
+            run_metrics.record_request(
+                error=response.status_code >= 400, bytes_sent=sent, bytes_received=received, sleep_time=waited
+            )
+            return response
+
+        delay = _retry_after(response)
+        if delay is None:
+            delay = _backoff(attempt)
+        if response.status_code == 429:
+            bucket.throttle(delay)
+            _record(host, throttled=1)
+        logging.warning(f"{method} {url} returned {response.status_code}; retrying in {delay:.1f}s")
+        _record(host, retries=1, backoff_wait=delay)
+        run_metrics.record_request(
+            retried=True, bytes_sent=sent, bytes_received=received, sleep_time=waited + delay
+        )
+        time.sleep(delay)
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+def patch(url, **kwargs):
+    return request("PATCH", url, **kwargs)
+
+def delete(url, **kwargs):
+    return request("DELETE", url, **kwargs)
+
+# --- Reporting ---
+def get_stats():
+    """
+    Per-host counters: requests, retries, throttled, errors, not_modified,
+    throttle_wait, backoff_wait, bytes_sent, bytes_received.
+    """
+    with _state_lock:
+        return {host: dict(counters) for host, counters in _stats.items()}
+
+def get_report():
+    """Per-host counters plus a latency summary (seconds) of every completed attempt."""
+    with _state_lock:
+        latencies = {host: sorted(samples) for host, samples in _latencies.items()}
+    report = get_stats()
+    for host, counters in report.items():
+        samples = latencies.get(host, [])
+        p50, p90, p99 = (run_metrics.percentile(samples, f) for f in (0.50, 0.90, 0.99))
+        counters["latency"] = {
+            "count": len(samples),
+            "sum": round(sum(samples), 6),
+            "mean": round(sum(samples) / len(samples), 6) if samples else None,
+            "p50": round(p50, 6) if samples else None,
+            "p90": round(p90, 6) if samples else None,
+            "p99": round(p99, 6) if samples else None,
+            "max": round(samples[-1], 6) if samples else None
+        }
+    return report
+
+def format_stats():
+    """Human-readable transport summary lines, one per host."""
+    lines = []
+    for host, counters in sorted(get_stats().items()):
+        lines.append(
+            f"  🌐 {host}: {int(counters.get('requests', 0))} requests, "
+            f"{int(counters.get('retries', 0))} retries, "
+            f"{int(counters.get('throttled', 0))} throttled, "
+            f"{int(counters.get('not_modified', 0))} not modified, "
+            f"{counters.get('bytes_received', 0) / 1e6:.1f} MB received, "
+            f"{counters.get('throttle_wait', 0):.1f}s rate-limit wait, "
+            f"{counters.get('backoff_wait', 0):.1f}s backoff"
+        )
+    return lines
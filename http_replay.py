@@ -0,0 +1,201 @@
+import json
+import logging
+import os
+import threading
+from collections import defaultdict, deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import http_client
+
+__all__ = [
+    "Recorder",
+    "Replayer",
+    "start_recording",
+    "start_replay",
+    "stop",
+    "exchange_key"
+]
+
+# Response headers kept in fixtures; request headers (and so the Notion
+# token) are never recorded.
+RECORDED_HEADERS = ("Content-Type", "Retry-After", "ETag", "Last-Modified")
+
+_active = None
+
+
+def _canonical_body(body):
+    if body is None:
+        return None
+    return json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def exchange_key(method, url, body=None):
+    """Replay match key: method, full URL and the canonical JSON request body."""
+    return method.upper(), url, _canonical_body(body)
+
+
+class Recorder:
+    """
+    Appends every HTTP attempt made through `http_client` to a JSON Lines
+    fixture: method, URL, JSON body, status, selected response headers and
+    the response body. Retried attempts (429s, 5xx) are recorded too, so a
+    replay goes through the same retry path.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8")
+
+    def wrap(self, host, session):
+        return _RecordingSession(self, session)
+
+    def record(self, method, url, body, response):
+        exchange = {
+            "method": method.upper(),
+            "url": url,
+            "request": body,
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+            "body": response.content.decode("utf-8", errors="replace")
+        }
+        line = json.dumps(exchange, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        logging.info(f"Recorded {self.count} HTTP exchanges to {self.path}")
+
+
+class _RecordingSession:
+    def __init__(self, recorder, session):
+        self.recorder = recorder
+        self.session = session
+
+    def request(self, method, url, **kwargs):
+        response = self.session.request(method, url, **kwargs)
+        self.recorder.record(method, url, kwargs.get("json"), response)
+        return response
+
+
+class Replayer:
+    """
+    Serves recorded exchanges instead of touching the network.
+
+    Requests are matched on method, URL and JSON body; repeated identical
+    requests get the recorded responses in order, and the last one is
+    reused once they run out. Requests whose body changed since recording
+    (e.g. a page payload with a different deadline year) fall back to the
+    responses recorded for the same method and URL, then for the same
+    method and path, so a fixture recorded against another Notion base URL
+    still replays. Anything else gets a 404 and is counted in `misses`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.served = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._by_key = defaultdict(deque)
+        self._by_url = defaultdict(deque)
+        self._by_path = defaultdict(deque)
+
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                exchange = json.loads(line)
+                key = exchange_key(exchange["method"], exchange["url"], exchange.get("request"))
+                self._by_key[key].append(exchange)
+                self._by_url[key[:2]].append(exchange)
+                self._by_path[key[0], urlsplit(key[1]).path].append(exchange)
+
+    def wrap(self, host, session):
+        return _ReplaySession(self)
+
+    def _next(self, queue):
+        exchange = queue[0]
+        if len(queue) > 1:
+            queue.popleft()
+        return exchange
+
+    def match(self, method, url, body=None):
+        """The recorded exchange for a request, or None."""
+        key = exchange_key(method, url, body)
+        with self._lock:
+            for queues, queue_key in (
+                (self._by_key, key),
+                (self._by_url, key[:2]),
+                (self._by_path, (key[0], urlsplit(url).path))
+            ):
+                if queues.get(queue_key):
+                    self.served += 1
+                    return self._next(queues[queue_key])
+            self.misses += 1
+            return None
+
+    def respond(self, method, url, body=None):
+        exchange = self.match(method, url, body)
+        if exchange is None:
+            logging.warning(f"No recorded response for {method} {url}")
+            status, headers, content = 404, {}, json.dumps({"message": "No recorded response"})
+        else:
+            status, headers, content = exchange["status"], exchange["headers"], exchange["body"]
+
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = content.encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = url
+        response.request = requests.Request(method, url, json=body).prepare()
+        return response
+
+    def close(self):
+        logging.info(f"Replayed {self.served} HTTP exchanges from {self.path} ({self.misses} unmatched)")
+
+
+class _ReplaySession:
+    def __init__(self, replayer):
+        self.replayer = replayer
+
+    def request(self, method, url, **kwargs):
+        return self.replayer.respond(method, url, kwargs.get("json"))
+
+
+def start_recording(path):
+    """Record all `http_client` traffic to the fixture at `path`."""
+    global _active
+    stop()
+    _active = Recorder(path)
+    http_client.configure_session_factory(_active.wrap)
+    return _active
+
+
+def start_replay(path):
+    """Serve all `http_client` traffic from the fixture at `path`."""
+    global _active
+    stop()
+    _active = Replayer(path)
+    http_client.configure_session_factory(_active.wrap)
+    return _active
+
+
+def stop():
+    """Restore live sessions and close the active recorder or replayer."""
+    global _active
+    if _active is not None:
+        http_client.configure_session_factory(None)
+        _active.close()
+        _active = None
@@ -1,198 +1,667 @@
 import notion_client as nc
-import requests
+import notion_uploader
+import notion_sync
+import description_pool
+import posting_record
+from posting_filter import PostingFilter
+import facet_index
+import http_client
+import run_metrics
+import contextvars
 import logging
-import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 from tqdm import tqdm
 
-def find_id_by_descriptor(facets, target_descriptor):
-    """
-    Recursively find the ID and facetParameter for a given descriptor across Workday facetParameters.
+# Workday's default listing page size; tenants may accept more via `page_size`
+PAGE_SIZE = 20
 
-    Args:
-        facets (list): The facets list loaded from JSON.
-        target_descriptor (str): The descriptor text to search for.
+# Concurrent listing page requests per institution (paced by the tenant's rate limit)
+PAGINATION_WORKERS = 4
 
-    Returns:
-        tuple: (facetParameter, id) if found, or (None, None) if not found.
-    """
-    target_descriptor = target_descriptor.strip().lower()
+# Postings converted and uploaded together; bounds the description blocks held in memory
+UPLOAD_CHUNK = 200
 
-    for facet in facets:
-        facet_parameter = facet.get("facetParameter", "")
-        values = facet.get("values", [])
+# Quick mode: stop after the first listing page when it shows nothing new
+_quick = False
 
-        for value in values:
-            descriptor = value.get("descriptor", "").strip().lower()
-            if descriptor == target_descriptor and "id" in value:
-                return facet_parameter, value["id"]
+JSON_HEADERS = {"Content-Type": "application/json", "Accept-Encoding": http_client.ACCEPT_ENCODING}
+DETAIL_HEADERS = {"User-Agent": "Mozilla/5.0", "Accept-Encoding": http_client.ACCEPT_ENCODING}
 
-            if "facetParameter" in value and "values" in value:
-                nested_facet_parameter = value["facetParameter"]
-                nested_values = value["values"]
+def log_with_prefix(level, company_name, message):
+    getattr(logging, level)(f"[{company_name}] {message}")
 
-                found_facet_parameter, found_id = find_id_by_descriptor(
-                    [{"facetParameter": nested_facet_parameter, "values": nested_values}],
-                    target_descriptor
-                )
+# --- Request Builders & Parsers ---
+# These are shared by the sequential runner below and the asyncio engine in
+# async_runner.py so both paths issue identical requests and parse identically.
 
-                if found_id:
-                    return found_facet_parameter, found_id
+def configure_quick(enabled=False):
+    """
+    Turn quick mode on or off. In quick mode an institution whose first
+    listing page matches its last clean run (see
+    `JobStore.first_page_unchanged`) is skipped after that one request.
+    """
+    global _quick
+    _quick = enabled
+
+def configure_tenant_rate(institution):
+    """Apply the institution's `rate_limit` (requests/second) to its Workday host."""
+    rate = institution.get("rate_limit", http_client.DEFAULT_WORKDAY_RATE)
+    http_client.configure_host_rate(institution["workday_url"], rate)
+
+def build_listing_payload(offset, limit, applied_facets, search_text):
+    return {
+        "limit": limit,
+        "offset": offset,
+        "appliedFacets": applied_facets,
+        "searchText": search_text
+    }
 
-    return None, None
+def facet_filters(institution):
+    """
+    The institution's facet filters as (facetParameter to search, appliedFacets key, descriptors).
 
-def log_with_prefix(level, company_name, message):
-    getattr(logging, level)(f"[{company_name}] {message}")
+    `locations` descriptors are searched across every facet, as they always
+    have been; entries under `facets` are matched within their own
+    facetParameter (e.g. `jobFamilyGroup`, `timeType`, `locationCountry`).
+    """
+    filters = []
+    if institution.get("locations"):
+        filters.append((None, "locations", institution["locations"]))
+    for facet_parameter, descriptors in (institution.get("facets") or {}).items():
+        if isinstance(descriptors, str):
+            descriptors = [descriptors]
+        filters.append((facet_parameter, facet_parameter, descriptors))
+    return filters
+
+def resolve_applied_facets(index, filters):
+    """
+    Map configured descriptors to Workday facet IDs.
 
-def run_institution_scraper(institution: dict):
-    """Run scraping and Notion writing for a single institution."""
+    Returns:
+        tuple: (appliedFacets dict with IDs in config order, list of (key, descriptor) not found)
+    """
+    applied_facets = {}
+    missing = []
+    for facet_parameter, key, descriptors in filters:
+        for descriptor in descriptors:
+            _, facet_id = index.lookup(descriptor, facet_parameter)
+            if facet_id:
+                applied_facets.setdefault(key, []).append(facet_id)
+            else:
+                missing.append((key, descriptor))
+    return applied_facets, missing
+
+def resolve_cached_facets(url, filters):
+    """Resolve filters against the tenant's cached facet index; None if a facet fetch is needed."""
+    index = facet_index.load_cached_index(url)
+    if index is None:
+        return None
+    applied_facets, missing = resolve_applied_facets(index, filters)
+    if missing:
+        # The tenant may have added facet values since the index was cached
+        return None
+    return applied_facets, missing
+
+def resolve_fetched_facets(url, facets, filters):
+    """Index freshly fetched facets, cache the index, and resolve filters against it."""
+    index = facet_index.FacetIndex.from_facets(facets)
+    facet_index.save_cached_index(url, index)
+    return resolve_applied_facets(index, filters)
+
+def check_applied_facets(company_name, filters, applied_facets, missing):
+    """
+    Log descriptors that matched nothing.
 
-    # 1. Set local vars from config
-    url = institution["workday_url"]
-    locations = institution.get("locations", [])
-    search_text = institution["search_text"]
-    company_name = institution["name"]
+    Returns:
+        bool: False if some filter matched no IDs at all, in which case the institution is skipped.
+    """
+    for key, descriptor in missing:
+        if key == "locations":
+            log_with_prefix("error", company_name, f"Location '{descriptor}' not found in facets.")
+        else:
+            log_with_prefix("error", company_name, f"'{descriptor}' not found in the {key} facet.")
+
+    for _, key, _ in filters:
+        if key not in applied_facets:
+            label = "location" if key == "locations" else key
+            log_with_prefix("warning", company_name, f"No valid {label} IDs matched descriptors. Skipping.")
+            return False
+    return True
+
+def fetch_facets(url):
+    """
+    POST a one-result listing query to read the tenant's facets.
 
-    log_with_prefix("info", company_name, f"🏁 Starting scrape.")
+    Returns:
+        list: The facets, or None if the request failed.
+    """
+    payload = build_listing_payload(0, 1, {}, "")
+    response = http_client.post(url, json=payload, headers=JSON_HEADERS)
+    if response.status_code != 200:
+        return None
+    return response.json().get("facets", [])
 
-    # 2. Initial fetch for facets
-    initial_payload = {
-        "limit": 1,
-        "offset": 0,
-        "appliedFacets": {},
-        "searchText": ""
-    }
+def fetch_listing_page(url, offset, limit, applied_facets, search_text):
+    """
+    POST one listing page.
 
-    response = requests.post(url, json=initial_payload, headers={"Content-Type": "application/json"})
+    Returns:
+        tuple: (status code, response JSON or None if the request failed)
+    """
+    payload = build_listing_payload(offset, limit, applied_facets, search_text)
+    response = http_client.post(url, json=payload, headers=JSON_HEADERS)
     if response.status_code != 200:
-        log_with_prefix("error", company_name, f"Failed to fetch facets.")
-        return
+        return response.status_code, None
+    return response.status_code, response.json()
 
-    facets = response.json().get("facets", [])
-    location_ids = []
+def check_first_page(url, applied_facets, search_text, company_name, page_size=PAGE_SIZE, store=None,
+                     checkpoint=None):
+    """
+    Quick mode: fetch the first listing page and decide whether the rest of
+    the institution's run can be skipped. Needs the job store, and is not
+    tried when resuming a checkpoint with listings.
 
-    if locations:
-        for loc in tqdm(locations, desc=f"{company_name}: Location facets", unit="loc"):
-            facet_param, loc_id = find_id_by_descriptor(facets, loc)
-            if loc_id:
-                location_ids.append(loc_id)
-            else:
-                log_with_prefix("error", company_name, f"Location '{loc}' not found in facets.")
+    Returns:
+        tuple: (True if nothing changed since the last clean run, the fetched
+        (status, data) first page for `collect_listings` to reuse, or None)
+    """
+    if not _quick or store is None or (checkpoint is not None and checkpoint.listings):
+        return False, None
+
+    first_page = fetch_listing_page(url, 0, page_size, applied_facets, search_text)
+    data = first_page[1]
+    if data is None:
+        return False, first_page
+    listings = listings_with_path(data.get("jobPostings", []))
+    return store.first_page_unchanged(company_name, listings, data.get("total") or 0), first_page
+
+def collect_listings(url, applied_facets, search_text, company_name, page_size=PAGE_SIZE,
+                     checkpoint=None, workers=PAGINATION_WORKERS, first_page=None):
+    """
+    Collect every listing entry for the search.
 
-    if locations and not location_ids:
-        log_with_prefix("warning", company_name, f"No valid location IDs matched descriptors. Skipping.")
-        return []
+    The first page's `total` tells us every remaining page offset, so those
+    pages are fetched concurrently (`workers` at a time, paced by the
+    tenant's rate limit) and accepted in offset order. A sequential tail then
+    picks up anything posted after `total` was read. If the tenant rejects a
+    `page_size` above the default, pagination falls back to `PAGE_SIZE`.
+    A `first_page` already fetched by `check_first_page` is reused.
 
-    # 3. Job collection
-    offset = 0
-    limit = 20
-    job_urls = []
+    Returns:
+        tuple: (listing entries, True if pagination ran to the end without errors)
+    """
+    offset = checkpoint.offset if checkpoint is not None else 0
+    limit = page_size
+    listings = list(checkpoint.listings) if checkpoint is not None else []
+    pagination_complete = True
     page_pbar = tqdm(desc=f"{company_name}: Pages scraped", unit="page")
 
-    while True:
+    if checkpoint is not None and checkpoint.pagination_done and checkpoint.pagination_complete:
+        write_pagination_summary(company_name, listings, page_pbar.n)
+        page_pbar.close()
+        return listings, True
 
-        applied_facets = {}
-        if location_ids:
-            applied_facets["locations"] = location_ids
+    def fetch(page_offset):
+        return fetch_listing_page(url, page_offset, limit, applied_facets, search_text)
 
+    def accept(page_offset, data):
+        """Add a page's listings. Returns True if more pages may follow."""
+        jobs = data.get("jobPostings", [])
+        jobs_data = listings_with_path(jobs)
+        if not jobs_data:
+            return False
+        listings.extend(jobs_data)
+        page_pbar.update(1)
+        if checkpoint is not None:
+            checkpoint.record_page(jobs_data, page_offset + limit)
+        return len(jobs) >= limit
+
+    # First page: learn `total` and confirm the tenant accepts the page size
+    status, data = first_page if first_page is not None and offset == 0 else fetch(offset)
+    if status == 400 and limit != PAGE_SIZE:
+        log_with_prefix("warning", company_name, f"Page size {limit} rejected; falling back to {PAGE_SIZE}.")
+        limit = PAGE_SIZE
+        status, data = fetch(offset)
+
+    more = False
+    if data is None:
+        log_with_prefix("error", company_name, f"Failed to fetch jobs.")
+        pagination_complete = False
+    else:
+        more = accept(offset, data)
+        offset += limit
+        total = data.get("total") or 0
+
+        if more and total > offset:
+            offsets = list(range(offset, total, limit))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # Each worker carries the caller's context so its requests count toward the current stage
+                futures = [pool.submit(contextvars.copy_context().run, fetch, page_offset) for page_offset in offsets]
+                for page_offset, future in zip(offsets, futures):
+                    status, data = future.result()
+                    if data is None:
+                        log_with_prefix("error", company_name, f"Failed to fetch jobs.")
+                        pagination_complete = more = False
+                    else:
+                        more = accept(page_offset, data)
+                        offset = page_offset + limit
+                    if not more:
+                        for pending in futures:
+                            pending.cancel()
+                        break
+
+    # Sequential tail for postings added since `total` was read
+    while more:
+        status, data = fetch(offset)
+        if data is None:
+            log_with_prefix("error", company_name, f"Failed to fetch jobs.")
+            pagination_complete = False
+            break
+        more = accept(offset, data)
+        offset += limit
 
-        job_payload = {
-            "limit": limit,
-            "offset": offset,
-            "appliedFacets": applied_facets,
-            "searchText": search_text
-        }
+    if checkpoint is not None:
+        checkpoint.record_pagination_end(pagination_complete)
 
-        response = requests.post(url, json=job_payload, headers={"Content-Type": "application/json"})
+    write_pagination_summary(company_name, listings, page_pbar.n)
+    page_pbar.close()
+    return listings, pagination_complete
 
-        if response.status_code != 200:
-            log_with_prefix("error", company_name, f"Failed to fetch jobs.")
-            break
+def build_job_url(url, job):
+    """Build the job detail URL for a `jobPostings` listing entry."""
+    return f"{url.rsplit('/jobs', 1)[0]}/job/{job.get('externalPath', '').split('/')[-1]}"
 
-        jobs = response.json().get("jobPostings", [])
-        jobs_data = [
-            f"{url.rsplit('/jobs', 1)[0]}/job/{job.get('externalPath', '').split('/')[-1]}"
-            for job in jobs if "externalPath" in job
-        ]
+def listings_with_path(jobs):
+    """Keep only listing entries that can be turned into a detail URL."""
+    return [job for job in jobs if "externalPath" in job]
 
-        if not jobs_data:
-            break
+def posting_slug(url_or_path):
+    """
+    Returns the last path segment of a job URL or `externalPath`
+    (e.g. `Data-Analyst_R0123456`), which identifies a posting within a tenant.
+    """
+    return urlsplit(url_or_path).path.rstrip("/").rsplit("/", 1)[-1]
 
-        job_urls.extend(jobs_data)
-        offset += limit
-        page_pbar.update(1)
+def listing_req_id_candidates(job):
+    """
+    Returns the values in a listing entry that may be its Req ID.
 
-        if len(jobs) < limit:
-            break
+    Workday puts the Req ID in `bulletFields` and usually suffixes it to the
+    `externalPath` slug after the last underscore.
+    """
+    candidates = {
+        field.strip() for field in job.get("bulletFields", [])
+        if isinstance(field, str) and field.strip()
+    }
+    slug = posting_slug(job.get("externalPath", ""))
+    if "_" in slug:
+        candidates.add(slug.rsplit("_", 1)[1])
+    return candidates
+
+def is_known_listing(job, existing_req_ids, existing_slugs):
+    """True if a listing entry matches a posting already tracked in Notion."""
+    if posting_slug(job.get("externalPath", "")) in existing_slugs:
+        return True
+    return not existing_req_ids.isdisjoint(listing_req_id_candidates(job))
+
+def filter_new_listings(listings, existing_req_ids, existing_slugs):
+    """
+    Drop listing entries already tracked in Notion so they never get a detail fetch.
 
-        time.sleep(0.5)
+    Returns:
+        tuple: (new listing entries, number of detail fetches saved)
+    """
+    new_listings = [
+        job for job in listings
+        if not is_known_listing(job, existing_req_ids, existing_slugs)
+    ]
+    return new_listings, len(listings) - len(new_listings)
+
+def plan_detail_fetches(company_name, listings, existing_req_ids, existing_slugs, store=None,
+                        pagination_complete=True, checkpoint=None, posting_filter=None):
+    """
+    Decide which listing entries need a detail fetch.
 
-    tqdm.write(f"\n📄 {company_name} Pagination Summary:")
-    tqdm.write(f"  🔍 Total job URLs collected: {len(job_urls)}")
-    tqdm.write(f"  📄 Total pages scraped: {page_pbar.n}")
+    Postings already in Notion are dropped, unless sync mode needs their
+    current details to update their pages. With a `JobStore`, the listings
+    are recorded (closing vanished postings when pagination completed) and
+    postings whose listing is unchanged reuse their stored detail. Details
+    saved in a resumed `checkpoint` are reused as well. Listings rejected by
+    the institution's `posting_filter` are dropped before any of this.
 
+    Returns:
+        tuple: (list of (listing, stored detail or None), number of detail fetches saved)
+    """
+    sync = notion_sync.is_enabled()
+    if sync:
+        new_listings, fetches_saved = listings, 0
+    else:
+        new_listings, fetches_saved = filter_new_listings(listings, existing_req_ids, existing_slugs)
+        log_with_prefix("info", company_name, f"Skipping {fetches_saved} detail fetches for postings already in Notion.")
+    if posting_filter is not None:
+        new_listings = [job for job in new_listings if posting_filter.accepts_listing(job)]
+        log_with_prefix(
+            "info", company_name, f"Filtered out {posting_filter.rejected_count('listing')} listings before detail fetch."
+        )
+
+    stored_details = {}
+    if store is not None:
+        stored_details = store.sync_listings(company_name, listings, close_missing=pagination_complete)
+        if sync:
+            # Revalidate postings already in Notion (conditionally, when the tenant
+            # sends validators) so description changes reach their pages
+            stored_details = {
+                job["externalPath"]: stored_details[job["externalPath"]] for job in listings
+                if job["externalPath"] in stored_details
+                and not is_known_listing(job, existing_req_ids, existing_slugs)
+            }
+    if checkpoint is not None:
+        stored_details.update(checkpoint.details)
+
+    plan = [(job, stored_details.get(job["externalPath"])) for job in new_listings]
+    reused = sum(1 for _, detail in plan if detail is not None)
+    if store is not None or checkpoint is not None:
+        log_with_prefix("info", company_name, f"Reusing {reused} postings from the job store/checkpoint.")
+
+    return plan, fetches_saved + reused
+
+def fetch_job_detail(url, company_name, store=None, listing=None):
+    """
+    Fetch a single job's `jobPostingInfo`.
 
-    page_pbar.close()
+    With a job store and the posting's `listing` entry, the request is
+    conditional on the `ETag`/`Last-Modified` saved with its previous detail,
+    and a `304 Not Modified` reuses that detail. The result and the
+    response's validators are saved to the store.
 
-    # 4. Job detail collection
-    job_postings = []
-    for idx, url in tqdm(enumerate(job_urls), total=len(job_urls), desc=f"{company_name}: Fetching job data"):
-        try:
-            response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-            if response.status_code == 200:
-                job_data = response.json().get("jobPostingInfo")
-                if job_data:
-                    job_postings.append(job_data)
-        except Exception as e:
-            log_with_prefix("error", company_name, f"Exception fetching job {url}: {str(e)}")
-
-        time.sleep(0.5)
-
-    # 5. Deduplication
-    log_with_prefix("info", company_name, "Fetching existing Req IDs from Notion databases...")
-    existing_ids_main = nc.fetch_existing_req_ids(nc.DATABASE_ID, company_filter=company_name)
-    existing_ids_applied = nc.fetch_existing_req_ids(nc.APPLIED_DATABASE_ID, company_filter=company_name)
-    existing_req_ids = existing_ids_main.union(existing_ids_applied)
+    Returns:
+        dict or None: The posting info, or None if the request failed.
+    """
+    stored = store.stored_detail(company_name, listing) if store is not None else None
+    stored_data, etag, last_modified = stored or (None, None, None)
+    headers = DETAIL_HEADERS
+    if etag or last_modified:
+        headers = dict(DETAIL_HEADERS)
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    try:
+        response = http_client.get(url, headers=headers)
+        if response.status_code == 304 and stored_data is not None:
+            log_with_prefix("info", company_name, f"Job {url} not modified; reusing stored detail.")
+            job_data = stored_data
+        elif response.status_code == 200:
+            job_data = response.json().get("jobPostingInfo") or None
+        else:
+            log_with_prefix("warning", company_name, f"Failed to fetch job {url} — {response.status_code}")
+            return None
+    except Exception as e:
+        log_with_prefix("error", company_name, f"Exception fetching job {url}: {str(e)}")
+        return None
+
+    if job_data and store is not None:
+        store.save_detail(
+            company_name, listing, job_data,
+            etag=response.headers.get("ETag") or etag,
+            last_modified=response.headers.get("Last-Modified") or last_modified
+        )
+    return job_data
+
+def fetch_existing_job_keys(company_name, notion_index=None):
+    """
+    Collect Req IDs and posting slugs already present in either Notion database for this company.
+
+    With a refreshed `NotionIndex` this is a local lookup; otherwise both
+    databases are queried for the company.
+
+    Returns:
+        tuple: (set of Req IDs, set of posting slugs)
+    """
+    if notion_index is not None:
+        existing_req_ids, existing_urls = notion_index.existing_job_keys(company_name)
+    else:
+        log_with_prefix("info", company_name, "Fetching existing Req IDs from Notion databases...")
+        ids_main, urls_main = nc.fetch_existing_job_keys(nc.DATABASE_ID, company_filter=company_name)
+        ids_applied, urls_applied = nc.fetch_existing_job_keys(nc.APPLIED_DATABASE_ID, company_filter=company_name)
+        existing_req_ids = ids_main.union(ids_applied)
+        existing_urls = urls_main.union(urls_applied)
+    existing_slugs = {posting_slug(job_url) for job_url in existing_urls}
     log_with_prefix("info", company_name, f"Found {len(existing_req_ids)} total existing Req IDs.")
+    return existing_req_ids, existing_slugs
+
+def upload_job_postings(job_postings, existing_req_ids, company_name, notion_index=None, checkpoint=None):
+    """
+    Upload postings that are not yet in Notion through the parallel upload
+    pipeline, converting their descriptions `UPLOAD_CHUNK` postings at a
+    time. Created pages are added to `notion_index` and recorded in
+    `checkpoint` when those are given.
+
+    Returns:
+        tuple: (success, skipped, failed, retried) counts.
+    """
+    if checkpoint is not None:
+        existing_req_ids = existing_req_ids | checkpoint.uploaded
 
-    # 6. Notion upload
-    success, skipped, failed = 0, 0, 0
-    for job in tqdm(job_postings, desc=f"{company_name}: Notion Upload", unit="job"):
+    to_upload = []
+    skipped = 0
+    for job in job_postings:
         req_id = job.get("jobReqId", "").strip()
         if req_id in existing_req_ids:
             log_with_prefix("info", company_name, f"Req ID {req_id} already exists. Skipping.")
             skipped += 1
-            continue
-
-        try:
-            notion_payload = nc.create_notion_payload(job, company_name) # This builds the page payload from a job dictionary
-            notion_response = requests.post(nc.NOTION_API_URL, headers=nc.NOTION_HEADERS, json=notion_payload)
-
-            if notion_response.status_code == 200:
-                success += 1
-                log_with_prefix("info", company_name, f"Job '{job.get('title')}' added to Notion.")
+        else:
+            to_upload.append(job)
 
-                # ✅ Get Notion page ID from creation response
-                new_page_id = notion_response.json().get("id")
+    def on_created(job, page_id):
+        log_with_prefix("info", company_name, f"Job '{job.get('title')}' added to Notion.")
+        req_id = job.get("jobReqId", "").strip()
+        if checkpoint is not None:
+            checkpoint.record_uploaded(req_id)
+        if notion_index is not None:
+            notion_index.add_page(
+                nc.DATABASE_ID, page_id, req_id, company_name, job.get("externalUrl"), stage=notion_sync.OPEN_STAGE,
+                description_hash=notion_sync.description_hash(job.get("jobDescription", ""))
+            )
+
+    # Convert and upload a chunk at a time, so only one chunk's descriptions
+    # and blocks are in memory however many postings were spilled to disk
+    tasks = []
+    for start in range(0, len(to_upload), UPLOAD_CHUNK):
+        chunk = to_upload[start:start + UPLOAD_CHUNK]
+        with run_metrics.stage(company_name, "conversion") as stage:
+            conversions = description_pool.convert_descriptions(
+                [job.get("jobDescription", "") for job in chunk], company_name
+            )
+            stage.items = len(conversions)
+
+        with run_metrics.stage(company_name, "upload") as stage:
+            chunk_tasks = notion_uploader.upload_jobs(chunk, company_name, on_created=on_created, conversions=conversions)
+            stage.items = len(chunk_tasks)
+        del conversions
+        tasks.extend(chunk_tasks)
+
+    success, failed, retried = 0, 0, 0
+    for task in tasks:
+        if task.attempts > 1:
+            retried += 1
+        if task.done:
+            success += 1
+        else:
+            failed += 1
+            log_with_prefix("error", company_name, f"Failed to upload job '{task.job.get('title')}' — {task.error}")
 
-                # ✅ Append jobDescription as page body content
-                html_desc = job.get("jobDescription", "")
-                if html_desc:
-                    nc.append_job_description_to_page(new_page_id, html_desc)
+    return success, skipped, failed, retried
 
-            else:
-                failed += 1
-                log_with_prefix("error", company_name, f"Failed to upload job '{job.get('title')}' — {notion_response.status_code}: {notion_response.text}")
+def sync_notion_pages(company_name, job_postings, existing_req_ids, listings, pagination_complete, notion_index):
+    """
+    Sync mode: update the pages of postings that were already in Notion
+    before this run, and close the pages of postings no longer listed (only
+    after a complete pagination, and never when the listing came back empty).
+    """
+    if not notion_sync.is_enabled() or notion_index is None:
+        return
 
-        except Exception as e:
-            failed += 1
-            log_with_prefix("error", company_name, f"Error uploading job '{job.get('title')}': {str(e)}")
+    existing_postings = [job for job in job_postings if job.get("jobReqId", "").strip() in existing_req_ids]
+    with run_metrics.stage(company_name, "sync") as stage:
+        counts = notion_sync.sync_existing_pages(existing_postings, company_name, notion_index)
+        closed, close_failed = 0, 0
+        if pagination_complete and listings:
+            listed_req_ids = set().union(*(listing_req_id_candidates(job) for job in listings))
+            listed_slugs = {posting_slug(job["externalPath"]) for job in listings}
+            closed, close_failed = notion_sync.close_missing_pages(
+                company_name,
+                lambda page: page["req_id"] in listed_req_ids or posting_slug(page["job_url"] or "") in listed_slugs,
+                notion_index
+            )
+        stage.items = counts["updated"] + counts["unchanged"] + closed
+
+    tqdm.write(f"\n🔄 {company_name} Sync Summary:")
+    tqdm.write(f"  ✏️ Updated  : {counts['updated']}")
+    tqdm.write(f"  💤 Unchanged: {counts['unchanged']}")
+    tqdm.write(f"  🗄️ Closed   : {closed}")
+    tqdm.write(f"  🔴 Failed   : {counts['failed'] + close_failed}")
+
+def write_unchanged_summary(company_name):
+    log_with_prefix("info", company_name, "First listing page unchanged since the last clean run; skipping.")
+    tqdm.write(f"\n⏩ {company_name}: no new postings on the first page; skipped.")
+
+def write_filter_summary(company_name, posting_filter):
+    if posting_filter is None:
+        return
+    for line in posting_filter.format_summary():
+        log_with_prefix("info", company_name, line.strip())
+        tqdm.write(line)
 
-        time.sleep(0.5)
+def write_pagination_summary(company_name, listings, pages):
+    tqdm.write(f"\n📄 {company_name} Pagination Summary:")
+    tqdm.write(f"  🔍 Total job URLs collected: {len(listings)}")
+    tqdm.write(f"  📄 Total pages scraped: {pages}")
 
+def write_upload_summary(company_name, success, skipped, failed, total, fetches_saved=0, retried=0):
     tqdm.write(f"\n📊 {company_name} Summary:")
     tqdm.write(f"  ✅ Uploaded: {success}")
     tqdm.write(f"  🟡 Skipped : {skipped}")
     tqdm.write(f"  🔴 Failed  : {failed}")
-    tqdm.write(f"  📦 Total   : {len(job_postings)}")
+    tqdm.write(f"  🔁 Retried : {retried}")
+    tqdm.write(f"  📦 Total   : {total}")
+    tqdm.write(f"  ⏭️ Detail fetches saved: {fetches_saved}")
+
+def run_institution_scraper(institution: dict, store=None, notion_index=None, checkpoint=None):
+    """
+    Run scraping and Notion writing for a single institution.
 
-    return job_postings
+    Returns:
+        list: Every `jobPostingInfo` collected. See `iter_institution_postings`
+        to stream postings instead of accumulating them.
+    """
+    return list(iter_institution_postings(institution, store, notion_index, checkpoint))
+
+def iter_institution_postings(institution: dict, store=None, notion_index=None, checkpoint=None):
+    """
+    Run scraping and Notion writing for a single institution, yielding each
+    `jobPostingInfo` as soon as it is available.
+
+    The Notion upload runs once the detail collection is exhausted, so the
+    generator must be consumed to the end.
+
+    Args:
+        institution (dict): Institution config entry.
+        store (JobStore): Optional local job store enabling incremental scraping.
+        notion_index (NotionIndex): Optional refreshed Notion index used for deduplication.
+        checkpoint (InstitutionCheckpoint): Optional checkpoint recording progress so an
+            interrupted run can resume. It is cleared once the run finishes.
+    """
+
+    # 1. Set local vars from config
+    url = institution["workday_url"]
+    filters = facet_filters(institution)
+    search_text = institution["search_text"]
+    company_name = institution["name"]
+
+    log_with_prefix("info", company_name, f"🏁 Starting scrape.")
+    try:
+        posting_filter = PostingFilter.from_institution(institution)
+    except ValueError as e:
+        log_with_prefix("error", company_name, f"Invalid filters: {e}")
+        return
+    configure_tenant_rate(institution)
+
+    # 2. Resolve facet filters, fetching facets only if the cached index can't
+    applied_facets = {}
+    if filters:
+        with run_metrics.stage(company_name, "facets") as stage:
+            resolved = resolve_cached_facets(url, filters)
+            if resolved is None:
+                facets = fetch_facets(url)
+                if facets is None:
+                    log_with_prefix("error", company_name, f"Failed to fetch facets.")
+                    return
+                resolved = resolve_fetched_facets(url, facets, filters)
+
+            applied_facets, missing = resolved
+            stage.items = sum(len(ids) for ids in applied_facets.values())
+        if not check_applied_facets(company_name, filters, applied_facets, missing):
+            return
+
+    # 3. Job collection
+    page_size = institution.get("page_size", PAGE_SIZE)
+    with run_metrics.stage(company_name, "pagination") as stage:
+        unchanged, first_page = check_first_page(
+            url, applied_facets, search_text, company_name, page_size, store, checkpoint
+        )
+        if not unchanged:
+            listings, pagination_complete = collect_listings(
+                url, applied_facets, search_text, company_name,
+                page_size=page_size, checkpoint=checkpoint, first_page=first_page
+            )
+            stage.items = len(listings)
+    if unchanged:
+        write_unchanged_summary(company_name)
+        if checkpoint is not None:
+            checkpoint.clear()
+        return
+
+    # 4. Deduplication — known, unchanged and filtered-out postings never get a detail fetch
+    with run_metrics.stage(company_name, "dedup") as stage:
+        existing_req_ids, existing_slugs = fetch_existing_job_keys(company_name, notion_index)
+        plan, fetches_saved = plan_detail_fetches(
+            company_name, listings, existing_req_ids, existing_slugs, store, pagination_complete, checkpoint,
+            posting_filter
+        )
+        stage.items = len(listings)
+
+    # 5. Job detail collection — full postings are streamed out; only compact
+    # records are kept for the upload and sync stages
+    job_postings = []
+    with posting_record.open_description_store() as descriptions:
+        with run_metrics.stage(company_name, "details") as stage:
+            for job, job_data in tqdm(plan, desc=f"{company_name}: Fetching job data"):
+                if job_data is None:
+                    job_data = fetch_job_detail(build_job_url(url, job), company_name, store, job)
+                    if job_data and checkpoint is not None:
+                        checkpoint.record_detail(job, job_data)
+
+                if job_data and (posting_filter is None or posting_filter.accepts_detail(job_data)):
+                    job_postings.append(posting_record.PostingRecord.from_detail(job_data, descriptions))
+                    stage.items += 1
+                    yield job_data
+
+        # 6. Notion upload
+        success, skipped, failed, retried = upload_job_postings(
+            job_postings, existing_req_ids, company_name, notion_index, checkpoint
+        )
+
+        write_upload_summary(company_name, success, skipped, failed, len(job_postings), fetches_saved, retried)
+        write_filter_summary(company_name, posting_filter)
+
+        # 7. Sync mode: update existing pages, close vanished postings
+        sync_notion_pages(company_name, job_postings, existing_req_ids, listings, pagination_complete, notion_index)
+
+    if store is not None:
+        store.record_run(company_name, len(listings), pagination_complete and not failed)
+
+    if checkpoint is not None:
+        checkpoint.clear()
@@ -1,12 +1,21 @@
-from bs4 import BeautifulSoup, NavigableString, Tag
+import re
+from html.entities import html5
+from html.parser import HTMLParser
 
-__all__ = ["html_to_notion_blocks"]
+__all__ = ["html_to_notion_blocks", "html_to_notion_blocks_bs4"]
 
-def html_to_notion_blocks(html_text):
+def html_to_notion_blocks_bs4(html_text):
     """
     Converts jobDescription HTML into a list of Notion-compatible blocks.
     Supports: paragraphs, headings, unordered/ordered lists.
+
+    Reference implementation on a full BeautifulSoup tree. `html_to_notion_blocks`
+    produces identical output in a single pass and falls back to this for
+    markup it does not handle itself.
     """
+    # Imported here so runs that never fall back to the tree don't pay for bs4
+    from bs4 import BeautifulSoup, NavigableString, Tag
+
     soup = BeautifulSoup(html_text, "html.parser")
     blocks = []
 
@@ -150,3 +159,283 @@ def html_to_notion_blocks(html_text):
         walk_and_parse(child)
 
     return blocks
+
+# --- Single-pass converter ---
+MAX_TEXT_LENGTH = 2000
+
+HEADING_BLOCK_TYPES = {"h1": "heading_1", "h2": "heading_2", "h3": "heading_3"}
+LIST_BLOCK_TYPES = {"ul": "bulleted_list_item", "ol": "numbered_list_item"}
+
+# Tag -> index into (bold, italic, underline, code, strikethrough)
+ANNOTATION_TAGS = {"b": 0, "strong": 0, "i": 1, "em": 1, "u": 2, "code": 3, "s": 4}
+_ANNOTATION_NAMES = ("bold", "italic", "underline", "code", "strikethrough")
+_NO_ANNOTATIONS = (False,) * 5
+
+# Tags BeautifulSoup closes as soon as they open (its empty-element list)
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link",
+    "menuitem", "meta", "param", "source", "track", "wbr", "basefont", "bgsound",
+    "command", "frame", "image", "isindex", "nextid", "spacer"
+})
+
+# Tags whose strings BeautifulSoup stores as special string types. `get_text()`
+# on any other tag ignores them, and so does the empty-block check.
+STRING_CONTAINER_TAGS = frozenset({"rt", "rp", "style", "script", "template"})
+TEXT_KINDS = frozenset({"text", "cdata"})
+
+_WALK, _CAPTURE, _SKIP = range(3)
+
+_ENTITIES = {name.rstrip(";"): char for name, char in html5.items()}
+_DECIMAL_CHARREF = re.compile("^([0-9]+)(.*)")
+_HEX_CHARREF = re.compile("^([0-9a-f]+)(.*)")
+_BODY_TAG = re.compile("<body", re.IGNORECASE)
+
+def _annotation_dict(flags):
+    annotations = dict(zip(_ANNOTATION_NAMES, flags))
+    annotations["color"] = "default"
+    return annotations
+
+_ANNOTATIONS = {}
+for _bits in range(32):
+    _flags = tuple(bool(_bits & (1 << i)) for i in range(5))
+    _ANNOTATIONS[_flags] = _annotation_dict(_flags)
+
+def _text_spans(text, flags):
+    """Rich text spans for already-stripped text, split at Notion's length limit."""
+    annotations = _ANNOTATIONS[flags]
+    return [
+        {
+            "type": "text",
+            "text": {"content": text[i:i + MAX_TEXT_LENGTH]},
+            "annotations": annotations.copy(),
+        }
+        for i in range(0, len(text), MAX_TEXT_LENGTH)
+    ]
+
+def _numeric_charref(name):
+    """Decode `&#...;` the way BeautifulSoup does, returning (character, trailing text)."""
+    base, pattern = 10, _DECIMAL_CHARREF
+    if name[:1] in ("x", "X"):
+        base, pattern, name = 16, _HEX_CHARREF, name[1:]
+
+    try:
+        number, extra = int(name, base), ""
+    except ValueError:
+        match = pattern.search(name)
+        if match is None:
+            return "", name
+        number, extra = int(match.group(1), base), match.group(2)
+
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return "\ufffd", extra
+    if 0x80 <= number <= 0x9F:
+        # Windows-1252 bytes written as character references
+        try:
+            return bytes([number]).decode("cp1252"), extra
+        except UnicodeDecodeError:
+            pass
+    return chr(number), extra
+
+class _Element:
+    """An open tag, mirroring where BeautifulSoup's tree would put it."""
+    __slots__ = ("name", "mode", "container", "kinds", "has_text", "start", "block_type", "rich_text", "flags")
+
+    def __init__(self, name, mode, container):
+        self.name = name
+        self.mode = mode
+        self.container = container  # innermost enclosing string-container tag
+        self.kinds = None           # string kinds counted by get_text(), if this tag is checked for text
+        self.has_text = False
+        self.start = 0
+        self.block_type = None
+        self.rich_text = None
+        self.flags = _NO_ANNOTATIONS
+
+class _BlockParser(HTMLParser):
+    """
+    Builds Notion blocks straight from html.parser events.
+
+    Tags are opened and closed exactly as BeautifulSoup's html.parser tree
+    builder would nest them, so the output matches `html_to_notion_blocks_bs4`
+    without building a tree. Blocks inside a container are emitted as they
+    are parsed and dropped again if the container turns out to have no text.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.blocks = []
+        self._stack = [_Element("[document]", _WALK, None)]
+        self._checked = []   # open elements awaiting the empty-text check
+        self._data = []
+        self._already_closed = []
+
+    # --- Strings ---
+    def _add_string(self, text, kind):
+        text = text.strip()
+        if not text:
+            return
+
+        top = self._stack[-1]
+        if top.mode == _WALK:
+            self.blocks.append({
+                "object": "block",
+                "type": "paragraph",
+                "paragraph": {
+                    "rich_text": _text_spans(text, _NO_ANNOTATIONS)
+                }
+            })
+        elif top.mode == _CAPTURE:
+            top.rich_text.extend(_text_spans(text, top.flags))
+
+        if kind is None:
+            kind = top.container or "text"
+        for element in self._checked:
+            if not element.has_text and kind in element.kinds:
+                element.has_text = True
+
+    def _flush(self):
+        if self._data:
+            text = "".join(self._data)
+            self._data = []
+            self._add_string(text, None)
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_entityref(self, name):
+        self._data.append(_ENTITIES.get(name, "&" + name))
+
+    def handle_charref(self, name):
+        self._data.extend(_numeric_charref(name))
+
+    def handle_comment(self, data):
+        self._flush()
+        self._add_string(data, "comment")
+
+    def handle_decl(self, decl):
+        self._flush()
+        self._add_string(decl[len("DOCTYPE "):], "doctype")
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.upper().startswith("CDATA["):
+            self._add_string(data[len("CDATA["):], "cdata")
+        else:
+            self._add_string(data, "declaration")
+
+    def handle_pi(self, data):
+        self._flush()
+        self._add_string(data, "pi")
+
+    # --- Tags ---
+    def _open(self, tag):
+        self._flush()
+        parent = self._stack[-1]
+        container = tag if tag in STRING_CONTAINER_TAGS else parent.container
+
+        if parent.mode == _CAPTURE:
+            element = _Element(tag, _CAPTURE, container)
+            element.rich_text = parent.rich_text
+            element.flags = parent.flags
+            index = ANNOTATION_TAGS.get(tag)
+            if index is not None and not element.flags[index]:
+                element.flags = element.flags[:index] + (True,) + element.flags[index + 1:]
+
+        elif parent.mode == _SKIP or tag in ("style", "script"):
+            element = _Element(tag, _SKIP, container)
+
+        else:
+            block_type = HEADING_BLOCK_TYPES.get(tag)
+            if tag == "p":
+                block_type = "paragraph"
+            elif tag == "li":
+                block_type = LIST_BLOCK_TYPES.get(parent.name)
+
+            if block_type is not None:
+                element = _Element(tag, _CAPTURE, container)
+                element.block_type = block_type
+                element.rich_text = []
+            elif tag == "li":
+                # List items outside a list are dropped
+                element = _Element(tag, _SKIP, container)
+            else:
+                element = _Element(tag, _WALK, container)
+                element.start = len(self.blocks)
+
+            if element.mode != _SKIP:
+                element.kinds = {tag} if tag in STRING_CONTAINER_TAGS else TEXT_KINDS
+                self._checked.append(element)
+
+        self._stack.append(element)
+
+    def _pop(self):
+        element = self._stack.pop()
+        if element.kinds is None:
+            return
+        self._checked.pop()
+
+        if element.block_type is not None:
+            if element.has_text:
+                self.blocks.append({
+                    "object": "block",
+                    "type": element.block_type,
+                    element.block_type: {
+                        "rich_text": element.rich_text
+                    }
+                })
+        elif not element.has_text:
+            del self.blocks[element.start:]
+
+    def _close(self, tag):
+        """Close the most recent open `tag` and everything opened after it."""
+        self._flush()
+        stack = self._stack
+        for i in range(len(stack) - 1, 0, -1):
+            if stack[i].name == tag:
+                while len(stack) > i:
+                    self._pop()
+                return
+
+    def handle_starttag(self, tag, attrs):
+        self._open(tag)
+        if tag in VOID_TAGS:
+            self._close(tag)
+            self._already_closed.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self._open(tag)
+        self._close(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._already_closed:
+            # Redundant end tag of an empty element, e.g. </br>
+            self._already_closed.remove(tag)
+        else:
+            self._close(tag)
+
+    def finish(self):
+        self.close()
+        self._flush()
+        while len(self._stack) > 1:
+            self._pop()
+        return self.blocks
+
+def html_to_notion_blocks(html_text):
+    """
+    Converts jobDescription HTML into a list of Notion-compatible blocks.
+    Supports: paragraphs, headings, unordered/ordered lists.
+
+    Output is identical to `html_to_notion_blocks_bs4`, produced in a single
+    streaming pass without building a BeautifulSoup tree.
+    """
+    if _BODY_TAG.search(html_text):
+        # Full documents are converted from <body> down, which needs the tree
+        return html_to_notion_blocks_bs4(html_text)
+
+    parser = _BlockParser()
+    try:
+        parser.feed(html_text)
+        return parser.finish()
+    except AssertionError:
+        # Markup html.parser rejects; let BeautifulSoup report it
+        return html_to_notion_blocks_bs4(html_text)
@@ -0,0 +1,320 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta, timezone
+
+__all__ = [
+    "JobStore",
+    "DEFAULT_STORE_PATH"
+]
+
+DEFAULT_STORE_PATH = "state/job_store.sqlite3"
+
+# Listing fields that change without the posting itself changing
+# (e.g. "Posted 3 Days Ago" becomes "Posted 4 Days Ago" overnight).
+VOLATILE_LISTING_FIELDS = {"postedOn"}
+
+# Days a normalized posting date may drift between runs (Workday renders
+# `postedOn` in the tenant's time zone) before the posting counts as reposted
+POSTED_DATE_TOLERANCE = 1
+
+POSTED_DAYS_AGO = re.compile(r"posted\s+(\d+)\s+days?\s+ago", re.IGNORECASE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS postings (
+    institution TEXT NOT NULL,
+    external_path TEXT NOT NULL,
+    req_id TEXT,
+    listing_json TEXT NOT NULL,
+    listing_hash TEXT NOT NULL,
+    detail_json TEXT,
+    detail_listing_hash TEXT,
+    content_hash TEXT,
+    detail_posted_date TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    closed_at TEXT,
+    status TEXT NOT NULL DEFAULT 'open',
+    PRIMARY KEY (institution, external_path)
+);
+CREATE INDEX IF NOT EXISTS idx_postings_req_id ON postings (institution, req_id);
+CREATE TABLE IF NOT EXISTS runs (
+    institution TEXT PRIMARY KEY,
+    listing_total INTEGER NOT NULL,
+    clean INTEGER NOT NULL,
+    finished_at TEXT NOT NULL
+);
+"""
+
+# Columns added after the first release, created on stores that predate them
+ADDED_COLUMNS = {
+    "detail_posted_date": "TEXT",
+    "etag": "TEXT",
+    "last_modified": "TEXT"
+}
+
+
+def _utc_now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def content_hash(data):
+    """Stable SHA-256 of a JSON-serializable value."""
+    encoded = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def normalize_posted_on(posted_on, today=None):
+    """
+    Absolute posting date (ISO) for a relative `postedOn` such as
+    "Posted Today", "Posted Yesterday" or "Posted 3 Days Ago", so the value
+    stays put as the posting ages. Returns None for open-ended or unknown
+    values such as "Posted 30+ Days Ago".
+    """
+    today = today or date.today()
+    text = (posted_on or "").strip().lower()
+    if text == "posted today":
+        return today.isoformat()
+    if text == "posted yesterday":
+        return (today - timedelta(days=1)).isoformat()
+    match = POSTED_DAYS_AGO.fullmatch(text)
+    if match:
+        return (today - timedelta(days=int(match.group(1)))).isoformat()
+    return None
+
+
+def posted_date_unchanged(stored, current):
+    """False only when both posting dates are known and moved beyond the tolerance (a repost)."""
+    if stored is None or current is None:
+        return True
+    delta = date.fromisoformat(current) - date.fromisoformat(stored)
+    return abs(delta.days) <= POSTED_DATE_TOLERANCE
+
+
+def listing_hash(listing):
+    """Hash of a listing entry, ignoring fields that drift between runs."""
+    return content_hash({k: v for k, v in listing.items() if k not in VOLATILE_LISTING_FIELDS})
+
+
+class JobStore:
+    """
+    Local SQLite store of every posting seen per institution.
+
+    Rows are keyed by (institution, externalPath) and keep the listing entry,
+    the `jobPostingInfo` detail payload, a content hash of the detail and the
+    first-seen/last-seen timestamps. A stored detail is only reused while the
+    listing it was fetched for is unchanged and its normalized `postedOn`
+    date has not moved, so repeat runs fetch details for new, changed or
+    reposted postings only. The `ETag`/`Last-Modified` validators of each
+    detail response are kept so those fetches can be conditional.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(postings)")}
+            for name, column_type in ADDED_COLUMNS.items():
+                if name not in columns:
+                    self._conn.execute(f"ALTER TABLE postings ADD COLUMN {name} {column_type}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def sync_listings(self, institution, listings, close_missing=True):
+        """
+        Record the listing entries seen in this run.
+
+        New postings are inserted, known ones get their `last_seen` bumped (and
+        are reopened if they had been closed), and when `close_missing` is set,
+        open postings absent from `listings` are marked closed. Pass
+        `close_missing=False` when pagination did not complete.
+
+        Returns:
+            dict: externalPath -> stored detail payload, for postings whose
+            listing and posting date are unchanged since their detail was fetched.
+        """
+        now = _utc_now()
+        today = date.today()
+        reusable = {}
+
+        with self._lock, self._conn:
+            stored = {
+                row["external_path"]: row
+                for row in self._conn.execute(
+                    "SELECT external_path, detail_json, detail_listing_hash, detail_posted_date "
+                    "FROM postings WHERE institution = ?",
+                    (institution,)
+                )
+            }
+
+            for listing in listings:
+                path = listing["externalPath"]
+                new_hash = listing_hash(listing)
+                row = stored.get(path)
+
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO postings (institution, external_path, listing_json, listing_hash, "
+                        "first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?)",
+                        (institution, path, json.dumps(listing), new_hash, now, now)
+                    )
+                    stored[path] = {"detail_json": None, "detail_listing_hash": None, "detail_posted_date": None}
+                    continue
+
+                self._conn.execute(
+                    "UPDATE postings SET listing_json = ?, listing_hash = ?, last_seen = ?, "
+                    "status = 'open', closed_at = NULL WHERE institution = ? AND external_path = ?",
+                    (json.dumps(listing), new_hash, now, institution, path)
+                )
+                if (
+                    row["detail_json"] and row["detail_listing_hash"] == new_hash
+                    and posted_date_unchanged(
+                        row["detail_posted_date"], normalize_posted_on(listing.get("postedOn"), today)
+                    )
+                ):
+                    reusable[path] = json.loads(row["detail_json"])
+
+            if close_missing:
+                seen = {listing["externalPath"] for listing in listings}
+                closed = 0
+                for path in stored.keys() - seen:
+                    closed += self._conn.execute(
+                        "UPDATE postings SET status = 'closed', closed_at = ? "
+                        "WHERE institution = ? AND external_path = ? AND status = 'open'",
+                        (now, institution, path)
+                    ).rowcount
+                if closed:
+                    logging.info(f"[{institution}] Marked {closed} vanished postings as closed.")
+
+        return reusable
+
+    def stored_detail(self, institution, listing):
+        """
+        The previously fetched detail of a posting and its response validators.
+
+        Returns:
+            tuple: (detail payload, ETag, Last-Modified), or None if no detail is stored.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT detail_json, etag, last_modified FROM postings WHERE institution = ? AND external_path = ?",
+                (institution, listing["externalPath"])
+            ).fetchone()
+        if row is None or not row["detail_json"]:
+            return None
+        return json.loads(row["detail_json"]), row["etag"], row["last_modified"]
+
+    def iter_open_postings(self, institution, batch_size=500):
+        """
+        Every open posting of an institution, `batch_size` rows at a time.
+
+        Yields:
+            tuple: (listing entry, stored detail payload or None)
+        """
+        after = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT external_path, listing_json, detail_json FROM postings "
+                    "WHERE institution = ? AND status = 'open' AND external_path > ? "
+                    "ORDER BY external_path LIMIT ?",
+                    (institution, after, batch_size)
+                ).fetchall()
+            for row in rows:
+                detail = json.loads(row["detail_json"]) if row["detail_json"] else None
+                yield json.loads(row["listing_json"]), detail
+            if len(rows) < batch_size:
+                return
+            after = rows[-1]["external_path"]
+
+    def save_detail(self, institution, listing, detail, etag=None, last_modified=None):
+        """
+        Store the detail payload fetched (or revalidated) for a listing entry,
+        along with the response's `ETag`/`Last-Modified` validators.
+
+        Returns:
+            bool: True if the detail content differs from what was stored before.
+        """
+        new_hash = content_hash(detail)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT content_hash FROM postings WHERE institution = ? AND external_path = ?",
+                (institution, listing["externalPath"])
+            ).fetchone()
+            self._conn.execute(
+                "UPDATE postings SET detail_json = ?, detail_listing_hash = ?, content_hash = ?, req_id = ?, "
+                "detail_posted_date = ?, etag = ?, last_modified = ? "
+                "WHERE institution = ? AND external_path = ?",
+                (
+                    json.dumps(detail), listing_hash(listing), new_hash,
+                    (detail.get("jobReqId") or "").strip() or None,
+                    normalize_posted_on(listing.get("postedOn")), etag, last_modified,
+                    institution, listing["externalPath"]
+                )
+            )
+        return row is None or row["content_hash"] != new_hash
+
+    def record_run(self, institution, listing_total, clean):
+        """
+        Note how an institution's run ended: the number of listings seen, and
+        whether pagination completed and every upload succeeded.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs (institution, listing_total, clean, finished_at) VALUES (?, ?, ?, ?)",
+                (institution, listing_total, int(clean), _utc_now())
+            )
+
+    def first_page_unchanged(self, institution, listings, total):
+        """
+        True if a run can stop after the first listing page: the last run was
+        clean and saw `total` listings, and every listing on the page is
+        stored, open, unchanged and not reposted.
+        """
+        today = date.today()
+        with self._lock:
+            run = self._conn.execute(
+                "SELECT listing_total, clean FROM runs WHERE institution = ?", (institution,)
+            ).fetchone()
+            if run is None or not run["clean"] or run["listing_total"] != total:
+                return False
+            for listing in listings:
+                row = self._conn.execute(
+                    "SELECT listing_hash, detail_posted_date, status FROM postings "
+                    "WHERE institution = ? AND external_path = ?",
+                    (institution, listing["externalPath"])
+                ).fetchone()
+                if (
+                    row is None or row["status"] != "open" or row["listing_hash"] != listing_hash(listing)
+                    or not posted_date_unchanged(
+                        row["detail_posted_date"], normalize_posted_on(listing.get("postedOn"), today)
+                    )
+                ):
+                    return False
+        return True
+
+    def count(self, institution, status="open"):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM postings WHERE institution = ? AND status = ?",
+                (institution, status)
+            ).fetchone()[0]
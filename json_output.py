@@ -0,0 +1,154 @@
+import gzip
+import io
+import json
+import os
+
+__all__ = [
+    "OUTPUT_FORMATS",
+    "output_path",
+    "open_posting_writer",
+    "iter_postings"
+]
+
+OUTPUT_DIR = "json_output"
+
+# format -> file extension. "json" is the original pretty-printed array.
+OUTPUT_FORMATS = {
+    "json": ".json",
+    "jsonl": ".jsonl",
+    "jsonl.gz": ".jsonl.gz",
+    "jsonl.zst": ".jsonl.zst"
+}
+
+INDENT = " " * 4
+READ_CHUNK_SIZE = 1 << 16
+
+
+def _require_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("The jsonl.zst output format requires the `zstandard` package.") from None
+    return zstandard
+
+
+def output_path(institution_name, fmt="json", output_dir=OUTPUT_DIR):
+    """Output file for an institution, e.g. `json_output/workday_response_MandT_Bank.jsonl.gz`."""
+    safe_name = institution_name.replace(" ", "_").replace("&", "and")
+    return os.path.join(output_dir, f"workday_response_{safe_name}{OUTPUT_FORMATS[fmt]}")
+
+
+def _open_binary(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode)
+    if path.endswith(".zst"):
+        zstandard = _require_zstandard()
+        return zstandard.open(path, mode)
+    return open(path, mode)
+
+
+class PostingWriter:
+    """
+    Writes postings to disk one at a time as they arrive.
+
+    The "json" format streams a pretty-printed array byte-for-byte identical
+    to `json.dump(postings, f, indent=4)`; the JSON Lines formats write one
+    compact posting per line. Each posting is flushed as soon as it is
+    written, so a crash keeps everything collected up to that point.
+    """
+
+    def __init__(self, path, fmt="json"):
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{fmt}'. Choose from: {', '.join(OUTPUT_FORMATS)}")
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.fmt = fmt
+        self.count = 0
+        self._file = io.TextIOWrapper(_open_binary(path, "wb"), encoding="utf-8", newline="\n")
+
+    def write(self, posting):
+        if self.fmt == "json":
+            body = json.dumps(posting, indent=4).replace("\n", "\n" + INDENT)
+            self._file.write(("[\n" if self.count == 0 else ",\n") + INDENT + body)
+        else:
+            self._file.write(json.dumps(posting, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.count += 1
+        self._file.flush()
+
+    def close(self):
+        if self.fmt == "json":
+            self._file.write("\n]" if self.count else "[]")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_posting_writer(path, fmt="json"):
+    return PostingWriter(path, fmt)
+
+
+def _iter_json_array(text_file):
+    """Lazily decode the objects of a JSON array, tolerating a truncated file."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    eof = False
+
+    while True:
+        buffer = buffer.lstrip()
+        if not started and buffer:
+            if buffer[0] != "[":
+                raise ValueError("Expected a JSON array")
+            buffer = buffer[1:]
+            started = True
+            continue
+        if started and buffer[:1] in (",", "]"):
+            if buffer[0] == "]":
+                return
+            buffer = buffer[1:]
+            continue
+        if started and buffer:
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    return  # Truncated by an interrupted run
+            else:
+                yield item
+                buffer = buffer[end:]
+                continue
+        if eof:
+            return
+        chunk = text_file.read(READ_CHUNK_SIZE)
+        eof = not chunk
+        buffer += chunk
+
+
+def iter_postings(path):
+    """
+    Lazily iterate the postings in an output file of any supported format.
+
+    The format is inferred from the extension. Files cut short by a crash
+    yield every complete posting they contain.
+    """
+    with io.TextIOWrapper(_open_binary(path, "rb"), encoding="utf-8") as f:
+        try:
+            if path.endswith(".json"):
+                yield from _iter_json_array(f)
+                return
+
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    return  # Truncated final line
+        except EOFError:
+            return  # Compressed stream cut short by an interrupted run
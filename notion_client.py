@@ -1,15 +1,25 @@
-import time
 from datetime import datetime
+import hashlib
+import json
 import os
 from dotenv import load_dotenv
 import job_parser as jp
+import compensation
 import re
 import logging
 import requests
+import http_client
+import notion_scheduler
+from notion_scheduler import PRIORITY_APPEND, PRIORITY_CREATE, PRIORITY_QUERY, PRIORITY_UPDATE
 
 __all__ = [
     "create_notion_payload",
+    "create_page",
+    "update_page",
+    "append_blocks",
+    "replace_page_blocks",
     "fetch_existing_req_ids",
+    "fetch_existing_job_keys",
     "append_job_description_to_page"
 ]
 
@@ -22,7 +32,20 @@ NOTION_TOKEN = os.getenv("NOTION_TOKEN")
 DATABASE_ID = os.getenv("DATABASE_ID")
 APPLIED_DATABASE_ID = os.getenv("APPLIED_DATABASE_ID")
 
-NOTION_API_URL = "https://api.notion.com/v1/pages"
+# Override to point at a stand-in server (see benchmarks/stub_server.py)
+NOTION_API_BASE = os.getenv("NOTION_API_BASE", "https://api.notion.com/v1").rstrip("/")
+NOTION_API_URL = f"{NOTION_API_BASE}/pages"
+
+# Pace Notion at its documented rate wherever it is served from, one
+# priority-ordered budget for every caller in the process
+http_client.configure_host_bucket(NOTION_API_BASE, notion_scheduler.get_scheduler())
+
+# Notion accepts at most 100 blocks per `children` array (page create or append)
+MAX_CHILDREN = 100
+# Page properties filled from the scraped posting, which sync mode keeps up to
+# date. Company and Req ID identify the page, and Stage belongs to the user.
+SYNCED_PROPERTIES = ("Position", "Job Posting URL", "Base Pay Low", "Base Pay High", "Application Deadline")
+
 NOTION_HEADERS = {
     "Authorization": f"Bearer {NOTION_TOKEN}",
     "Content-Type": "application/json",
@@ -31,8 +54,20 @@ NOTION_HEADERS = {
 
 # --- Notion Functions ---
 def extract_salary_range(description):
+    """
+    Extracts the salary range (low, high) as annualized floats from
+    jobDescription HTML. See `compensation.extract_compensation` for the
+    formats recognized.
+    """
+    return compensation.extract_salary_range(description)
+
+def extract_dollar_range(description):
     """
     Extracts salary range (low, high) as floats from jobDescription HTML text.
+
+    The original extractor: only `$low - $high` in the raw HTML, with no
+    period normalization. Kept as the baseline for
+    `benchmarks/bench_compensation.py`.
     """
     match = re.search(r"\$([\d,]+(?:\.\d{2})?)\s*-\s*\$([\d,]+(?:\.\d{2})?)", description)
     if match:
@@ -49,10 +84,16 @@ def extract_salary_range(description):
         logging.debug("Salary pattern not found in job description.")
         return None, None
 
-def create_notion_payload(job, company_name):
+def create_notion_payload(job, company_name, children=None, salary_range=None):
+    """
+    Builds the page-create payload for a job. `children` (at most
+    `MAX_CHILDREN` blocks) are sent inline as the page body. Pass
+    `salary_range` as (low, high) if it was already extracted.
+    """
     # Extract salary
-    description = job.get("jobDescription", "")
-    base_pay_low, base_pay_high = extract_salary_range(description)
+    if salary_range is None:
+        salary_range = extract_salary_range(job.get("jobDescription", ""))
+    base_pay_low, base_pay_high = salary_range
 
     # TEMP debug output
     logging.debug(f"Extracted base pay: Low = {base_pay_low}, High = {base_pay_high}")
@@ -99,77 +140,273 @@ def create_notion_payload(job, company_name):
         }
     }
 
+    if children:
+        NOTION_PAYLOAD["children"] = children
+
     return NOTION_PAYLOAD
 
-def fetch_existing_req_ids(database_id, company_filter=None):
+def create_page(payload):
+    """Creates a Notion page. Returns the raw response."""
+    # Not retried once Notion may have created the page, which would duplicate it
+    return http_client.post(
+        NOTION_API_URL, headers=NOTION_HEADERS, json=payload, priority=PRIORITY_CREATE, idempotent=False
+    )
+
+def update_page(page_id, properties=None, archived=None):
+    """Updates a page's properties and/or archives it. Returns the raw response."""
+    payload = {}
+    if properties:
+        payload["properties"] = properties
+    if archived is not None:
+        payload["archived"] = archived
+    return http_client.patch(
+        f"{NOTION_API_BASE}/pages/{page_id}", headers=NOTION_HEADERS, json=payload, priority=PRIORITY_UPDATE
+    )
+
+def build_query_filter(company_filter=None, edited_since=None, req_id=None):
     """
-    Fetches all Req IDs from the given Notion database.
-    Optionally filters by Company name if `company_filter` is provided.
+    Builds a database query filter on Company name, `last_edited_time` and/or Req ID.
+    Returns None when no filtering is requested.
+    """
+    filters = []
+    if req_id:
+        filters.append({
+            "property": "Req ID",
+            "rich_text": {
+                "equals": req_id
+            }
+        })
+    if company_filter:
+        filters.append({
+            "property": "Company",
+            "rich_text": {
+                "equals": company_filter
+            }
+        })
+    if edited_since:
+        filters.append({
+            "timestamp": "last_edited_time",
+            "last_edited_time": {
+                "on_or_after": edited_since
+            }
+        })
 
-    Raises:
-        ValueError if filtering is required but not supplied.
+    if not filters:
+        return None
+    if len(filters) == 1:
+        return filters[0]
+    return {"and": filters}
+
+def query_database(database_id, company_filter=None, edited_since=None, strict=False, req_id=None):
     """
-    if database_id == APPLIED_DATABASE_ID and not company_filter:
-        raise ValueError("Company filter must be provided when querying APPLIED_DATABASE_ID")
+    Yields every page of the given Notion database, following pagination cursors.
+    Optionally filters by Company name if `company_filter` is provided, and by
+    pages edited on or after the ISO timestamp `edited_since`, and by `req_id`.
 
-    existing_ids = set()
+    A failed query is logged and ends the iteration early, unless `strict` is
+    set, in which case `requests.HTTPError` is raised so callers never mistake
+    a partial result for the full database.
+    """
     has_more = True
     next_cursor = None
+    query_filter = build_query_filter(company_filter, edited_since, req_id)
 
     while has_more:
         payload = {"page_size": 100}
         if next_cursor:
             payload["start_cursor"] = next_cursor
 
-        if company_filter:
-            payload["filter"] = {
-                "property": "Company",
-                "rich_text": {
-                    "equals": company_filter
-                }
-            }
+        if query_filter:
+            payload["filter"] = query_filter
 
-        response = requests.post(
-            f"https://api.notion.com/v1/databases/{database_id}/query",
+        response = http_client.post(
+            f"{NOTION_API_BASE}/databases/{database_id}/query",
             headers=NOTION_HEADERS,
-            json=payload
+            json=payload,
+            priority=PRIORITY_QUERY
         )
 
         if response.status_code != 200:
             logging.error(f"Failed to query Notion database {database_id}: {response.text}")
+            if strict:
+                response.raise_for_status()
+                raise requests.HTTPError(f"Unexpected status {response.status_code}", response=response)
             break
 
         data = response.json()
-        for result in data.get("results", []):
-            props = result.get("properties", {})
-            req_id_obj = props.get("Req ID", {}).get("rich_text", [])
-            if req_id_obj:
-                req_id = req_id_obj[0].get("text", {}).get("content", "").strip()
-                if req_id:
-                    existing_ids.add(req_id)
+        yield from data.get("results", [])
 
         has_more = data.get("has_more", False)
         next_cursor = data.get("next_cursor")
 
-    return existing_ids
+def get_req_id(page):
+    """Returns the stripped Req ID of a Notion page, or an empty string."""
+    req_id_obj = page.get("properties", {}).get("Req ID", {}).get("rich_text", [])
+    if req_id_obj:
+        return req_id_obj[0].get("text", {}).get("content", "").strip()
+    return ""
 
-def append_job_description_to_page(page_id, html_description):
-    blocks = jp.html_to_notion_blocks(html_description)
+def get_job_url(page):
+    """Returns the Job Posting URL of a Notion page, or an empty string."""
+    return (page.get("properties", {}).get("Job Posting URL", {}).get("url") or "").strip()
+
+def property_value(prop):
+    """
+    Comparable plain value of a page property, whether it comes from a page
+    read from Notion or from a payload built by `create_notion_payload`.
+    """
+    if "title" in prop or "rich_text" in prop:
+        spans = prop.get("title") or prop.get("rich_text") or []
+        return "".join(span.get("plain_text") or span.get("text", {}).get("content", "") for span in spans)
+    if "number" in prop:
+        number = prop["number"]
+        return float(number) if number is not None else None
+    if "url" in prop:
+        return prop["url"] or None
+    if "date" in prop:
+        return (prop["date"] or {}).get("start")
+    if "status" in prop:
+        return (prop["status"] or {}).get("name")
+    return None
+
+def property_hashes(properties, names=SYNCED_PROPERTIES):
+    """Short content hash of each named property's value."""
+    return {
+        name: hashlib.sha256(json.dumps(property_value(properties[name])).encode("utf-8")).hexdigest()[:16]
+        for name in names if name in properties
+    }
+
+def get_stage(page):
+    """Returns the Stage status name of a Notion page, or None."""
+    status = page.get("properties", {}).get("Stage", {}).get("status") or {}
+    return status.get("name")
+
+def get_company(page):
+    """Returns the Company of a Notion page, whether stored as a title or rich text."""
+    company_prop = page.get("properties", {}).get("Company", {})
+    spans = company_prop.get("title") or company_prop.get("rich_text") or []
+    return "".join(
+        span.get("plain_text") or span.get("text", {}).get("content", "")
+        for span in spans
+    ).strip()
 
-    max_batch_size = 100
-    for i in range(0, len(blocks), max_batch_size):
-        chunk = blocks[i:i + max_batch_size]
+def _check_company_filter(database_id, company_filter):
+    if database_id == APPLIED_DATABASE_ID and not company_filter:
+        raise ValueError("Company filter must be provided when querying APPLIED_DATABASE_ID")
 
-        response = requests.patch(
-            f"https://api.notion.com/v1/blocks/{page_id}/children",
+def fetch_existing_req_ids(database_id, company_filter=None):
+    """
+    Fetches all Req IDs from the given Notion database.
+    Optionally filters by Company name if `company_filter` is provided.
+
+    Raises:
+        ValueError if filtering is required but not supplied.
+    """
+    req_ids, _ = fetch_existing_job_keys(database_id, company_filter)
+    return req_ids
+
+def fetch_existing_job_keys(database_id, company_filter=None):
+    """
+    Fetches all Req IDs and Job Posting URLs from the given Notion database.
+    Optionally filters by Company name if `company_filter` is provided.
+
+    Returns:
+        tuple: (set of Req IDs, set of Job Posting URLs)
+
+    Raises:
+        ValueError if filtering is required but not supplied.
+    """
+    _check_company_filter(database_id, company_filter)
+
+    existing_ids = set()
+    existing_urls = set()
+
+    for page in query_database(database_id, company_filter):
+        req_id = get_req_id(page)
+        if req_id:
+            existing_ids.add(req_id)
+        job_url = get_job_url(page)
+        if job_url:
+            existing_urls.add(job_url)
+
+    return existing_ids, existing_urls
+
+def find_page_id(database_id, req_id, company_filter=None):
+    """
+    Returns the ID of the page with the given Req ID (and Company), or None.
+
+    Raises:
+        requests.HTTPError: If the query fails, so a failed lookup is never taken for a missing page.
+    """
+    for page in query_database(database_id, company_filter, strict=True, req_id=req_id):
+        if get_req_id(page) == req_id:
+            return page["id"]
+    return None
+
+def append_blocks(page_id, blocks):
+    """
+    Appends blocks to a page in chunks of `MAX_CHILDREN`.
+
+    Returns:
+        list: The blocks that could not be appended (empty on success).
+    """
+    for i in range(0, len(blocks), MAX_CHILDREN):
+        chunk = blocks[i:i + MAX_CHILDREN]
+
+        response = http_client.patch(
+            f"{NOTION_API_BASE}/blocks/{page_id}/children",
             headers=NOTION_HEADERS,
-            json={"children": chunk}
+            json={"children": chunk},
+            priority=PRIORITY_APPEND,
+            idempotent=False
         )
 
         if response.status_code == 200:
             logging.info(f"Appended block chunk to page {page_id} ({i + len(chunk)}/{len(blocks)})")
         else:
             logging.error(f"Failed to append chunk to page {page_id}: {response.status_code} — {response.text}")
-            break
+            return blocks[i:]
+
+    return []
+
+def list_block_ids(page_id):
+    """
+    Returns the IDs of a page's top-level blocks, following pagination cursors.
+
+    Raises:
+        requests.HTTPError if a request fails.
+    """
+    block_ids = []
+    next_cursor = None
+    while True:
+        url = f"{NOTION_API_BASE}/blocks/{page_id}/children?page_size=100"
+        if next_cursor:
+            url += f"&start_cursor={next_cursor}"
+        response = http_client.get(url, headers=NOTION_HEADERS, priority=PRIORITY_APPEND)
+        response.raise_for_status()
+        data = response.json()
+        block_ids.extend(block["id"] for block in data.get("results", []))
+        if not data.get("has_more"):
+            return block_ids
+        next_cursor = data.get("next_cursor")
+
+def replace_page_blocks(page_id, blocks):
+    """
+    Replaces a page's body: deletes its top-level blocks, then appends `blocks`.
+
+    Returns:
+        list: The blocks that could not be appended (empty on success).
 
-        time.sleep(0.2)  # Polite batching
+    Raises:
+        requests.HTTPError if the existing blocks could not be listed or deleted.
+    """
+    for block_id in list_block_ids(page_id):
+        response = http_client.delete(
+            f"{NOTION_API_BASE}/blocks/{block_id}", headers=NOTION_HEADERS, priority=PRIORITY_APPEND
+        )
+        response.raise_for_status()
+    return append_blocks(page_id, blocks)
+
+def append_job_description_to_page(page_id, html_description):
+    blocks = jp.html_to_notion_blocks(html_description)
+    return append_blocks(page_id, blocks)
@@ -0,0 +1,251 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+import notion_client as nc
+
+__all__ = [
+    "NotionIndex",
+    "DEFAULT_INDEX_PATH"
+]
+
+DEFAULT_INDEX_PATH = "state/notion_index.sqlite3"
+
+# Incremental refreshes cannot see deleted or archived pages, so the index is
+# rebuilt from a full scan once it is older than this.
+FULL_REFRESH_INTERVAL = timedelta(hours=24)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    page_id TEXT PRIMARY KEY,
+    database_id TEXT NOT NULL,
+    req_id TEXT,
+    company TEXT,
+    job_url TEXT,
+    last_edited_time TEXT,
+    stage TEXT,
+    property_hashes TEXT,
+    description_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pages_company ON pages (company);
+CREATE TABLE IF NOT EXISTS sync_state (
+    database_id TEXT PRIMARY KEY,
+    edited_cursor TEXT,
+    full_synced_at TEXT NOT NULL
+);
+"""
+
+
+# Columns added after the first release, created on indexes that predate them
+ADDED_COLUMNS = {
+    "stage": "TEXT",
+    "property_hashes": "TEXT",
+    "description_hash": "TEXT"
+}
+
+UPSERT_PAGE = """
+INSERT INTO pages (page_id, database_id, req_id, company, job_url, last_edited_time, stage, property_hashes)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (page_id) DO UPDATE SET
+    database_id = excluded.database_id, req_id = excluded.req_id, company = excluded.company,
+    job_url = excluded.job_url, last_edited_time = excluded.last_edited_time,
+    stage = excluded.stage, property_hashes = excluded.property_hashes
+"""
+
+
+def _utc_now():
+    return datetime.now(timezone.utc)
+
+
+class NotionIndex:
+    """
+    On-disk index of the pages in the Notion job databases.
+
+    Maps Req ID to Notion page ID, company and Job Posting URL. Each database
+    is refreshed once per run, either by one bulk query or incrementally via a
+    `last_edited_time` filter, and the index is then shared by every
+    institution instead of re-querying Notion per company.
+
+    For sync mode it also keeps each page's Stage, a hash of each synced
+    property as last read from Notion, and the hash of the description the
+    page body was written from (which Notion queries don't return).
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(pages)")}
+            for name, column_type in ADDED_COLUMNS.items():
+                if name not in columns:
+                    self._conn.execute(f"ALTER TABLE pages ADD COLUMN {name} {column_type}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _sync_state(self, database_id):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT edited_cursor, full_synced_at FROM sync_state WHERE database_id = ?",
+                (database_id,)
+            ).fetchone()
+
+    def refresh(self, database_id, full=False):
+        """
+        Bring the index up to date for one database.
+
+        A full scan replaces every row for the database; otherwise only pages
+        edited since the last refresh are queried and upserted.
+
+        Returns:
+            int: Number of pages read from Notion.
+        """
+        state = self._sync_state(database_id)
+        if state is not None and not full:
+            full_synced_at = datetime.fromisoformat(state["full_synced_at"])
+            full = _utc_now() - full_synced_at > FULL_REFRESH_INTERVAL
+
+        started_at = _utc_now()
+        edited_since = None if full or state is None else state["edited_cursor"]
+        pages = list(nc.query_database(database_id, edited_since=edited_since, strict=True))
+
+        cursor = state["edited_cursor"] if state is not None and not full else None
+        for page in pages:
+            edited = page.get("last_edited_time")
+            if edited and (cursor is None or edited > cursor):
+                cursor = edited
+
+        with self._lock, self._conn:
+            if edited_since is None:
+                # Keep rows of pages that still exist, so their description hashes survive
+                seen = {page["id"] for page in pages}
+                stale = [
+                    (row["page_id"],)
+                    for row in self._conn.execute("SELECT page_id FROM pages WHERE database_id = ?", (database_id,))
+                    if row["page_id"] not in seen
+                ]
+                self._conn.executemany("DELETE FROM pages WHERE page_id = ?", stale)
+            self._conn.executemany(
+                UPSERT_PAGE,
+                [
+                    (
+                        page["id"], database_id, nc.get_req_id(page) or None,
+                        nc.get_company(page), nc.get_job_url(page) or None,
+                        page.get("last_edited_time"), nc.get_stage(page),
+                        json.dumps(nc.property_hashes(page.get("properties", {})))
+                    )
+                    for page in pages
+                ]
+            )
+            full_synced_at = started_at.isoformat() if edited_since is None else state["full_synced_at"]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (database_id, edited_cursor, full_synced_at) VALUES (?, ?, ?)",
+                (database_id, cursor or started_at.isoformat(timespec="seconds"), full_synced_at)
+            )
+
+        mode = "incremental" if edited_since else "full"
+        logging.info(f"Notion index {mode} refresh of {database_id}: {len(pages)} pages read.")
+        return len(pages)
+
+    def refresh_all(self, full=False):
+        """Refresh both job databases once for the whole run."""
+        for database_id in (nc.DATABASE_ID, nc.APPLIED_DATABASE_ID):
+            if database_id:
+                self.refresh(database_id, full=full)
+
+    def add_page(self, database_id, page_id, req_id, company, job_url=None, stage=None, properties=None,
+                 description_hash=None):
+        """
+        Record a page created during this run so the index stays current.
+        `properties` are the page's payload properties, hashed for sync mode.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (page_id, database_id, req_id, company, job_url, last_edited_time, "
+                "stage, property_hashes, description_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    page_id, database_id, req_id or None, company, job_url or None, None, stage,
+                    json.dumps(nc.property_hashes(properties)) if properties else None, description_hash
+                )
+            )
+
+    def update_page(self, page_id, property_hashes=None, description_hash=None, stage=None):
+        """Record what sync mode wrote to a page; only the given fields change."""
+        with self._lock, self._conn:
+            if property_hashes is not None:
+                row = self._conn.execute("SELECT property_hashes FROM pages WHERE page_id = ?", (page_id,)).fetchone()
+                merged = json.loads(row["property_hashes"] or "{}") if row else {}
+                merged.update(property_hashes)
+                self._conn.execute(
+                    "UPDATE pages SET property_hashes = ? WHERE page_id = ?", (json.dumps(merged), page_id)
+                )
+            if description_hash is not None:
+                self._conn.execute(
+                    "UPDATE pages SET description_hash = ? WHERE page_id = ?", (description_hash, page_id)
+                )
+            if stage is not None:
+                self._conn.execute("UPDATE pages SET stage = ? WHERE page_id = ?", (stage, page_id))
+
+    def remove_page(self, page_id):
+        """Forget a page, e.g. after archiving it."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages WHERE page_id = ?", (page_id,))
+
+    def company_pages(self, database_id, company):
+        """
+        Every indexed page of a company in one database.
+
+        Returns:
+            list: dicts of page_id, req_id, job_url, stage, property_hashes (dict)
+            and description_hash.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page_id, req_id, job_url, stage, property_hashes, description_hash "
+                "FROM pages WHERE database_id = ? AND company = ?",
+                (database_id, company)
+            ).fetchall()
+        return [
+            dict(row, property_hashes=json.loads(row["property_hashes"]) if row["property_hashes"] else None)
+            for row in rows
+        ]
+
+    def existing_job_keys(self, company):
+        """
+        Req IDs and Job Posting URLs indexed for a company, across all databases.
+
+        Returns:
+            tuple: (set of Req IDs, set of Job Posting URLs)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT req_id, job_url FROM pages WHERE company = ?",
+                (company,)
+            ).fetchall()
+        req_ids = {row["req_id"] for row in rows if row["req_id"]}
+        job_urls = {row["job_url"] for row in rows if row["job_url"]}
+        return req_ids, job_urls
+
+    def page_id_for(self, req_id, company):
+        """Returns the Notion page ID for a Req ID, or None if it is not indexed."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_id FROM pages WHERE req_id = ? AND company = ? LIMIT 1",
+                (req_id, company)
+            ).fetchone()
+        return row["page_id"] if row else None
@@ -0,0 +1,186 @@
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+from http_client import NOTION_RATE, TokenBucket
+
+__all__ = [
+    "NotionScheduler",
+    "SharedBudget",
+    "get_scheduler",
+    "configure_budget",
+    "get_stats",
+    "format_stats",
+    "PRIORITY_QUERY",
+    "PRIORITY_CREATE",
+    "PRIORITY_UPDATE",
+    "PRIORITY_APPEND"
+]
+
+# Lower goes first. Req ID queries gate everything after them, new pages
+# come before keeping existing ones up to date, and description bodies
+# (appends, and the block reads/deletes that precede a body rewrite) go last.
+PRIORITY_QUERY = 0
+PRIORITY_CREATE = 1
+PRIORITY_UPDATE = 2
+PRIORITY_APPEND = 3
+PRIORITY_NAMES = {PRIORITY_QUERY: "query", PRIORITY_CREATE: "create", PRIORITY_UPDATE: "update",
+                  PRIORITY_APPEND: "append"}
+
+# Notion calls that don't say what they are for
+DEFAULT_PRIORITY = PRIORITY_UPDATE
+
+BUDGET_SCHEMA = """
+CREATE TABLE IF NOT EXISTS budget (
+    name TEXT PRIMARY KEY,
+    next_slot REAL NOT NULL
+);
+"""
+
+
+class SharedBudget:
+    """
+    Request slots shared by every process using the same SQLite file, e.g.
+    queue workers on one machine. Slots are handed out one interval apart
+    across all processes, and a pause after a 429 holds every process back.
+    """
+
+    def __init__(self, path, name="notion"):
+        self.path = path
+        self.name = name
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit mode, so each claim takes the write lock up front with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.executescript(BUDGET_SCHEMA)
+        self._conn.execute("INSERT OR IGNORE INTO budget (name, next_slot) VALUES (?, 0)", (name,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _advance(self, slot_for):
+        """Move the next slot to `slot_for(next_slot)`; returns the old and new values."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                (next_slot,) = self._conn.execute(
+                    "SELECT next_slot FROM budget WHERE name = ?", (self.name,)
+                ).fetchone()
+                new_slot = slot_for(next_slot)
+                self._conn.execute("UPDATE budget SET next_slot = ? WHERE name = ?", (new_slot, self.name))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return next_slot, new_slot
+
+    def claim(self, interval):
+        """Reserve the next free slot. Returns the wall-clock time it starts."""
+        now = time.time()
+        next_slot, _ = self._advance(lambda next_slot: max(now, next_slot) + interval)
+        return max(now, next_slot)
+
+    def pause(self, delay):
+        """Hold back every process's next request for `delay` seconds."""
+        until = time.time() + delay
+        self._advance(lambda next_slot: max(next_slot, until))
+
+
+class NotionScheduler(TokenBucket):
+    """
+    The token bucket every Notion call waits on, handing out tokens in
+    priority order: while a query waits, no upload or append is let ahead
+    of it. Callers at the same priority go first come, first served.
+
+    With a `SharedBudget`, each token also claims a slot in the shared
+    budget, so several processes together stay within one rate.
+    """
+
+    def __init__(self, rate=NOTION_RATE, capacity=None):
+        super().__init__(rate, capacity)
+        self.budget = None
+        self._turn = threading.Condition()
+        self._waiting = []  # heap of (priority, ticket)
+        self._tickets = itertools.count()
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def share_budget(self, budget):
+        """Also pace against a `SharedBudget`, or stop doing so with None."""
+        self.budget = budget
+
+    def acquire(self, priority=None):
+        """Block until a request at `priority` may be sent. Returns the seconds spent waiting."""
+        priority = DEFAULT_PRIORITY if priority is None else priority
+        entry = (priority, next(self._tickets))
+        start = time.monotonic()
+        with self._turn:
+            heapq.heappush(self._waiting, entry)
+            while self._waiting[0] != entry:
+                self._turn.wait()
+        try:
+            super().acquire()
+            budget = self.budget
+            if budget is not None:
+                delay = budget.claim(1 / self.rate) - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+        finally:
+            with self._turn:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._turn.notify_all()
+
+        waited = time.monotonic() - start
+        with self._stats_lock:
+            counters = self._stats.setdefault(priority, {"requests": 0, "wait": 0.0})
+            counters["requests"] += 1
+            counters["wait"] += waited
+        return waited
+
+    def throttle(self, delay):
+        super().throttle(delay)
+        budget = self.budget
+        if budget is not None:
+            budget.pause(delay)
+
+    def get_stats(self):
+        with self._stats_lock:
+            return {PRIORITY_NAMES.get(p, str(p)): dict(c) for p, c in sorted(self._stats.items())}
+
+
+_scheduler = NotionScheduler()
+
+
+def get_scheduler():
+    """The scheduler pacing this process's Notion calls."""
+    return _scheduler
+
+
+def configure_budget(path=None):
+    """
+    Share the Notion request budget with other processes through the SQLite
+    file at `path`, or stop sharing it with None.
+    """
+    if _scheduler.budget is not None:
+        _scheduler.budget.close()
+    _scheduler.share_budget(SharedBudget(path) if path else None)
+
+
+def get_stats():
+    """Notion calls and seconds spent waiting for a slot, per priority."""
+    return _scheduler.get_stats()
+
+
+def format_stats():
+    """Human-readable scheduler summary line."""
+    stats = get_stats()
+    if not stats:
+        return []
+    parts = [f"{name} {c['requests']} ({c['wait']:.1f}s wait)" for name, c in stats.items()]
+    return ["  🗓️ Notion calls by priority: " + ", ".join(parts)]
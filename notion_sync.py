@@ -0,0 +1,186 @@
+import hashlib
+import logging
+
+from tqdm import tqdm
+
+import conversion_cache
+import notion_client as nc
+
+__all__ = [
+    "configure_sync",
+    "is_enabled",
+    "description_hash",
+    "sync_existing_pages",
+    "close_missing_pages",
+    "OPEN_STAGE",
+    "CLOSED_STAGE",
+    "CLOSED_ACTIONS"
+]
+
+# Stage given to new pages; only pages still at this stage are synced or closed,
+# so pages the user has started working on are never touched.
+OPEN_STAGE = "Ready to apply"
+CLOSED_STAGE = "Closed"
+
+# What happens to the page of a posting that disappeared from Workday
+CLOSED_ACTIONS = ("stage", "archive", "none")
+
+_enabled = False
+_closed_action = "stage"
+_closed_stage = CLOSED_STAGE
+
+
+def configure_sync(enabled=False, closed_action="stage", closed_stage=CLOSED_STAGE):
+    """
+    Turn sync mode on or off. With sync on, postings already in Notion are
+    diffed against their pages and updated, and pages of postings that
+    disappeared are handled per `closed_action`: "stage" sets Stage to
+    `closed_stage`, "archive" archives the page and "none" leaves it.
+    """
+    global _enabled, _closed_action, _closed_stage
+    if closed_action not in CLOSED_ACTIONS:
+        raise ValueError(f"closed_action must be one of {CLOSED_ACTIONS}")
+    _enabled = enabled
+    _closed_action = closed_action
+    _closed_stage = closed_stage
+
+
+def is_enabled():
+    return _enabled
+
+
+def description_hash(html):
+    """Hash of the `jobDescription` a page body was written from."""
+    return hashlib.sha256((html or "").encode("utf-8")).hexdigest()
+
+
+def _synced_properties(job, company_name):
+    """
+    The page properties the scrape determines for a posting.
+
+    The deadline is only synced when the posting has an `endDate` (the
+    fallback date would otherwise move every year), and a salary that can no
+    longer be extracted does not clear the one on the page.
+    """
+    salary_range = nc.extract_salary_range(job.get("jobDescription", ""))
+    properties = nc.create_notion_payload(job, company_name, salary_range=salary_range)["properties"]
+    names = [
+        name for name in nc.SYNCED_PROPERTIES
+        if nc.property_value(properties[name]) is not None
+        and (name != "Application Deadline" or job.get("endDate"))
+    ]
+    return {name: properties[name] for name in names}
+
+
+def sync_existing_pages(job_postings, company_name, notion_index):
+    """
+    Bring the open pages of postings already in the main database up to date.
+
+    Each posting's synced properties are hashed and compared with the hashes
+    of the page as last read from Notion; only changed properties are sent,
+    in one PATCH. When the description changed, the page body is replaced.
+    Unchanged pages cost no API calls. Pages indexed before sync mode have no
+    description hash yet; the current description is recorded as their
+    baseline.
+
+    Returns:
+        dict: updated, unchanged and failed counts.
+    """
+    counts = {"updated": 0, "unchanged": 0, "failed": 0}
+    pages = {
+        page["req_id"]: page for page in notion_index.company_pages(nc.DATABASE_ID, company_name)
+        if page["req_id"] and page["stage"] == OPEN_STAGE
+    }
+    if not pages:
+        return counts
+
+    for job in tqdm(job_postings, desc=f"{company_name}: Notion Sync", unit="job"):
+        page = pages.get((job.get("jobReqId") or "").strip())
+        if page is None:
+            continue
+
+        html = job.get("jobDescription", "")
+        new_description_hash = description_hash(html)
+        if page["description_hash"] is None:
+            notion_index.update_page(page["page_id"], description_hash=new_description_hash)
+        body_changed = page["description_hash"] not in (None, new_description_hash)
+
+        properties = _synced_properties(job, company_name)
+        new_hashes = nc.property_hashes(properties)
+        stored_hashes = page["property_hashes"]
+        # Unknown until a full index refresh has read the page from Notion
+        changed = [] if stored_hashes is None else [
+            name for name, value_hash in new_hashes.items() if stored_hashes.get(name) != value_hash
+        ]
+
+        if not changed and not body_changed:
+            counts["unchanged"] += 1
+            continue
+
+        try:
+            if changed:
+                response = nc.update_page(page["page_id"], properties={name: properties[name] for name in changed})
+                if response.status_code != 200:
+                    raise RuntimeError(f"{response.status_code}: {response.text}")
+                notion_index.update_page(page["page_id"], property_hashes={name: new_hashes[name] for name in changed})
+            if body_changed:
+                blocks, _ = conversion_cache.convert_description(html)
+                if nc.replace_page_blocks(page["page_id"], blocks):
+                    raise RuntimeError("description blocks could not be appended")
+                notion_index.update_page(page["page_id"], description_hash=new_description_hash)
+        except Exception as e:
+            logging.error(f"[{company_name}] Failed to sync page for Req ID {page['req_id']}: {e}")
+            counts["failed"] += 1
+            continue
+
+        logging.info(
+            f"[{company_name}] Synced Req ID {page['req_id']}: "
+            f"{', '.join(changed) or 'no properties'}{' and description' if body_changed else ''} updated."
+        )
+        counts["updated"] += 1
+
+    return counts
+
+
+def close_missing_pages(company_name, is_listed, notion_index):
+    """
+    Close the open pages of postings no longer listed on Workday.
+
+    Args:
+        company_name (str): Institution name.
+        is_listed (callable): `is_listed(page)` is True if the indexed page
+            (with its req_id and job_url) matches a current listing.
+        notion_index (NotionIndex): Index of the Notion databases.
+
+    Returns:
+        tuple: (closed, failed) counts.
+    """
+    if _closed_action == "none":
+        return 0, 0
+
+    closed, failed = 0, 0
+    for page in notion_index.company_pages(nc.DATABASE_ID, company_name):
+        if page["stage"] != OPEN_STAGE or is_listed(page):
+            continue
+
+        if _closed_action == "archive":
+            response = nc.update_page(page["page_id"], archived=True)
+        else:
+            response = nc.update_page(page["page_id"], properties={"Stage": {"status": {"name": _closed_stage}}})
+
+        if response.status_code != 200:
+            logging.error(
+                f"[{company_name}] Failed to close page for Req ID {page['req_id']}: "
+                f"{response.status_code} — {response.text}"
+            )
+            failed += 1
+            continue
+
+        if _closed_action == "archive":
+            notion_index.remove_page(page["page_id"])
+        else:
+            notion_index.update_page(page["page_id"], stage=_closed_stage)
+        logging.info(f"[{company_name}] Closed page for Req ID {page['req_id']} ({_closed_action}).")
+        closed += 1
+
+    return closed, failed
@@ -0,0 +1,159 @@
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from tqdm import tqdm
+
+import conversion_cache
+import notion_client as nc
+
+__all__ = [
+    "UploadTask",
+    "upload_jobs"
+]
+
+# Concurrent page creations. Pacing is enforced by http_client's Notion token
+# bucket, so this only needs to be large enough to keep that budget busy.
+UPLOAD_WORKERS = 3
+
+# Extra passes over failed uploads before giving up on them
+RETRY_ROUNDS = 2
+
+# Client errors that will fail the same way on retry (bad payload, missing access)
+PERMANENT_STATUSES = {400, 401, 403, 404}
+
+
+@dataclass
+class UploadTask:
+    """One job moving through the upload pipeline."""
+    job: dict
+    page_id: str = None
+    pending_blocks: list = field(default_factory=list)
+    attempts: int = 0
+    done: bool = False
+    retryable: bool = True
+    error: str = ""
+    conversion: tuple = None
+    unconfirmed: bool = False  # a create was sent but its outcome is unknown
+
+
+def _find_created_page(task, company_name):
+    """
+    The page an earlier, unconfirmed create of `task` made, looked up by Req ID.
+
+    Returns None if there is none. A posting without a Req ID can't be
+    looked up, so its task is marked as not retryable instead.
+    """
+    req_id = (task.job.get("jobReqId") or "").strip()
+    if not req_id:
+        task.retryable = False
+        task.error = f"{task.error} (not retried: the page may exist and has no Req ID to look it up by)"
+        return None
+    page_id = nc.find_page_id(nc.DATABASE_ID, req_id, company_name)
+    if page_id is not None:
+        logging.info(f"[{company_name}] Found the page of Req ID {req_id} from an earlier unconfirmed create.")
+    return page_id
+
+
+def _run_task(task, company_name, on_created):
+    """
+    Advance a task as far as it can go.
+
+    A new page is created with the first `MAX_CHILDREN` description blocks
+    inline; any overflow is appended afterwards. If the append fails, the
+    retry only resumes the remaining blocks. If a create fails without a
+    definite answer (a 5xx, a timeout or a dropped connection), Notion may
+    still have made the page, so the retry first looks its Req ID up and
+    only creates the page if it isn't found.
+
+    Returns:
+        bool: True once the page exists with its full description.
+    """
+    task.attempts += 1
+    job = task.job
+
+    try:
+        if task.page_id is None:
+            blocks, salary_range = task.conversion or conversion_cache.convert_description(job.get("jobDescription", ""))
+            page_id = _find_created_page(task, company_name) if task.unconfirmed else None
+            if not task.retryable:
+                return False
+
+            if page_id is None:
+                payload = nc.create_notion_payload(job, company_name, blocks[:nc.MAX_CHILDREN], salary_range)
+                # Stays set if the create raises (e.g. a read timeout) after the request went out
+                task.unconfirmed = True
+                response = nc.create_page(payload)
+
+                if response.status_code != 200:
+                    task.error = f"{response.status_code}: {response.text}"
+                    task.unconfirmed = response.status_code >= 500
+                    task.retryable = response.status_code not in PERMANENT_STATUSES
+                    return False
+                page_id = response.json().get("id")
+
+            task.unconfirmed = False
+            task.page_id = page_id
+            task.pending_blocks = blocks[nc.MAX_CHILDREN:]
+            # Only the overflow blocks are still needed
+            task.conversion = None
+            if on_created is not None:
+                on_created(job, task.page_id)
+
+        if task.pending_blocks:
+            task.pending_blocks = nc.append_blocks(task.page_id, task.pending_blocks)
+            if task.pending_blocks:
+                task.error = f"{len(task.pending_blocks)} description blocks could not be appended"
+                return False
+
+    except Exception as e:
+        task.error = str(e)
+        return False
+
+    task.done = True
+    task.error = ""
+    return True
+
+
+def upload_jobs(jobs, company_name, on_created=None, workers=UPLOAD_WORKERS, retry_rounds=RETRY_ROUNDS,
+                conversions=None):
+    """
+    Upload jobs to Notion through a bounded worker pool.
+
+    Failed tasks are queued and retried for up to `retry_rounds` extra passes,
+    unless the failure is permanent (e.g. a 400 validation error).
+
+    Args:
+        jobs (list): `jobPostingInfo` dicts to create pages for.
+        company_name (str): Institution name, used for the Company property.
+        on_created (callable): Called as `on_created(job, page_id)` right after each page is created.
+        conversions (list): Optional (blocks, salary range) per job, already converted.
+
+    Returns:
+        list: One `UploadTask` per job, in input order.
+    """
+    tasks = [UploadTask(job) for job in jobs]
+    if conversions is not None:
+        for task, conversion in zip(tasks, conversions):
+            task.conversion = conversion
+    pending = tasks
+
+    for round_number in range(retry_rounds + 1):
+        if not pending:
+            break
+        if round_number:
+            logging.info(f"[{company_name}] Retrying {len(pending)} failed uploads (round {round_number}).")
+
+        desc = f"{company_name}: Notion Upload" if not round_number else f"{company_name}: Upload retry {round_number}"
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, _run_task, task, company_name, on_created)
+                for task in pending
+            ]
+            for future in tqdm(as_completed(futures), total=len(futures), desc=desc, unit="job"):
+                future.result()
+
+        pending = [task for task in pending if not task.done and task.retryable]
+
+    return tasks
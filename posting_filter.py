@@ -0,0 +1,232 @@
+import re
+from collections import Counter
+from datetime import date
+
+import compensation
+from job_store import normalize_posted_on
+
+__all__ = [
+    "PostingFilter",
+    "FILTER_KEYS"
+]
+
+# Keys accepted under an institution's `filters`
+FILTER_KEYS = (
+    "title_include",
+    "title_exclude",
+    "posted_within_days",
+    "min_salary",
+    "require_salary",
+    "required_keywords",
+    "keywords",
+    "min_score"
+)
+
+# "Posted 30+ Days Ago": at least this many days old
+_POSTED_AT_LEAST = re.compile(r"posted\s+(\d+)\+\s+days?\s+ago", re.IGNORECASE)
+
+
+def _string_list(key, value):
+    """A string or list of strings, as a list."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return value
+    raise ValueError(f"`{key}` must be a string or a list of strings, not {value!r}")
+
+
+def _number(key, value):
+    """An int or float, coercing numeric strings such as "80000"."""
+    if isinstance(value, str):
+        try:
+            value = float(value.strip())
+        except ValueError:
+            pass
+        else:
+            value = int(value) if value.is_integer() else value
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"`{key}` must be a number, not {value!r}")
+    return value
+
+
+def _validated(config):
+    """
+    The `filters` mapping checked key by key and ready for `PostingFilter`.
+
+    Raises:
+        ValueError: Naming the first key with an unknown name or a value of the wrong type.
+    """
+    if not isinstance(config, dict):
+        raise ValueError(f"`filters` must be a mapping, not {config!r}")
+    unknown = sorted(set(config) - set(FILTER_KEYS))
+    if unknown:
+        raise ValueError(f"unknown filter keys {unknown}; expected some of {list(FILTER_KEYS)}")
+
+    options = {}
+    for key in ("title_include", "title_exclude", "required_keywords"):
+        if config.get(key) is not None:
+            options[key] = _string_list(key, config[key])
+    for key in ("posted_within_days", "min_salary", "min_score"):
+        if config.get(key) is not None:
+            options[key] = _number(key, config[key])
+    if options.get("posted_within_days", 0) < 0:
+        raise ValueError(f"`posted_within_days` must not be negative, not {config['posted_within_days']!r}")
+    if config.get("require_salary") is not None:
+        if not isinstance(config["require_salary"], bool):
+            raise ValueError(f"`require_salary` must be true or false, not {config['require_salary']!r}")
+        options["require_salary"] = config["require_salary"]
+    if config.get("keywords") is not None:
+        keywords = config["keywords"]
+        if not isinstance(keywords, dict) or not all(isinstance(word, str) for word in keywords):
+            raise ValueError(f"`keywords` must map keywords to numeric weights, not {keywords!r}")
+        options["keywords"] = {word: _number(f"keywords.{word}", weight) for word, weight in keywords.items()}
+    return options
+
+
+def _patterns(values):
+    if isinstance(values, str):
+        values = [values]
+    return [re.compile(value, re.IGNORECASE) for value in values or ()]
+
+
+def _keyword(word):
+    # Whole words, without \b so terms like "C++" and ".NET" still match
+    return re.compile(rf"(?<!\w){re.escape(word)}(?!\w)", re.IGNORECASE)
+
+
+def _listing_age(posted_on, today):
+    """Days since a listing's relative `postedOn`, a lower bound for "30+", or None."""
+    posted = normalize_posted_on(posted_on, today)
+    if posted is not None:
+        return (today - date.fromisoformat(posted)).days
+    match = _POSTED_AT_LEAST.search(posted_on or "")
+    return int(match.group(1)) if match else None
+
+
+def _detail_age(job_data, today):
+    """Days since a `jobPostingInfo` was posted, from its `startDate` or `postedOn`."""
+    try:
+        return (today - date.fromisoformat(job_data["startDate"][:10])).days
+    except (KeyError, TypeError, ValueError):
+        return _listing_age(job_data.get("postedOn"), today)
+
+
+class PostingFilter:
+    """
+    An institution's declarative posting filters and keyword score.
+
+    Each posting is screened twice. Listing entries are checked against the
+    title patterns and posting age before their detail is fetched, so a
+    rejected posting costs nothing beyond its listing. The fetched detail is
+    checked again with everything, including the pay and description
+    keywords, before it is written out, converted or uploaded.
+
+    Rejections are counted per stage and reason.
+    """
+
+    def __init__(self, title_include=(), title_exclude=(), posted_within_days=None, min_salary=None,
+                 require_salary=False, required_keywords=(), keywords=None, min_score=None):
+        self.title_include = _patterns(title_include)
+        self.title_exclude = _patterns(title_exclude)
+        self.posted_within_days = posted_within_days
+        self.min_salary = min_salary
+        self.require_salary = require_salary
+        self.required_keywords = [_keyword(word) for word in required_keywords or ()]
+        self.keywords = [(_keyword(word), weight) for word, weight in (keywords or {}).items()]
+        self.min_score = min_score
+        self.rejected = Counter()  # (stage, reason) -> postings
+
+    @classmethod
+    def from_institution(cls, institution):
+        """
+        The filters configured under an institution's `filters`, or None if it has none.
+
+        Numeric values given as strings, e.g. `min_salary: "80000"`, are
+        converted to numbers.
+
+        Raises:
+            ValueError: If the filters have unknown keys, values of the wrong
+                type or invalid patterns. The message names the key.
+        """
+        config = institution.get("filters")
+        if not config:
+            return None
+        options = _validated(config)
+        for key in ("title_include", "title_exclude"):
+            for pattern in options.get(key, ()):
+                try:
+                    re.compile(pattern)
+                except re.error as e:
+                    raise ValueError(f"invalid `{key}` pattern {pattern!r}: {e}") from e
+        return cls(**options)
+
+    def _title_rejection(self, title):
+        title = title or ""
+        if self.title_include and not any(pattern.search(title) for pattern in self.title_include):
+            return "title"
+        if any(pattern.search(title) for pattern in self.title_exclude):
+            return "title"
+        return None
+
+    def _age_rejection(self, age):
+        if self.posted_within_days is not None and age is not None and age > self.posted_within_days:
+            return "posted"
+        return None
+
+    def _reject(self, stage, reason):
+        if reason is not None:
+            self.rejected[stage, reason] += 1
+        return reason is None
+
+    def accepts_listing(self, listing, today=None):
+        """True if a listing entry passes the title and posting age filters."""
+        today = today or date.today()
+        reason = (
+            self._title_rejection(listing.get("title"))
+            or self._age_rejection(_listing_age(listing.get("postedOn"), today))
+        )
+        return self._reject("listing", reason)
+
+    def score(self, job_data, text=None):
+        """Sum of the weights of the `keywords` found in the title or description."""
+        if text is None:
+            text = f"{job_data.get('title') or ''} {compensation.html_to_text(job_data.get('jobDescription'))}"
+        return sum(weight for pattern, weight in self.keywords if pattern.search(text))
+
+    def _detail_rejection(self, job_data, today):
+        reason = self._title_rejection(job_data.get("title")) or self._age_rejection(_detail_age(job_data, today))
+        if reason:
+            return reason
+
+        if self.min_salary is not None or self.require_salary:
+            pay = compensation.extract_compensation(job_data.get("jobDescription"))
+            if pay is None and self.require_salary:
+                return "salary"
+            if pay is not None and self.min_salary is not None and pay.annual_high < self.min_salary:
+                return "salary"
+
+        if self.required_keywords or (self.keywords and self.min_score is not None):
+            text = f"{job_data.get('title') or ''} {compensation.html_to_text(job_data.get('jobDescription'))}"
+            if not all(pattern.search(text) for pattern in self.required_keywords):
+                return "keywords"
+            if self.min_score is not None and self.score(job_data, text) < self.min_score:
+                return "score"
+        return None
+
+    def accepts_detail(self, job_data, today=None):
+        """True if a `jobPostingInfo` passes every filter."""
+        return self._reject("detail", self._detail_rejection(job_data, today or date.today()))
+
+    def rejected_count(self, stage):
+        return sum(count for (rejected_stage, _), count in self.rejected.items() if rejected_stage == stage)
+
+    def format_summary(self):
+        """Human-readable rejection summary lines."""
+        reasons = Counter()
+        for (_, reason), count in self.rejected.items():
+            reasons[reason] += count
+        by_reason = ", ".join(f"{reason} {count}" for reason, count in reasons.most_common())
+        return [
+            f"  🚫 Filtered out: {self.rejected_count('listing')} before detail fetch, "
+            f"{self.rejected_count('detail')} after" + (f" ({by_reason})" if by_reason else "")
+        ]
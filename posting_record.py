@@ -0,0 +1,174 @@
+import hashlib
+import tempfile
+import threading
+
+__all__ = [
+    "PostingRecord",
+    "DescriptionStore",
+    "configure_descriptions",
+    "open_description_store",
+    "get_stats",
+    "format_stats",
+    "DESCRIPTION_MEMORY_MB"
+]
+
+# Description text an institution keeps in memory before spilling the rest to disk
+DESCRIPTION_MEMORY_MB = 64
+
+_memory_bytes = DESCRIPTION_MEMORY_MB * 1_000_000
+_stats_lock = threading.Lock()
+_stats = {"stored": 0, "duplicates": 0, "spilled": 0, "spilled_bytes": 0, "disk_reads": 0}
+
+
+def configure_descriptions(memory_mb=DESCRIPTION_MEMORY_MB):
+    """Set the in-memory description budget of stores opened from now on."""
+    global _memory_bytes
+    _memory_bytes = max(0, int(memory_mb * 1_000_000))
+
+
+def _count(name, value=1):
+    with _stats_lock:
+        _stats[name] += value
+
+
+class DescriptionStore:
+    """
+    Job descriptions of one institution's run, stored once each.
+
+    Descriptions are keyed by their SHA-256, so postings sharing a
+    description (reposts, templated boilerplate) share one copy. Up to
+    `max_memory_bytes` of text is kept in memory; past that, descriptions are
+    appended to an anonymous temporary file and read back on demand. The file
+    is deleted when the store is closed.
+    """
+
+    def __init__(self, max_memory_bytes=None):
+        self.max_memory_bytes = _memory_bytes if max_memory_bytes is None else max_memory_bytes
+        self.memory_bytes = 0
+        self._lock = threading.Lock()
+        self._memory = {}   # key -> description
+        self._spilled = {}  # key -> (offset, length) in the spill file
+        self._file = None
+
+    def put(self, html):
+        """Store a description and return its key."""
+        html = html or ""
+        key = hashlib.sha256(html.encode("utf-8")).hexdigest()
+        with self._lock:
+            if key in self._memory or key in self._spilled:
+                _count("duplicates")
+                return key
+
+            if self.memory_bytes + len(html) <= self.max_memory_bytes:
+                self._memory[key] = html
+                self.memory_bytes += len(html)
+            else:
+                if self._file is None:
+                    self._file = tempfile.TemporaryFile(prefix="descriptions-")
+                data = html.encode("utf-8")
+                offset = self._file.seek(0, 2)
+                self._file.write(data)
+                self._spilled[key] = (offset, len(data))
+                _count("spilled")
+                _count("spilled_bytes", len(data))
+        _count("stored")
+        return key
+
+    def get(self, key):
+        """The description stored under `key`, read back from disk if it was spilled."""
+        with self._lock:
+            html = self._memory.get(key)
+            if html is not None:
+                return html
+            offset, length = self._spilled[key]
+            self._file.seek(offset)
+            data = self._file.read(length)
+        _count("disk_reads")
+        return data.decode("utf-8")
+
+    def close(self):
+        with self._lock:
+            self._memory.clear()
+            self._spilled.clear()
+            self.memory_bytes = 0
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_description_store():
+    """A `DescriptionStore` with the configured memory budget."""
+    return DescriptionStore()
+
+
+class PostingRecord:
+    """
+    The fields of a `jobPostingInfo` the upload and sync stages use.
+
+    The description is kept in a `DescriptionStore` and loaded when it is
+    read. `get` accepts the Workday field names, so a record can stand in for
+    the posting dict wherever only those fields are read.
+    """
+
+    __slots__ = ("title", "job_req_id", "external_url", "end_date", "description_key", "_descriptions")
+
+    # Workday field name -> attribute
+    FIELDS = {"title": "title", "jobReqId": "job_req_id", "externalUrl": "external_url", "endDate": "end_date"}
+
+    def __init__(self, title, job_req_id, external_url, end_date, description_key, descriptions):
+        self.title = title
+        self.job_req_id = job_req_id
+        self.external_url = external_url
+        self.end_date = end_date
+        self.description_key = description_key
+        self._descriptions = descriptions
+
+    @classmethod
+    def from_detail(cls, job_data, descriptions):
+        """Keep what the pipeline needs from a `jobPostingInfo`; the description goes to `descriptions`."""
+        return cls(
+            job_data.get("title"),
+            job_data.get("jobReqId"),
+            job_data.get("externalUrl"),
+            job_data.get("endDate"),
+            descriptions.put(job_data.get("jobDescription", "")),
+            descriptions
+        )
+
+    @property
+    def description(self):
+        return self._descriptions.get(self.description_key)
+
+    def get(self, key, default=None):
+        if key == "jobDescription":
+            return self.description
+        attribute = self.FIELDS.get(key)
+        value = getattr(self, attribute) if attribute else None
+        return default if value is None else value
+
+    def __repr__(self):
+        return f"PostingRecord(job_req_id={self.job_req_id!r}, title={self.title!r})"
+
+
+def get_stats():
+    """Counters across all stores: stored, duplicates, spilled, spilled_bytes, disk_reads."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def format_stats():
+    """Human-readable description storage summary lines."""
+    stats = get_stats()
+    lines = [f"  📝 {stats['stored']} descriptions stored, {stats['duplicates']} duplicates shared"]
+    if stats["spilled"]:
+        lines.append(
+            f"  💾 {stats['spilled']} spilled to disk ({stats['spilled_bytes'] / 1e6:.1f} MB), "
+            f"{stats['disk_reads']} read back"
+        )
+    return lines
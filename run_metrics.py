@@ -0,0 +1,260 @@
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+__all__ = [
+    "stage",
+    "current_stage",
+    "record_request",
+    "percentile",
+    "build_report",
+    "write_report",
+    "format_stage_summary",
+    "STAGES"
+]
+
+# Stages of an institution's run, in order
+STAGES = ("facets", "pagination", "dedup", "details", "conversion", "upload", "sync")
+
+_current_stage = contextvars.ContextVar("run_stage", default=None)
+_lock = threading.Lock()
+_stages = {}
+_run_started = time.time()
+
+
+class StageTimer:
+    """Totals for one (institution, stage) pair, accumulated across runs of the stage."""
+
+    def __init__(self, institution, name):
+        self.institution = institution
+        self.name = name
+        self.runs = 0
+        self.wall_time = 0.0
+        self.items = 0
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.sleep_time = 0.0
+
+    def as_dict(self):
+        return {
+            "institution": self.institution,
+            "stage": self.name,
+            "runs": self.runs,
+            "wall_time": round(self.wall_time, 6),
+            "items": self.items,
+            "items_per_second": round(self.items / self.wall_time, 3) if self.wall_time else None,
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "sleep_time": round(self.sleep_time, 6)
+        }
+
+
+def _timer(institution, name):
+    with _lock:
+        timer = _stages.get((institution, name))
+        if timer is None:
+            timer = _stages[(institution, name)] = StageTimer(institution, name)
+        return timer
+
+
+class _StageRun:
+    """Handed to the body of a `stage` block to report how many items it processed."""
+
+    def __init__(self):
+        self.items = 0
+
+
+@contextmanager
+def stage(institution, name):
+    """
+    Time a stage of an institution's run.
+
+    HTTP requests made while the stage is active, including from worker
+    threads started with a copy of the current context, are attributed to
+    it. Set `.items` on the yielded object to record throughput.
+    """
+    timer = _timer(institution, name)
+    run = _StageRun()
+    token = _current_stage.set(timer)
+    start = time.perf_counter()
+    try:
+        yield run
+    finally:
+        elapsed = time.perf_counter() - start
+        _current_stage.reset(token)
+        with _lock:
+            timer.runs += 1
+            timer.wall_time += elapsed
+            timer.items += run.items
+
+
+def current_stage():
+    return _current_stage.get()
+
+
+def record_request(retried=False, error=False, bytes_sent=0, bytes_received=0, sleep_time=0.0):
+    """Attribute one HTTP attempt to the active stage, if any."""
+    timer = _current_stage.get()
+    if timer is None:
+        return
+    with _lock:
+        timer.requests += 1
+        timer.retries += int(retried)
+        timer.errors += int(error)
+        timer.bytes_sent += bytes_sent
+        timer.bytes_received += bytes_received
+        timer.sleep_time += sleep_time
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+# --- Report ---
+def build_report(hosts=None, conversion_cache=None):
+    """
+    Machine-readable summary of the run so far.
+
+    Args:
+        hosts (dict): host -> transport counters and latency samples (see `http_client.get_report`).
+        conversion_cache (dict): Conversion cache counters.
+    """
+    finished = time.time()
+    with _lock:
+        stages = [timer.as_dict() for timer in _stages.values()]
+
+    order = {name: i for i, name in enumerate(STAGES)}
+    stages.sort(key=lambda s: (s["institution"], order.get(s["stage"], len(STAGES)), s["stage"]))
+
+    return {
+        "started_at": datetime.fromtimestamp(_run_started, timezone.utc).isoformat(timespec="seconds"),
+        "finished_at": datetime.fromtimestamp(finished, timezone.utc).isoformat(timespec="seconds"),
+        "wall_time": round(finished - _run_started, 3),
+        "stages": stages,
+        "hosts": hosts or {},
+        "conversion_cache": conversion_cache or {}
+    }
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_label_value(value)}"' for key, value in labels.items()) + "}"
+
+
+def _prometheus_lines(report):
+    prefix = "workday_scraper"
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for labels, value in samples:
+            if value is not None:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+
+    metric("run_seconds", "gauge", "Wall time of the whole run.", [("", report["wall_time"])])
+    metric("run_finished_timestamp_seconds", "gauge", "Unix time the report was written.", [("", round(time.time(), 3))])
+
+    stages = report["stages"]
+    for field, name, help_text in (
+        ("wall_time", "stage_seconds", "Wall time spent in a stage."),
+        ("items", "stage_items", "Items processed by a stage."),
+        ("requests", "stage_requests", "HTTP attempts made by a stage."),
+        ("retries", "stage_retries", "HTTP retries made by a stage."),
+        ("bytes_received", "stage_received_bytes", "Response bytes received by a stage."),
+        ("sleep_time", "stage_sleep_seconds", "Rate-limit and backoff sleep in a stage.")
+    ):
+        metric(name, "gauge", help_text, [
+            (_labels(institution=s["institution"], stage=s["stage"]), s[field]) for s in stages
+        ])
+
+    hosts = report["hosts"]
+    for field, name, help_text in (
+        ("requests", "http_requests_total", "HTTP attempts per host."),
+        ("retries", "http_retries_total", "HTTP retries per host."),
+        ("throttled", "http_throttled_total", "429 responses per host."),
+        ("errors", "http_errors_total", "Failed requests per host."),
+        ("not_modified", "http_not_modified_total", "304 Not Modified responses per host."),
+        ("bytes_sent", "http_sent_bytes_total", "Request body bytes sent per host."),
+        ("bytes_received", "http_received_bytes_total", "Response bytes received per host.")
+    ):
+        metric(name, "counter", help_text, [(_labels(host=host), int(h.get(field, 0))) for host, h in sorted(hosts.items())])
+
+    metric("http_sleep_seconds_total", "counter", "Time spent sleeping per host, by reason.", [
+        (_labels(host=host, reason=reason), round(h.get(field, 0.0), 6))
+        for host, h in sorted(hosts.items())
+        for reason, field in (("rate_limit", "throttle_wait"), ("backoff", "backoff_wait"))
+    ])
+
+    latency_samples = []
+    for host, h in sorted(hosts.items()):
+        latency = h.get("latency", {})
+        for quantile, key in (("0.5", "p50"), ("0.9", "p90"), ("0.99", "p99")):
+            latency_samples.append((_labels(host=host, quantile=quantile), latency.get(key)))
+    metric("http_latency_seconds", "summary", "HTTP attempt latency per host.", latency_samples)
+    for host, h in sorted(hosts.items()):
+        latency = h.get("latency", {})
+        lines.append(f"{prefix}_http_latency_seconds_sum{_labels(host=host)} {latency.get('sum', 0.0)}")
+        lines.append(f"{prefix}_http_latency_seconds_count{_labels(host=host)} {latency.get('count', 0)}")
+
+    cache = report["conversion_cache"]
+    if cache:
+        metric("conversion_cache_lookups_total", "counter", "Description conversion cache lookups by result.", [
+            (_labels(result=result), cache.get(field, 0))
+            for result, field in (("memory_hit", "hits"), ("disk_hit", "disk_hits"), ("miss", "misses"))
+        ])
+
+    return lines
+
+
+def write_report(path, report):
+    """
+    Write the report atomically: Prometheus textfile format for `.prom`
+    paths (for node_exporter's textfile collector), JSON otherwise.
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if path.endswith(".prom"):
+            f.write("\n".join(_prometheus_lines(report)) + "\n")
+        else:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def format_stage_summary(report):
+    """Human-readable per-stage totals across institutions."""
+    totals = {}
+    for s in report["stages"]:
+        total = totals.setdefault(s["stage"], {"wall_time": 0.0, "items": 0, "requests": 0})
+        total["wall_time"] += s["wall_time"]
+        total["items"] += s["items"]
+        total["requests"] += s["requests"]
+
+    order = {name: i for i, name in enumerate(STAGES)}
+    lines = []
+    for name in sorted(totals, key=lambda n: order.get(n, len(STAGES))):
+        total = totals[name]
+        lines.append(
+            f"  ⏱️ {name}: {total['wall_time']:.1f}s, {total['items']} items, {total['requests']} requests"
+        )
+    return lines
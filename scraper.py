@@ -1,9 +1,28 @@
-import json
+import argparse
 import logging
+from contextlib import ExitStack, contextmanager
+from datetime import date
 from logging.handlers import RotatingFileHandler
 from tqdm import tqdm
+import conversion_cache
+import description_pool
+import facet_index
+import http_client
+import http_replay
+import notion_client as nc
+import notion_scheduler
+import notion_sync
+import posting_record
+import run_metrics
+import sinks
+import work_queue
 from config_loader import load_institutions_config
-from institution_runner import run_institution_scraper
+from institution_runner import configure_quick, iter_institution_postings
+from json_output import OUTPUT_FORMATS, output_path, open_posting_writer
+from checkpoint import open_checkpoint
+from job_store import JobStore, DEFAULT_STORE_PATH
+from notion_index import NotionIndex, DEFAULT_INDEX_PATH
+from posting_filter import PostingFilter
 
 # --- Logging Setup ---
 # Create rotating file handler (max 5MB per file, keep 5 backups)
@@ -28,63 +47,375 @@ logger.handlers = []  # Clear any default handlers (if re-running interactively)
 logger.addHandler(file_handler)
 logger.addHandler(console_handler)
 
-# --- Configurations ---
-HEADERS = {
-    "Content-Type": "application/json"
-}
-
-# --- Function to Find Location IDs ---
-# --- Function to Find ID by Descriptor (General Purpose) ---
-def find_id_by_descriptor(facets, target_descriptor):
+# --- Output ---
+def export_institution(institution, store, export_sinks):
+    """
+    Hand every open posting of the institution in the job store to each
+    export sink: the postings listed this run (or, when `--quick` skipped
+    it, at its last run) with their stored detail, or their listing fields
+    when no detail was ever fetched. The institution's filters still apply.
     """
-    Recursively find the ID and facetParameter for a given descriptor across Workday facetParameters.
+    try:
+        posting_filter = PostingFilter.from_institution(institution)
+    except ValueError:
+        # Already reported by the runner, which scraped nothing
+        return
+    for listing, detail in store.iter_open_postings(institution["name"]):
+        if detail is None:
+            if posting_filter is not None and not posting_filter.accepts_listing(listing):
+                continue
+            detail = sinks.listing_posting(listing)
+        elif posting_filter is not None and not posting_filter.accepts_detail(detail):
+            continue
+        for sink in export_sinks:
+            sink.write(institution["name"], detail)
 
-    Args:
-        facets (list): The facets list loaded from JSON.
-        target_descriptor (str): The descriptor text to search for.
+@contextmanager
+def open_institution_output(institution, fmt="json", export_sinks=(), store=None):
+    """
+    Open the institution's output file, one per institution, and yield a
+    function that writes one posting to it as it arrives.
 
-    Returns:
-        tuple: (facetParameter, id) if found, or (None, None) if not found.
+    Once the institution is done, every posting listed in the run is handed
+    to each export sink (see `export_institution`) and the sinks are
+    flushed. Without a job store only the postings written to the file,
+    those fetched this run, are exported.
     """
-    target_descriptor = target_descriptor.strip().lower()
+    filename = output_path(institution["name"], fmt)
+
+    with open_posting_writer(filename, fmt) as writer:
+        def write(posting):
+            writer.write(posting)
+            if store is None:
+                for sink in export_sinks:
+                    sink.write(institution["name"], posting)
+
+        yield write
+    if export_sinks and store is not None:
+        export_institution(institution, store, export_sinks)
+    for sink in export_sinks:
+        sink.flush()
+    logging.info(f"Filtered job response saved to {filename} ({writer.count} postings)")
 
-    for facet in facets:
-        facet_parameter = facet.get("facetParameter", "")
-        values = facet.get("values", [])
+def write_institution_output(institution, postings, fmt="json", export_sinks=(), store=None):
+    """Write job postings to the institution's output file as they arrive; see `open_institution_output`."""
+    with open_institution_output(institution, fmt, export_sinks, store) as write:
+        for posting in postings:
+            write(posting)
 
-        for value in values:
-            # Check if this value directly matches
-            descriptor = value.get("descriptor", "").strip().lower()
-            if descriptor == target_descriptor and "id" in value:
-                return facet_parameter, value["id"]
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape Workday job postings into Notion.")
+    parser.add_argument(
+        "--config", default="config/institutions.yaml",
+        help="Institutions config file (default: config/institutions.yaml)."
+    )
+    parser.add_argument(
+        "--async", dest="use_async", action="store_true",
+        help="Run institutions concurrently and fan out job detail requests."
+    )
+    parser.add_argument(
+        "--max-per-host", type=int, default=4,
+        help="Async mode: maximum in-flight requests per Workday host (default: 4)."
+    )
+    parser.add_argument(
+        "--max-institutions", type=int, default=None,
+        help="Async mode: maximum institutions scraped at once (default: all)."
+    )
+    parser.add_argument(
+        "--store", default=DEFAULT_STORE_PATH,
+        help=f"SQLite job store used for incremental scraping (default: {DEFAULT_STORE_PATH})."
+    )
+    parser.add_argument(
+        "--no-store", action="store_true",
+        help="Disable the job store and fetch every posting's details."
+    )
+    parser.add_argument(
+        "--notion-index", default=DEFAULT_INDEX_PATH,
+        help=f"On-disk Notion Req ID index shared by all institutions (default: {DEFAULT_INDEX_PATH})."
+    )
+    parser.add_argument(
+        "--no-notion-index", action="store_true",
+        help="Query Notion per institution instead of using the local index."
+    )
+    parser.add_argument(
+        "--full-notion-refresh", action="store_true",
+        help="Rebuild the Notion index from a full scan instead of an incremental refresh."
+    )
+    parser.add_argument(
+        "--output-format", choices=list(OUTPUT_FORMATS), default="json",
+        help="Per-institution output file format (default: json). JSON Lines formats stream one posting per line."
+    )
+    parser.add_argument(
+        "--conversion-cache", default=conversion_cache.DEFAULT_CACHE_PATH,
+        help=f"On-disk cache of converted job descriptions (default: {conversion_cache.DEFAULT_CACHE_PATH})."
+    )
+    parser.add_argument(
+        "--no-conversion-cache", action="store_true",
+        help="Keep converted job descriptions in memory only."
+    )
+    parser.add_argument(
+        "--parse-workers", type=int, default=description_pool.PARSE_WORKERS,
+        help="Worker processes converting job descriptions before upload (default: 0, convert in the main process)."
+    )
+    parser.add_argument(
+        "--parse-chunksize", type=int, default=description_pool.PARSE_CHUNKSIZE,
+        help=f"Descriptions sent to a parse worker at a time (default: {description_pool.PARSE_CHUNKSIZE})."
+    )
+    parser.add_argument(
+        "--description-memory", type=float, default=posting_record.DESCRIPTION_MEMORY_MB, metavar="MB",
+        help="Job description text each institution keeps in memory for the upload stage before spilling the rest "
+             f"to a temporary file (default: {posting_record.DESCRIPTION_MEMORY_MB})."
+    )
+    parser.add_argument(
+        "--export", action="append", default=[], choices=list(sinks.SINKS),
+        help="Also append the run's postings to a columnar store under --export-dir: a Parquet dataset with one "
+             "partition per run (needs pyarrow) or a DuckDB table (needs duckdb). May be given more than once."
+    )
+    parser.add_argument(
+        "--export-dir", default=sinks.EXPORT_DIR,
+        help=f"Directory of the --export stores (default: {sinks.EXPORT_DIR})."
+    )
+    parser.add_argument(
+        "--facet-cache-ttl", type=float, default=facet_index.FACET_CACHE_TTL / 3600,
+        help=f"Hours a tenant's cached facets are reused before refetching; 0 disables the cache "
+             f"(default: {facet_index.FACET_CACHE_TTL // 3600})."
+    )
+    parser.add_argument(
+        "--report", action="append", default=[], metavar="PATH",
+        help="Write a run report of per-stage timings and per-host transport stats: Prometheus textfile "
+             "format for .prom paths, JSON otherwise. May be given more than once."
+    )
+    parser.add_argument(
+        "--sync", action="store_true",
+        help="Update the pages of postings already in Notion when they change, and close pages of postings "
+             "no longer listed. Requires the Notion index; use with the job store to avoid refetching details."
+    )
+    parser.add_argument(
+        "--closed-action", choices=notion_sync.CLOSED_ACTIONS, default="stage",
+        help="Sync mode: what to do with the page of a vanished posting still at Stage "
+             f"'{notion_sync.OPEN_STAGE}' (default: stage, i.e. set Stage to --closed-stage)."
+    )
+    parser.add_argument(
+        "--closed-stage", default=notion_sync.CLOSED_STAGE,
+        help=f"Sync mode: Stage status given to closed postings (default: {notion_sync.CLOSED_STAGE})."
+    )
+    parser.add_argument(
+        "--notion-rate", type=float, default=http_client.NOTION_RATE,
+        help=f"Notion requests per second (default: {http_client.NOTION_RATE})."
+    )
+    parser.add_argument(
+        "--notion-budget", metavar="PATH",
+        help="SQLite file through which processes on this machine share one --notion-rate budget, "
+             "e.g. state/notion_budget.sqlite3 for every --worker."
+    )
+    replay = parser.add_mutually_exclusive_group()
+    replay.add_argument(
+        "--record", metavar="PATH",
+        help="Record every Workday and Notion HTTP exchange to a JSON Lines fixture."
+    )
+    replay.add_argument(
+        "--replay", metavar="PATH",
+        help="Serve HTTP requests from a fixture written by --record instead of the network."
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Continue each institution from the checkpoint left by an interrupted run."
+    )
+    parser.add_argument(
+        "--quick", action="store_true",
+        help="Skip an institution after its first listing page when that page matches the last clean run "
+             "(same total, no new or changed postings). For frequent scheduled runs; needs the job store."
+    )
+    parser.add_argument(
+        "--enqueue", action="store_true",
+        help="Put each configured institution on the work queue for --worker processes, then exit."
+    )
+    parser.add_argument(
+        "--worker", action="store_true",
+        help="Scrape institutions leased from the work queue until it is drained."
+    )
+    parser.add_argument(
+        "--queue", default=work_queue.DEFAULT_QUEUE_PATH,
+        help=f"SQLite work queue shared by the workers (default: {work_queue.DEFAULT_QUEUE_PATH})."
+    )
+    parser.add_argument(
+        "--run-id", default=date.today().isoformat(),
+        help="--enqueue: label of the queued run; institutions are queued once per run id (default: today's date)."
+    )
+    parser.add_argument(
+        "--worker-id", default=None,
+        help="--worker: name recorded on leased units (default: hostname-pid)."
+    )
+    parser.add_argument(
+        "--lease", type=float, default=work_queue.LEASE_SECONDS,
+        help=f"--worker: seconds a unit stays leased without a heartbeat (default: {work_queue.LEASE_SECONDS:.0f})."
+    )
+    parser.add_argument(
+        "--wait", action="store_true",
+        help="--worker: keep polling for new units instead of exiting when the queue is drained."
+    )
+    return parser.parse_args(argv)
 
-            # If value has nested facetParameter + values, recurse
-            if "facetParameter" in value and "values" in value:
-                nested_facet_parameter = value["facetParameter"]
-                nested_values = value["values"]
+def open_notion_index(args):
+    """Open and refresh the Notion index, or return None to fall back to live queries."""
+    if args.no_notion_index:
+        return None
 
-                found_facet_parameter, found_id = find_id_by_descriptor(
-                    [{"facetParameter": nested_facet_parameter, "values": nested_values}],
-                    target_descriptor
-                )
+    notion_index = NotionIndex(args.notion_index)
+    try:
+        notion_index.refresh_all(full=args.full_notion_refresh)
+    except Exception as e:
+        logging.error(f"Notion index refresh failed, falling back to per-institution queries: {e}")
+        notion_index.close()
+        return None
+    return notion_index
 
-                if found_id:
-                    return found_facet_parameter, found_id
+# --- Worker Mode ---
+def enqueue_institutions(queue, institutions, run_id):
+    """Queue one unit per institution for the run; already queued ones are skipped."""
+    added = sum(
+        queue.enqueue("institution", f"{run_id}:{institution['name']}", institution)
+        for institution in institutions
+    )
+    tqdm.write(f"📥 Queued {added} of {len(institutions)} institutions for run {run_id} ({queue.path})")
 
-    return None, None
+def _while_leased(postings, heartbeat, company_name):
+    """
+    Stop consuming an institution's postings once its lease is lost, so the
+    Notion upload (which runs after the last posting) is left to the worker
+    that took the unit over.
+    """
+    for posting in postings:
+        if heartbeat.lost.is_set():
+            raise RuntimeError(f"[{company_name}] Lease lost; abandoning the unit.")
+        yield posting
+
+def run_worker_mode(args, store, notion_index, export_sinks=()):
+    """
+    Lease institutions from the shared queue and scrape them one at a time.
+
+    Before each unit the Notion index is refreshed incrementally, so pages
+    uploaded by other workers (including one whose lease expired mid-upload)
+    are seen as existing and not uploaded again.
+    """
+    def process_unit(unit, heartbeat):
+        institution = unit.payload
+        if notion_index is not None:
+            notion_index.refresh_all()
+        # A unit taken over on the same machine continues from its checkpoint
+        checkpoint = open_checkpoint(institution, args.resume or unit.attempts > 1)
+        postings = iter_institution_postings(institution, store, notion_index, checkpoint)
+        write_institution_output(
+            institution, _while_leased(postings, heartbeat, institution["name"]), args.output_format, export_sinks,
+            store
+        )
+
+    with work_queue.SQLiteQueue(args.queue) as queue:
+        counts = work_queue.run_worker(
+            queue, process_unit, worker_id=args.worker_id, lease_seconds=args.lease, wait=args.wait
+        )
+        remaining = queue.counts()
+    tqdm.write(
+        f"\n🧵 Worker Summary: {counts['done']} units done, {counts['failed']} failed; queue has "
+        f"{remaining['pending']} pending, {remaining['leased']} leased, {remaining['failed']} failed"
+    )
 
 # --- Main Execution ---
-if __name__ == "__main__":
+def main(argv=None):
+    args = parse_args(argv)
+    if args.enqueue:
+        with work_queue.SQLiteQueue(args.queue) as queue:
+            enqueue_institutions(queue, load_institutions_config(args.config), args.run_id)
+        return
+
+    if args.record:
+        http_replay.start_recording(args.record)
+    elif args.replay:
+        http_replay.start_replay(args.replay)
+    http_client.configure_host_rate(nc.NOTION_API_BASE, args.notion_rate)
+    notion_scheduler.configure_budget(args.notion_budget)
+
+    # Workers take their institutions from the queue
+    institutions = None if args.worker else load_institutions_config(args.config)
+    store = None if args.no_store else JobStore(args.store)
+    notion_index = open_notion_index(args)
+    if args.sync and notion_index is None:
+        logging.warning("Sync mode needs the Notion index; only new postings will be uploaded.")
+    notion_sync.configure_sync(args.sync and notion_index is not None, args.closed_action, args.closed_stage)
+    conversion_cache.configure_cache(None if args.no_conversion_cache else args.conversion_cache)
+    description_pool.configure_pool(args.parse_workers, args.parse_chunksize)
+    facet_index.configure_facet_cache(ttl=args.facet_cache_ttl * 3600)
+    posting_record.configure_descriptions(args.description_memory)
+    if args.quick and store is None:
+        logging.warning("Quick mode needs the job store; every institution will be scraped in full.")
+    configure_quick(args.quick and store is not None)
 
-    institutions = load_institutions_config()
+    export_sinks = []
+    try:
+        # Workers of one queued run export into the same partition
+        run_id = args.run_id if args.worker else sinks.new_run_id()
+        for name in args.export:
+            export_sinks.append(sinks.open_sink(name, args.export_dir, run_id))
 
-    for institution in tqdm(institutions, desc="Institutions", unit="org"):
-        results = run_institution_scraper(institution)
+        if args.worker:
+            run_worker_mode(args, store, notion_index, export_sinks)
+        elif args.use_async:
+            # asyncio is only loaded for async runs
+            import asyncio
+            from async_runner import run_institutions_async
 
-        # Write full job response to file. One file per institution.
-        safe_name = institution["name"].replace(" ", "_").replace("&", "and")
-        filename = f"json_output/workday_response_{safe_name}.json"
-    
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=4)
-        logging.info(f"Filtered job response saved to {filename}")
+            # Postings are streamed to each institution's output file as they arrive
+            with ExitStack() as outputs:
+                writers = [
+                    outputs.enter_context(open_institution_output(institution, args.output_format, export_sinks, store))
+                    for institution in institutions
+                ]
+                asyncio.run(run_institutions_async(
+                    institutions,
+                    max_per_host=args.max_per_host,
+                    max_institutions=args.max_institutions,
+                    store=store,
+                    notion_index=notion_index,
+                    checkpoints=[open_checkpoint(institution, args.resume) for institution in institutions],
+                    on_postings=writers
+                ))
+        else:
+            for institution in tqdm(institutions, desc="Institutions", unit="org"):
+                checkpoint = open_checkpoint(institution, args.resume)
+                postings = iter_institution_postings(institution, store, notion_index, checkpoint)
+                write_institution_output(institution, postings, args.output_format, export_sinks, store)
+    finally:
+        tqdm.write("\n🌐 Transport Summary:")
+        for line in http_client.format_stats():
+            tqdm.write(line)
+        for line in notion_scheduler.format_stats():
+            tqdm.write(line)
+        tqdm.write("\n🧩 Description Conversion Cache:")
+        for line in conversion_cache.format_stats():
+            tqdm.write(line)
+        for line in posting_record.format_stats():
+            tqdm.write(line)
+        for sink in export_sinks:
+            sink.close()
+            for line in sink.format_stats():
+                tqdm.write(line)
+
+        report = run_metrics.build_report(http_client.get_report(), conversion_cache.get_stats())
+        tqdm.write("\n⏱️ Stage Summary:")
+        for line in run_metrics.format_stage_summary(report):
+            tqdm.write(line)
+        for path in args.report:
+            run_metrics.write_report(path, report)
+            logging.info(f"Run report written to {path}")
+
+        if store is not None:
+            store.close()
+        if notion_index is not None:
+            notion_index.close()
+        description_pool.shutdown_pool()
+        conversion_cache.close_cache()
+        http_replay.stop()
+        notion_scheduler.configure_budget(None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import json
+import os
+import tempfile
+import threading
+from datetime import date, datetime, timezone
+
+import compensation
+
+__all__ = [
+    "PostingSink",
+    "ParquetSink",
+    "DuckDBSink",
+    "SINKS",
+    "COLUMNS",
+    "new_run_id",
+    "posting_row",
+    "listing_posting",
+    "open_sink",
+    "EXPORT_DIR",
+    "BATCH_SIZE"
+]
+
+EXPORT_DIR = "exports"
+
+# Rows buffered before a batch is written
+BATCH_SIZE = 5000
+
+# Column -> type, in table order. Types are spelled as DuckDB names them;
+# `ParquetSink` maps them to Arrow types.
+COLUMNS = {
+    "run_id": "VARCHAR",
+    "scraped_at": "TIMESTAMPTZ",
+    "institution": "VARCHAR",
+    "job_req_id": "VARCHAR",
+    "title": "VARCHAR",
+    "external_url": "VARCHAR",
+    "location": "VARCHAR",
+    "time_type": "VARCHAR",
+    "posted_on": "VARCHAR",
+    "start_date": "DATE",
+    "pay_low": "DOUBLE",
+    "pay_high": "DOUBLE",
+    "pay_period": "VARCHAR",
+    "currency": "VARCHAR",
+    "salary_low": "DOUBLE",
+    "salary_high": "DOUBLE",
+    "description": "VARCHAR"
+}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("The parquet export requires the `pyarrow` package.") from None
+    return pyarrow
+
+
+def _require_duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise RuntimeError("The duckdb export requires the `duckdb` package.") from None
+    return duckdb
+
+
+def _arrow_schema(pa):
+    types = {
+        "VARCHAR": pa.string(),
+        "TIMESTAMPTZ": pa.timestamp("us", tz="UTC"),
+        "DATE": pa.date32(),
+        "DOUBLE": pa.float64()
+    }
+    return pa.schema([(column, types[kind]) for column, kind in COLUMNS.items()])
+
+
+def new_run_id():
+    """A sortable ID for this run, e.g. 20261017T120304Z."""
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _start_date(value):
+    try:
+        return date.fromisoformat(value[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+def listing_posting(listing):
+    """
+    A `jobPostingInfo`-shaped stand-in built from a listing entry, for
+    postings whose detail was never fetched (e.g. ones already in Notion).
+    """
+    req_ids = [field for field in listing.get("bulletFields", []) if isinstance(field, str) and field.strip()]
+    return {
+        "title": listing.get("title"),
+        "jobReqId": req_ids[0].strip() if req_ids else None,
+        "location": listing.get("locationsText"),
+        "postedOn": listing.get("postedOn")
+    }
+
+
+def posting_row(institution_name, posting, run_id, scraped_at):
+    """Flatten a `jobPostingInfo` into a row of `COLUMNS`, with its pay as stated and annualized."""
+    pay = compensation.extract_compensation(posting.get("jobDescription"))
+    return {
+        "run_id": run_id,
+        "scraped_at": scraped_at,
+        "institution": institution_name,
+        "job_req_id": posting.get("jobReqId"),
+        "title": posting.get("title"),
+        "external_url": posting.get("externalUrl"),
+        "location": posting.get("location"),
+        "time_type": posting.get("timeType"),
+        "posted_on": posting.get("postedOn"),
+        "start_date": _start_date(posting.get("startDate")),
+        "pay_low": pay.low if pay else None,
+        "pay_high": pay.high if pay else None,
+        "pay_period": pay.period if pay else None,
+        "currency": pay.currency if pay else None,
+        "salary_low": pay.annual_low if pay else None,
+        "salary_high": pay.annual_high if pay else None,
+        "description": posting.get("jobDescription")
+    }
+
+
+class PostingSink:
+    """
+    Batched destination for the postings of a run.
+
+    Postings are flattened into rows and buffered; every `batch_size` rows,
+    and on `flush`/`close`, the buffer is handed to `_write_batch` in one
+    call. Subclasses implement `_write_batch(rows)` and may override
+    `close` to release their resources after calling the base class.
+    """
+
+    name = None
+
+    def __init__(self, run_id=None, batch_size=BATCH_SIZE):
+        self.run_id = run_id or new_run_id()
+        self.batch_size = batch_size
+        self.rows = 0
+        self.batches = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def write(self, institution_name, posting):
+        row = posting_row(institution_name, posting, self.run_id, datetime.now(timezone.utc))
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            rows, self._buffer = self._buffer, []
+            self._write_batch(rows)
+            self.rows += len(rows)
+            self.batches += 1
+
+    def flush(self):
+        """Write out buffered rows, e.g. when an institution finishes."""
+        with self._lock:
+            self._flush()
+
+    def _write_batch(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def format_stats(self):
+        return [f"  📤 {self.name}: {self.rows} postings in {self.batches} batches (run {self.run_id})"]
+
+
+class ParquetSink(PostingSink):
+    """
+    Appends each run to a Parquet dataset as its own Hive-style partition,
+    `<root>/run=<run_id>/part-<pid>-<n>.parquet`, one file per batch. Files
+    are never rewritten, so workers of the same run can share a partition,
+    and the dataset can be queried as a whole, e.g. with DuckDB's
+    `read_parquet('<root>/*/*.parquet', hive_partitioning = true)`.
+    """
+
+    name = "parquet"
+
+    def __init__(self, root, run_id=None, batch_size=BATCH_SIZE):
+        super().__init__(run_id, batch_size)
+        self._pa = _require_pyarrow()
+        self.schema = _arrow_schema(self._pa)
+        self.partition = os.path.join(root, f"run={self.run_id}")
+        os.makedirs(self.partition, exist_ok=True)
+
+    def _write_batch(self, rows):
+        table = self._pa.Table.from_pylist(rows, schema=self.schema)
+        path = os.path.join(self.partition, f"part-{os.getpid()}-{self.batches:05d}.parquet")
+        tmp_path = f"{path}.tmp"
+        self._pa.parquet.write_table(table, tmp_path, compression="zstd")
+        # Readers globbing *.parquet never see a half-written file
+        os.replace(tmp_path, path)
+
+
+class DuckDBSink(PostingSink):
+    """
+    Appends each run's postings to the `postings` table of a DuckDB
+    database, tagged with the run's `run_id`. Batches go in as one insert
+    each, through Arrow when `pyarrow` is installed. A DuckDB file takes
+    one writing process at a time; queue workers should export to Parquet.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, path, run_id=None, batch_size=BATCH_SIZE):
+        super().__init__(run_id, batch_size)
+        duckdb = _require_duckdb()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._conn = duckdb.connect(path)
+        columns = ", ".join(f"{column} {kind}" for column, kind in COLUMNS.items())
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS postings ({columns})")
+        try:
+            self._pa = _require_pyarrow()
+        except RuntimeError:
+            self._pa = None
+
+    def _write_batch(self, rows):
+        names = ", ".join(COLUMNS)
+        if self._pa is not None:
+            batch = self._pa.Table.from_pylist(rows, schema=_arrow_schema(self._pa))
+            self._conn.register("batch", batch)
+            try:
+                self._conn.execute(f"INSERT INTO postings ({names}) SELECT {names} FROM batch")
+            finally:
+                self._conn.unregister("batch")
+        else:
+            # DuckDB loads a JSON Lines file natively, far faster than binding rows
+            columns = ", ".join(f"{column}: '{kind}'" for column, kind in COLUMNS.items())
+            with tempfile.NamedTemporaryFile("w", suffix=".jsonl", encoding="utf-8", delete=False) as f:
+                for row in rows:
+                    f.write(json.dumps(row, default=str) + "\n")
+            try:
+                self._conn.execute(
+                    f"INSERT INTO postings ({names}) SELECT {names} "
+                    f"FROM read_json(?, format = 'newline_delimited', columns = {{{columns}}})",
+                    [f.name]
+                )
+            finally:
+                os.remove(f.name)
+
+    def close(self):
+        super().close()
+        self._conn.close()
+
+
+# name -> (sink class, path under the export directory)
+SINKS = {
+    "parquet": (ParquetSink, "postings"),
+    "duckdb": (DuckDBSink, "postings.duckdb")
+}
+
+
+def open_sink(name, export_dir=EXPORT_DIR, run_id=None, batch_size=BATCH_SIZE):
+    """Open the sink registered as `name`, writing under `export_dir`."""
+    try:
+        sink_class, relative_path = SINKS[name]
+    except KeyError:
+        raise ValueError(f"Unknown export '{name}'. Choose from: {', '.join(SINKS)}") from None
+    return sink_class(os.path.join(export_dir, relative_path), run_id, batch_size)
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+import pytest
+
+import async_runner
+import http_client
+import institution_runner as ir
+import notion_client as nc
+
+CREATES = 30
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.status_code = 200
+        self.headers = {}
+        self.content = json.dumps(data).encode("utf-8")
+        self.text = self.content.decode("utf-8")
+        self.request = SimpleNamespace(body=None)
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class FakeNotion:
+    """Records Notion requests in the order they are sent, as (kind, institution)."""
+
+    def __init__(self):
+        self.log = []
+        self.creating = threading.Event()
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        institution = "Late Bank" if "Late Bank" in json.dumps(kwargs.get("json")) else "Big Bank"
+        kind = "query" if url.endswith("/query") else "create"
+        with self._lock:
+            self.log.append((kind, institution))
+        if kind == "create":
+            self.creating.set()
+            return FakeResponse({"id": f"page-{len(self.log)}"})
+        return FakeResponse({"results": [], "has_more": False})
+
+
+def institution(name):
+    slug = name.split()[0].lower()
+    return {"name": name, "workday_url": f"https://{slug}.example/wday/cxs/{slug}/site/jobs", "search_text": ""}
+
+
+@pytest.fixture
+def notion(monkeypatch):
+    fake = FakeNotion()
+    notion_host = urlsplit(nc.NOTION_API_BASE).netloc
+    http_client.configure_session_factory(lambda host, session: fake if host == notion_host else session)
+    http_client.configure_host_rate(nc.NOTION_API_BASE, 20)
+    yield fake
+    http_client.configure_session_factory(None)
+    http_client.configure_host_rate(nc.NOTION_API_BASE, http_client.NOTION_RATE)
+
+
+def test_query_runs_ahead_of_another_institutions_queued_creates(notion, monkeypatch):
+    def collect_listings(url, *args, **kwargs):
+        if url.startswith("https://late."):
+            # Start deduplicating once the other institution is uploading
+            assert notion.creating.wait(10)
+            return [{"externalPath": "/job/Analyst_L1", "title": "Analyst", "bulletFields": ["L1"]}], True
+        return [
+            {"externalPath": f"/job/Analyst_B{i}", "title": "Analyst", "bulletFields": [f"B{i}"]}
+            for i in range(CREATES)
+        ], True
+
+    def fetch_job_detail(job_url, company_name, store=None, listing=None):
+        return {"title": listing["title"], "jobReqId": listing["bulletFields"][0], "externalUrl": job_url,
+                "jobDescription": "<p>Analyst</p>"}
+
+    monkeypatch.setattr(ir, "check_first_page", lambda *args, **kwargs: (False, None))
+    monkeypatch.setattr(ir, "collect_listings", collect_listings)
+    monkeypatch.setattr(ir, "fetch_job_detail", fetch_job_detail)
+
+    results = asyncio.run(async_runner.run_institutions_async([institution("Big Bank"), institution("Late Bank")]))
+
+    assert [len(postings) for postings in results] == [CREATES, 1]
+    late_queries = [i for i, entry in enumerate(notion.log) if entry == ("query", "Late Bank")]
+    big_creates = [i for i, entry in enumerate(notion.log) if entry == ("create", "Big Bank")]
+    assert len(late_queries) == 2 and len(big_creates) == CREATES
+    # Only the creates already sent or next in line go first; the rest wait behind the queries
+    assert sum(1 for i in big_creates if i < late_queries[-1]) <= CREATES // 3
+
+
+def test_failing_institution_keeps_the_others_results(notion, monkeypatch):
+    def collect_listings(url, *args, **kwargs):
+        if url.startswith("https://late."):
+            raise RuntimeError("tenant down")
+        return [{"externalPath": "/job/Analyst_B1", "title": "Analyst", "bulletFields": ["B1"]}], True
+
+    monkeypatch.setattr(ir, "check_first_page", lambda *args, **kwargs: (False, None))
+    monkeypatch.setattr(ir, "collect_listings", collect_listings)
+    monkeypatch.setattr(ir, "fetch_job_detail", lambda job_url, company_name, store=None, listing=None: {
+        "title": listing["title"], "jobReqId": listing["bulletFields"][0], "jobDescription": "<p>Analyst</p>"
+    })
+
+    results = asyncio.run(async_runner.run_institutions_async(
+        [institution("Late Bank"), institution("Big Bank")]
+    ))
+
+    assert [len(postings) for postings in results] == [0, 1]
+
+
+def test_postings_stream_out_in_plan_order(notion, monkeypatch):
+    listings = [
+        {"externalPath": f"/job/Analyst_B{i}", "title": "Analyst", "bulletFields": [f"B{i}"]} for i in range(10)
+    ]
+
+    def fetch_job_detail(job_url, company_name, store=None, listing=None):
+        # Later postings finish first within each window
+        time.sleep(0.002 * (10 - int(listing["bulletFields"][0][1:])))
+        return {"title": listing["title"], "jobReqId": listing["bulletFields"][0], "jobDescription": "<p>Analyst</p>"}
+
+    monkeypatch.setattr(ir, "UPLOAD_CHUNK", 4)
+    monkeypatch.setattr(ir, "check_first_page", lambda *args, **kwargs: (False, None))
+    monkeypatch.setattr(ir, "collect_listings", lambda *args, **kwargs: (listings, True))
+    monkeypatch.setattr(ir, "fetch_job_detail", fetch_job_detail)
+
+    written = []
+    results = asyncio.run(async_runner.run_institutions_async([institution("Big Bank")], on_postings=[written.append]))
+
+    assert results == [[]]
+    assert [posting["jobReqId"] for posting in written] == [f"B{i}" for i in range(10)]
+    assert sum(1 for kind, _ in notion.log if kind == "create") == 10
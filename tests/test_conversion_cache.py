@@ -0,0 +1,27 @@
+import conversion_cache
+
+DAY_RATE = "<p>Pay: $200 - $300 per day</p>"
+
+
+def test_entries_from_before_the_day_rate_fix_are_not_reused(tmp_path, monkeypatch):
+    path = str(tmp_path / "conversion_cache.sqlite3")
+    # An entry written by version 2, which annualized day rates as hourly
+    monkeypatch.setattr(conversion_cache, "CACHE_VERSION", 2)
+    with conversion_cache.ConversionCache(path) as cache:
+        cache.store(DAY_RATE, ([], (416000.0, 624000.0)))
+    monkeypatch.undo()
+
+    with conversion_cache.ConversionCache(path) as cache:
+        assert cache.lookup(DAY_RATE) is None
+        _, salary_range = cache.convert(DAY_RATE)
+    assert salary_range == (52000.0, 78000.0)
+
+
+def test_entries_of_the_current_version_are_reused(tmp_path):
+    path = str(tmp_path / "conversion_cache.sqlite3")
+    with conversion_cache.ConversionCache(path) as cache:
+        cache.convert(DAY_RATE)
+    with conversion_cache.ConversionCache(path) as cache:
+        cached = cache.lookup(DAY_RATE)
+        assert cache.stats["disk_hits"] == 1
+    assert cached[1] == (52000.0, 78000.0)
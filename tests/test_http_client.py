@@ -0,0 +1,78 @@
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+import http_client
+
+HOST = "retry.example"
+URL = f"https://{HOST}/pages"
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {"Retry-After": "0"} if status_code == 429 else {}
+        self.content = b"{}"
+        self.text = "{}"
+        self.request = type("Sent", (), {"body": None})()
+
+
+class FakeSession:
+    """Fails with each of `outcomes` in turn (an exception or a status code), then answers 200."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else 200
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(http_client, "_backoff", lambda attempt: 0)
+    http_client.configure_host_rate(HOST, 1000)
+
+    def install(*outcomes):
+        fake = FakeSession(outcomes)
+        http_client.configure_session_factory(lambda host, session: fake if host == HOST else session)
+        return fake
+
+    yield install
+    http_client.configure_session_factory(None)
+
+
+def refused():
+    return requests.ConnectionError(MaxRetryError(None, URL, NewConnectionError(None, "refused")))
+
+
+@pytest.mark.parametrize("outcome", [502, requests.ReadTimeout("read timed out"), refused()])
+def test_idempotent_requests_are_retried(session, outcome):
+    fake = session(outcome)
+    assert http_client.post(URL).status_code == 200
+    assert fake.calls == 2
+
+
+@pytest.mark.parametrize("outcome", [429, requests.ConnectTimeout("connect timed out"), refused()])
+def test_non_idempotent_requests_retry_what_was_never_processed(session, outcome):
+    fake = session(outcome)
+    assert http_client.post(URL, idempotent=False).status_code == 200
+    assert fake.calls == 2
+
+
+def test_non_idempotent_requests_return_5xx_without_retrying(session):
+    fake = session(502)
+    assert http_client.post(URL, idempotent=False).status_code == 502
+    assert fake.calls == 1
+
+
+@pytest.mark.parametrize("error", [requests.ReadTimeout("read timed out"), requests.ConnectionError("reset")])
+def test_non_idempotent_requests_raise_ambiguous_errors_without_retrying(session, error):
+    fake = session(error)
+    with pytest.raises(type(error)):
+        http_client.post(URL, idempotent=False)
+    assert fake.calls == 1
@@ -0,0 +1,86 @@
+import requests
+
+import notion_client as nc
+import notion_uploader
+
+
+class FakeResponse:
+    def __init__(self, status_code, page_id=None):
+        self.status_code = status_code
+        self.text = ""
+        self._page_id = page_id
+
+    def json(self):
+        return {"id": self._page_id}
+
+
+class FakeNotion:
+    """Answers creates with `outcomes` in turn (an exception or a status code), then 200."""
+
+    def __init__(self, monkeypatch, outcomes, lookups=()):
+        self.outcomes = list(outcomes)
+        self.lookups = list(lookups)
+        self.creates = 0
+        self.looked_up = []
+        monkeypatch.setattr(nc, "create_page", self.create_page)
+        monkeypatch.setattr(nc, "find_page_id", self.find_page_id)
+        monkeypatch.setattr(nc, "append_blocks", lambda page_id, blocks: [])
+
+    def create_page(self, payload):
+        self.creates += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else 200
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome, f"page-{self.creates}")
+
+    def find_page_id(self, database_id, req_id, company_filter=None):
+        self.looked_up.append(req_id)
+        outcome = self.lookups.pop(0) if self.lookups else None
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def upload(job=None):
+    created = []
+    job = job or {"title": "Analyst", "jobReqId": "R1", "jobDescription": "<p>Analyst</p>"}
+    tasks = notion_uploader.upload_jobs(
+        [job], "Test Bank", on_created=lambda job, page_id: created.append(page_id), workers=1
+    )
+    return tasks[0], created
+
+
+def test_timed_out_create_that_went_through_is_not_created_again(monkeypatch):
+    notion = FakeNotion(monkeypatch, [requests.ReadTimeout("read timed out")], lookups=["page-1"])
+    task, created = upload()
+    assert task.done and task.page_id == "page-1"
+    assert notion.creates == 1 and notion.looked_up == ["R1"]
+    assert created == ["page-1"]
+
+
+def test_5xx_create_is_sent_again_when_no_page_was_made(monkeypatch):
+    notion = FakeNotion(monkeypatch, [502], lookups=[None])
+    task, created = upload()
+    assert task.done and created == ["page-2"]
+    assert notion.creates == 2 and notion.looked_up == ["R1"]
+
+
+def test_failed_lookup_never_leads_to_a_create(monkeypatch):
+    notion = FakeNotion(monkeypatch, [requests.ConnectionError("reset")],
+                        lookups=[requests.HTTPError("query failed"), "page-1"])
+    task, created = upload()
+    assert task.done and created == ["page-1"]
+    assert notion.creates == 1 and notion.looked_up == ["R1", "R1"]
+
+
+def test_429_is_retried_without_a_lookup(monkeypatch):
+    notion = FakeNotion(monkeypatch, [429])
+    task, _ = upload()
+    assert task.done and notion.creates == 2 and notion.looked_up == []
+
+
+def test_unconfirmed_create_without_req_id_is_not_retried(monkeypatch):
+    notion = FakeNotion(monkeypatch, [requests.ReadTimeout("read timed out")])
+    task, created = upload({"title": "Analyst", "jobReqId": "", "jobDescription": "<p>Analyst</p>"})
+    assert not task.done and not task.retryable and "no Req ID" in task.error
+    assert notion.creates == 1 and created == []
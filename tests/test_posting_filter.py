@@ -0,0 +1,57 @@
+import pytest
+
+from posting_filter import PostingFilter
+
+
+def from_filters(filters):
+    return PostingFilter.from_institution({"name": "Test", "filters": filters})
+
+
+@pytest.mark.parametrize("filters, key", [
+    ({"keywords": ["sql"]}, "keywords"),
+    ({"keywords": {"sql": "a lot"}}, "keywords.sql"),
+    ({"title_include": 5}, "title_include"),
+    ({"title_exclude": ["intern", 3]}, "title_exclude"),
+    ({"required_keywords": {"sql": 1}}, "required_keywords"),
+    ({"min_salary": "eighty thousand"}, "min_salary"),
+    ({"min_salary": [80000]}, "min_salary"),
+    ({"posted_within_days": "a week"}, "posted_within_days"),
+    ({"posted_within_days": -1}, "posted_within_days"),
+    ({"min_score": True}, "min_score"),
+    ({"require_salary": "yes"}, "require_salary"),
+    ({"title_include": ["(unclosed"]}, "title_include"),
+    ({"salary_min": 80000}, "salary_min"),
+    (["title_include"], "filters"),
+])
+def test_bad_config_raises_value_error_naming_the_key(filters, key):
+    with pytest.raises(ValueError, match=key.replace(".", r"\.")):
+        from_filters(filters)
+
+
+def test_numeric_strings_are_coerced():
+    posting_filter = from_filters({
+        "min_salary": "80000", "posted_within_days": "7", "min_score": "1.5", "keywords": {"sql": "2"}
+    })
+    assert posting_filter.min_salary == 80000
+    assert posting_filter.posted_within_days == 7
+    assert posting_filter.min_score == 1.5
+
+    job = {
+        "title": "Data Analyst",
+        "startDate": "2000-01-01",
+        "jobDescription": "<p>SQL daily. Salary: $90,000 - $100,000 per year.</p>"
+    }
+    assert posting_filter.score(job) == 2
+    assert not posting_filter.accepts_detail(job)
+    assert posting_filter.accepts_listing({"title": "Data Analyst", "postedOn": "Posted Today"})
+
+
+def test_single_strings_are_accepted_for_lists():
+    posting_filter = from_filters({"title_include": "analyst", "required_keywords": "SQL"})
+    job = {"title": "Data Analyst", "jobDescription": "<p>SQL and Python</p>"}
+    assert posting_filter.accepts_detail(job)
+    assert not posting_filter.accepts_detail({**job, "jobDescription": "<p>Python only</p>"})
+
+
+def test_no_filters():
+    assert PostingFilter.from_institution({"name": "Test"}) is None
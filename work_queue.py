@@ -0,0 +1,358 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+__all__ = [
+    "WorkUnit",
+    "SQLiteQueue",
+    "MemoryQueue",
+    "Heartbeat",
+    "run_worker",
+    "default_worker_id",
+    "DEFAULT_QUEUE_PATH",
+    "LEASE_SECONDS"
+]
+
+DEFAULT_QUEUE_PATH = "state/work_queue.sqlite3"
+
+# A leased unit is handed to another worker if its lease is not renewed in time;
+# workers renew every third of the lease.
+LEASE_SECONDS = 300.0
+
+# Leases handed out for a unit before it is marked failed
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    unit_key TEXT NOT NULL UNIQUE,
+    payload_json TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_expires REAL,
+    error TEXT,
+    result_json TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_units_status ON units (status, lease_expires);
+"""
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+@dataclass
+class WorkUnit:
+    """One leased unit of work, e.g. an institution to scrape."""
+    id: int
+    kind: str
+    key: str
+    payload: dict
+    attempts: int
+    owner: str
+
+
+class SQLiteQueue:
+    """
+    Work queue in a SQLite database shared by worker processes.
+
+    Units are enqueued once per key, so enqueueing the same institutions
+    twice does not duplicate work. A worker leases one unit at a time; the
+    lease is renewed by heartbeats while the unit runs, and a unit whose lease
+    expires (its worker died or hung) is handed to the next worker that asks.
+    Completing, failing or renewing a unit only succeeds while the caller
+    still holds its lease.
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit mode, so leases can take the write lock up front with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _transaction(self, sql, params=()):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+                return cursor
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, kind, key, payload):
+        """
+        Add a unit unless one with the same key exists.
+
+        Returns:
+            bool: True if the unit was added.
+        """
+        cursor = self._transaction(
+            "INSERT OR IGNORE INTO units (kind, unit_key, payload_json, updated_at) VALUES (?, ?, ?, ?)",
+            (kind, key, json.dumps(payload), time.time())
+        )
+        return cursor.rowcount == 1
+
+    def lease(self, owner, lease_seconds=LEASE_SECONDS):
+        """
+        Claim the oldest pending unit, or one whose lease expired.
+
+        Returns:
+            WorkUnit or None: None when nothing is available right now.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Units that keep losing their worker are given up on
+                self._conn.execute(
+                    "UPDATE units SET status = 'failed', owner = NULL, error = 'lease expired too often', "
+                    "updated_at = ? WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, now, self.max_attempts)
+                )
+                row = self._conn.execute(
+                    "SELECT * FROM units WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                    "ORDER BY id LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE units SET status = 'leased', owner = ?, lease_expires = ?, "
+                        "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (owner, now + lease_seconds, now, row["id"])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+        if row["status"] == "leased":
+            logging.warning(f"Taking over unit {row['unit_key']} from {row['owner']} (lease expired).")
+        return WorkUnit(row["id"], row["kind"], row["unit_key"], json.loads(row["payload_json"]),
+                        row["attempts"] + 1, owner)
+
+    def heartbeat(self, unit, lease_seconds=LEASE_SECONDS):
+        """
+        Renew a unit's lease.
+
+        Returns:
+            bool: False if the lease was lost to another worker.
+        """
+        now = time.time()
+        cursor = self._transaction(
+            "UPDATE units SET lease_expires = ?, updated_at = ? WHERE id = ? AND owner = ? AND status = 'leased'",
+            (now + lease_seconds, now, unit.id, unit.owner)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, unit, result=None):
+        """Mark a unit done. Returns False if the lease was lost first."""
+        cursor = self._transaction(
+            "UPDATE units SET status = 'done', owner = NULL, lease_expires = NULL, result_json = ?, updated_at = ? "
+            "WHERE id = ? AND owner = ? AND status = 'leased'",
+            (json.dumps(result), time.time(), unit.id, unit.owner)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, unit, error):
+        """
+        Release a unit after an error: back to pending while it has attempts
+        left, failed after that. Returns False if the lease was lost first.
+        """
+        status = "failed" if unit.attempts >= self.max_attempts else "pending"
+        cursor = self._transaction(
+            "UPDATE units SET status = ?, owner = NULL, lease_expires = NULL, error = ?, updated_at = ? "
+            "WHERE id = ? AND owner = ? AND status = 'leased'",
+            (status, str(error), time.time(), unit.id, unit.owner)
+        )
+        return cursor.rowcount == 1
+
+    def counts(self):
+        """Units per status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM units GROUP BY status").fetchall()
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+
+class MemoryQueue:
+    """
+    In-process stand-in for `SQLiteQueue` with the same interface and lease
+    semantics, for tests and single-machine runs with worker threads.
+    """
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._units = {}  # key -> dict
+        self._next_id = 1
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def enqueue(self, kind, key, payload):
+        with self._lock:
+            if key in self._units:
+                return False
+            self._units[key] = {
+                "id": self._next_id, "kind": kind, "key": key, "payload": json.loads(json.dumps(payload)),
+                "status": "pending", "attempts": 0, "owner": None, "lease_expires": None
+            }
+            self._next_id += 1
+            return True
+
+    def lease(self, owner, lease_seconds=LEASE_SECONDS):
+        now = time.time()
+        with self._lock:
+            for unit in sorted(self._units.values(), key=lambda u: u["id"]):
+                expired = unit["status"] == "leased" and unit["lease_expires"] < now
+                if expired and unit["attempts"] >= self.max_attempts:
+                    unit.update(status="failed", owner=None, error="lease expired too often")
+                    continue
+                if unit["status"] == "pending" or expired:
+                    if expired:
+                        logging.warning(f"Taking over unit {unit['key']} from {unit['owner']} (lease expired).")
+                    unit.update(status="leased", owner=owner, lease_expires=now + lease_seconds)
+                    unit["attempts"] += 1
+                    return WorkUnit(unit["id"], unit["kind"], unit["key"], unit["payload"], unit["attempts"], owner)
+        return None
+
+    def _owned(self, unit):
+        stored = self._units.get(unit.key)
+        return stored is not None and stored["owner"] == unit.owner and stored["status"] == "leased"
+
+    def heartbeat(self, unit, lease_seconds=LEASE_SECONDS):
+        with self._lock:
+            if not self._owned(unit):
+                return False
+            self._units[unit.key]["lease_expires"] = time.time() + lease_seconds
+            return True
+
+    def complete(self, unit, result=None):
+        with self._lock:
+            if not self._owned(unit):
+                return False
+            self._units[unit.key].update(status="done", owner=None, lease_expires=None, result=result)
+            return True
+
+    def fail(self, unit, error):
+        with self._lock:
+            if not self._owned(unit):
+                return False
+            status = "failed" if unit.attempts >= self.max_attempts else "pending"
+            self._units[unit.key].update(status=status, owner=None, lease_expires=None, error=str(error))
+            return True
+
+    def counts(self):
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        with self._lock:
+            for unit in self._units.values():
+                counts[unit["status"]] += 1
+        return counts
+
+
+class Heartbeat:
+    """
+    Renews a unit's lease from a background thread while the unit runs.
+    `lost` is set if a renewal finds the lease taken by another worker.
+    """
+
+    def __init__(self, queue, unit, lease_seconds=LEASE_SECONDS):
+        self.queue = queue
+        self.unit = unit
+        self.lease_seconds = lease_seconds
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(self.unit, self.lease_seconds):
+                    logging.error(f"Lost the lease on unit {self.unit.key}.")
+                    self.lost.set()
+                    return
+            except sqlite3.Error as e:
+                # Transient (e.g. the database is busy); the next beat may succeed
+                logging.warning(f"Heartbeat for unit {self.unit.key} failed: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_worker(queue, process_unit, worker_id=None, lease_seconds=LEASE_SECONDS, wait=False, poll_interval=5.0):
+    """
+    Lease and process units until the queue is drained.
+
+    `process_unit(unit, heartbeat)` does the work and may return a
+    JSON-serializable result; an exception releases the unit for a retry.
+    With `wait`, the worker keeps polling an empty queue instead of
+    returning, e.g. to pick up expired leases or newly enqueued units.
+
+    Returns:
+        dict: done and failed unit counts for this worker.
+    """
+    worker_id = worker_id or default_worker_id()
+    counts = {"done": 0, "failed": 0}
+
+    while True:
+        unit = queue.lease(worker_id, lease_seconds)
+        if unit is None:
+            if wait or queue.counts()["leased"]:
+                # Another worker may still die and leave its unit to us
+                time.sleep(poll_interval)
+                continue
+            return counts
+
+        logging.info(f"[{worker_id}] Leased {unit.kind} unit {unit.key} (attempt {unit.attempts}).")
+        with Heartbeat(queue, unit, lease_seconds) as heartbeat:
+            try:
+                result = process_unit(unit, heartbeat)
+            except Exception as e:
+                logging.exception(f"[{worker_id}] Unit {unit.key} failed: {e}")
+                queue.fail(unit, e)
+                counts["failed"] += 1
+                continue
+
+        if queue.complete(unit, result):
+            counts["done"] += 1
+        else:
+            logging.error(f"[{worker_id}] Unit {unit.key} finished after its lease was lost.")